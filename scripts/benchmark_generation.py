@@ -0,0 +1,145 @@
+# scripts/benchmark_generation.py
+
+"""
+Times and scores a grid of T5 generation settings on a fixed sample.
+
+Every combination of --beams, --chunk-max, --final-max and --no-repeat is
+run through the dataset's two-stage summarizer on the same first --sample
+documents, with a fixed batch size. Seconds per document, generated tokens
+per second and ROUGE-1/2/L (t5_evaluation.score_summaries) go into a
+Markdown table in reports/.
+"""
+
+import sys
+import os
+import argparse
+import importlib
+import itertools
+import time
+from dataclasses import replace
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.append(os.path.dirname(SCRIPTS_DIR))
+
+from src.batching import BatchStats, GenerationCounter
+from src.records import read_records
+from src.resources import PRECISIONS, load_t5
+from t5_evaluation import score_summaries
+
+# ===== CONFIG =====
+# dataset -> (summarizer module, default input, default reference corpus)
+DATASETS = {
+    "inabs": ("t5_inabs", "data/cleaned_inabs.json", "data/cleaned_inabs.json"),
+    "ilc": ("t5_ilc", "data/chunked_ilc.json", "data/cleaned_ilc.json"),
+}
+SAMPLE = 20
+BEAMS = [1, 2, 4, 8]
+CHUNK_MAX = [100]
+FINAL_MAX = [300]
+NO_REPEAT = [3]
+REPORT_PATH = "reports/generation_benchmark.md"
+# ==================
+
+
+def run_config(module, settings, docs, ids, references, batch_size, beams, chunk_max, final_max, no_repeat):
+    """
+    Summarizes `docs` with one generation setting applied to `settings`;
+    returns a result row.
+    """
+    settings = replace(settings, num_beams=beams, chunk_sum_max=chunk_max, final_sum_max=final_max,
+                       no_repeat_ngram_size=no_repeat, generation=GenerationCounter())
+
+    start = time.perf_counter()
+    summaries = module.two_stage_summarize_many(docs, settings, BatchStats(), batch_size)
+    seconds = time.perf_counter() - start
+
+    candidates = [{"id": i, "refined_summary_improved": s} for i, s in zip(ids, summaries)]
+    rouge = score_summaries(candidates, references)
+    return {
+        "beams": beams,
+        "chunk_max": chunk_max,
+        "final_max": final_max,
+        "no_repeat": no_repeat,
+        "sec_per_doc": seconds / len(docs),
+        "tokens_per_sec": settings.generation.tokens / seconds if seconds else 0.0,
+        "generate_calls": settings.generation.calls,
+        "scored": rouge["processed"],
+        **rouge["scores"],
+    }
+
+
+def markdown_table(rows):
+    lines = [
+        "| beams | chunk max | final max | no-repeat | s/doc | gen tok/s | generate calls | ROUGE-1 | ROUGE-2 | ROUGE-L |",
+        "|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for r in rows:
+        lines.append(
+            f"| {r['beams']} | {r['chunk_max']} | {r['final_max']} | {r['no_repeat']} "
+            f"| {r['sec_per_doc']:.2f} | {r['tokens_per_sec']:.1f} | {r['generate_calls']} "
+            f"| {r['rouge1']*100:.2f} | {r['rouge2']*100:.2f} | {r['rougeL']*100:.2f} |"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark a grid of T5 generation settings.")
+    parser.add_argument("--dataset", choices=sorted(DATASETS), default="inabs")
+    parser.add_argument("--input", help="records to summarize (default: the dataset's input)")
+    parser.add_argument("--reference", help="corpus with summary_text (default: the dataset's cleaned corpus)")
+    parser.add_argument("--sample", type=int, default=SAMPLE, help="first N documents, the same for every setting")
+    parser.add_argument("--beams", type=int, nargs="+", default=BEAMS)
+    parser.add_argument("--chunk-max", type=int, nargs="+", default=CHUNK_MAX, help="stage-1 max_length values")
+    parser.add_argument("--final-max", type=int, nargs="+", default=FINAL_MAX, help="stage-2 max_length values")
+    parser.add_argument("--no-repeat", type=int, nargs="+", default=NO_REPEAT, help="no_repeat_ngram_size values")
+    parser.add_argument("--batch-size", type=int, default=None, help="fixed batch size (default: the script's)")
+    parser.add_argument("--precision", choices=PRECISIONS, default=None)
+    parser.add_argument("--output", default=REPORT_PATH, help="Markdown report")
+    args = parser.parse_args(argv)
+
+    module_name, default_input, default_reference = DATASETS[args.dataset]
+    module = importlib.import_module(module_name)
+    settings = module.make_settings()
+    if args.precision:
+        settings = replace(settings, precision=args.precision)
+    batch_size = args.batch_size or settings.batch_size
+
+    entries = list(read_records(args.input or default_input, limit=args.sample))
+    docs = [module.make_doc(e) for e in entries]
+    keep = [i for i, d in enumerate(docs) if d["full_text"].strip()]
+    docs = [docs[i] for i in keep]
+    ids = [entries[i].get("id") for i in keep]
+    if not docs:
+        sys.exit("❌ No documents with text in the sample")
+    references = {e["id"]: e["summary_text"] for e in read_records(args.reference or default_reference)
+                  if "summary_text" in e}
+
+    load_t5(settings.model_name, settings.precision)   # keep model loading out of the timings
+    grid = list(itertools.product(args.beams, args.chunk_max, args.final_max, args.no_repeat))
+    rows = []
+    for beams, chunk_max, final_max, no_repeat in grid:
+        row = run_config(module, settings, docs, ids, references, batch_size, beams, chunk_max, final_max, no_repeat)
+        rows.append(row)
+        print(f"⏱️ beams={beams} chunk_max={chunk_max} final_max={final_max} no_repeat={no_repeat}: "
+              f"{row['sec_per_doc']:.2f} s/doc, ROUGE-1 {row['rouge1']*100:.2f}")
+
+    table = markdown_table(rows)
+    header = (
+        f"# Generation benchmark ({args.dataset})\n\n"
+        f"{datetime.now():%Y-%m-%d %H:%M}, model `{settings.model_name}`, precision {settings.precision}, "
+        f"{len(docs)} documents, batch size {batch_size}. "
+        f"ROUGE is F1 (%) against `summary_text`; s/doc excludes model loading.\n\n"
+    )
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(header + table + "\n")
+    print("\n" + table)
+    print(f"\n✅ Saved benchmark of {len(rows)} settings to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
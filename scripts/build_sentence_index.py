@@ -0,0 +1,34 @@
+# scripts/build_sentence_index.py
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.records import read_records
+from src.sentence_index import DEFAULT_SPLITTER, SPLITTERS, TEXT_KEY, SentenceIndex, build_sentence_index, index_path
+
+# ===== CONFIG =====
+DEFAULT_INPUTS = ["data/cleaned_inabs.json", "data/cleaned_ilc.json"]
+# ==================
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split cleaned corpora into sentences once and save the offsets.")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help="cleaned .json/.jsonl files")
+    parser.add_argument("--splitter", choices=SPLITTERS, default=DEFAULT_SPLITTER,
+                        help="punkt (nltk.sent_tokenize, for extractive_summarizer.py) or regex "
+                             "(split after . ! ?, for the T5 scripts)")
+    parser.add_argument("--text-key", default=TEXT_KEY, help="record field holding the cleaned text")
+    args = parser.parse_args(argv)
+
+    for path in args.inputs:
+        out_path = index_path(path, args.splitter)
+        count = build_sentence_index(read_records(path), out_path, text_key=args.text_key, splitter=args.splitter)
+        index = SentenceIndex(out_path)
+        print(f"✅ {path} → {out_path}: {count} documents, {len(index.spans)} sentences")
+
+
+if __name__ == "__main__":
+    main()
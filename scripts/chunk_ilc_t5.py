@@ -1,59 +1,213 @@
 # scripts/chunk_ilc_t5.py
 
-import json
-from transformers import T5Tokenizer
+import sys
+import os
+import re
+import argparse
+from bisect import bisect_right
+from itertools import islice
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.resources import load_tokenizer, tokenizer_info
+from src.records import DEFAULT_BUFFER_SIZE, read_records, write_records
 
 # ===== CONFIG =====
-INPUT_PATH = "data/cleaned_ilc.json"  
+INPUT_PATH = "data/cleaned_ilc.json"
 OUTPUT_PATH = "data/chunked_ilc.json"
 TEXT_KEY = "input_text"
 MODEL_NAME = "t5-base"
-MAX_TOKENS = 512  # T5 limit
+MAX_TOKENS = 512  # T5 limit, including the prefix and </s>
+PREFIX = "summarize: "
+SENTENCE_BOUNDARIES = False  # prefer cutting after . ! ?
+OVERLAP_TOKENS = 0           # tokens repeated at the start of the next chunk
+BATCH_DOCS = 32              # documents encoded per tokenizer call
+STORE_IDS = False            # also save chunk token ids/lengths for t5_ilc.py
 # ==================
 
-tokenizer = T5Tokenizer.from_pretrained(MODEL_NAME)
+_SENTENCE_END = re.compile(r"[.!?][\"')\]]*$")
+
+
+def token_budget(tokenizer, max_tokens=MAX_TOKENS, prefix=PREFIX):
+    """
+    Tokens left for chunk text once the prefix and the EOS token are counted.
+    """
+    prefix_len = len(tokenizer(prefix, add_special_tokens=False).input_ids) if prefix else 0
+    return max_tokens - prefix_len - 1
+
+
+def _boundaries(text, offsets, sentences):
+    """
+    Token indices where a chunk may start: word starts, or sentence starts
+    when `sentences` is set.
+    """
+    bounds = []
+    for i, (start, end) in enumerate(offsets):
+        if i == 0 or start == end:
+            continue
+        # Fast tokenizers report "▁word" either with or without the space;
+        # a bare "▁" token already owns the space before the next piece.
+        if not (text[start].isspace() or (text[start - 1].isspace() and offsets[i - 1][1] < start)):
+            continue
+        if sentences and not _SENTENCE_END.search(text[max(0, start - 4):start].rstrip()):
+            continue
+        bounds.append(i)
+    return bounds
+
+
+def chunk_spans(text, offsets, budget, sentence_boundaries=SENTENCE_BOUNDARIES, overlap=OVERLAP_TOKENS):
+    """
+    Splits a document's token sequence into [start, end) token spans of at
+    most `budget` tokens, cutting at sentence or word boundaries where one
+    falls inside the window and at a token boundary otherwise.
+    """
+    if budget < 1:
+        raise ValueError(f"token budget must be positive, got {budget}")
+    n = len(offsets)
+    if n == 0:
+        return []
+    words = _boundaries(text, offsets, False)
+    sents = _boundaries(text, offsets, True) if sentence_boundaries else []
+
+    spans = []
+    start = 0
+    while start < n:
+        end = min(start + budget, n)
+        if end < n:
+            for bounds in (sents, words):
+                j = bisect_right(bounds, end) - 1
+                if j >= 0 and bounds[j] > start:
+                    end = bounds[j]
+                    break
+        spans.append((start, end))
+        if end >= n:
+            break
+        next_start = end
+        if overlap:
+            j = bisect_right(words, end - overlap) - 1
+            candidate = words[j] if j >= 0 else end - overlap
+            if start < candidate < end:
+                next_start = candidate
+        start = next_start
+    return spans
+
+
+def _chunk_text(text, offsets, start, end):
+    return text[offsets[start][0]:offsets[end - 1][1]].strip()
+
+
+def _refit(tokenizer, text, offsets, start, end, max_tokens, sentence_boundaries, overlap, length=None):
+    """
+    Spans covering [start, end) whose chunk text, re-encoded the way the
+    T5 scripts encode it (prefix + chunk + EOS), fits `max_tokens`. A chunk
+    that starts mid-word can gain a token once the prefix is in front of
+    it; such a chunk is split again with a budget smaller by the excess.
+    """
+    if length is None:
+        length = len(tokenizer(PREFIX + _chunk_text(text, offsets, start, end)).input_ids)
+    if length <= max_tokens or end - start <= 1:
+        return [(start, end)]
+    budget = max(1, end - start - (length - max_tokens))
+    spans = []
+    for s, e in chunk_spans(text, offsets[start:end], budget, sentence_boundaries, overlap):
+        spans.extend(_refit(tokenizer, text, offsets, start + s, start + e, max_tokens, sentence_boundaries, overlap))
+    return spans
+
+
+def chunk_texts_t5(texts, max_tokens=MAX_TOKENS, sentence_boundaries=SENTENCE_BOUNDARIES,
+                   overlap=OVERLAP_TOKENS, with_ids=False, model_name=None):
+    """
+    Chunks a batch of documents with one fast-tokenizer call of
+    `model_name` (default MODEL_NAME). Returns a list of chunk-text lists,
+    one per input text, or (chunks, chunk_ids) pairs with `with_ids`, where
+    chunk_ids excludes the prefix and EOS. Every chunk re-encodes (with
+    prefix and EOS) to at most `max_tokens`.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    tokenizer = load_tokenizer(model_name or MODEL_NAME, fast=True)
+    budget = token_budget(tokenizer, max_tokens)
+    enc = tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+
+    documents = []
+    for text, offsets in zip(texts, enc["offset_mapping"]):
+        spans = chunk_spans(text, offsets, budget, sentence_boundaries, overlap)
+        documents.append((text, offsets, spans, [_chunk_text(text, offsets, s, e) for s, e in spans]))
+    # Check the chunks as they will be encoded, all in one call
+    flat = [PREFIX + chunk for _, _, _, chunks in documents for chunk in chunks]
+    lengths = iter([len(ids) for ids in tokenizer(flat, verbose=False).input_ids] if flat else [])
+
+    results = []
+    for (text, offsets, spans, chunks), ids in zip(documents, enc["input_ids"]):
+        fitted = []
+        for s, e in spans:
+            fitted.extend(_refit(tokenizer, text, offsets, s, e, max_tokens, sentence_boundaries, overlap,
+                                 next(lengths)))
+        if fitted != spans:
+            spans, chunks = fitted, [_chunk_text(text, offsets, s, e) for s, e in fitted]
+        results.append((chunks, [ids[s:e] for s, e in spans]) if with_ids else chunks)
+    return results
+
 
 def chunk_text_t5(text, max_tokens=MAX_TOKENS):
     """
     Splits text into chunks that fit within max_tokens according to T5 tokenizer.
     """
-    words = text.split()
-    chunks = []
-    current_chunk = []
-    current_len = 0
-
-    for word in words:
-        token_len = len(tokenizer.encode(word, add_special_tokens=False))
-        if current_len + token_len > max_tokens:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = [word]
-            current_len = token_len
-        else:
-            current_chunk.append(word)
-            current_len += token_len
-
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
-
-    return chunks
-
-def main():
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    output_data = []
-    for entry in data:
-        eid = entry.get("id")
-        text = entry.get(TEXT_KEY, "").strip()
-        if not text:
-            continue
-        chunks = chunk_text_t5(text, max_tokens=MAX_TOKENS)
-        output_data.append({"id": eid, "chunks": chunks})
+    return chunk_texts_t5([text], max_tokens=max_tokens)[0]
+
+
+def chunk_records(records, text_key=TEXT_KEY, max_tokens=MAX_TOKENS, sentence_boundaries=SENTENCE_BOUNDARIES,
+                  overlap=OVERLAP_TOKENS, batch_docs=BATCH_DOCS, store_ids=STORE_IDS, model_name=None):
+    """
+    Yields {"id", "chunks"} for every record with non-empty text, encoding
+    `batch_docs` documents per tokenizer call. With `store_ids` the records
+    also carry "chunk_ids" and "chunk_lengths", encoded by the tokenizer
+    t5_ilc.py encodes chunks with (not the fast one used for chunking), and
+    "chunk_tokenizer", its tokenizer_info; t5_ilc.py ignores ids from any
+    other tokenizer.
+    """
+    model_name = model_name or MODEL_NAME
+    records = (r for r in records if r.get(text_key, "").strip())
+    while True:
+        batch = list(islice(records, batch_docs))
+        if not batch:
+            return
+        texts = [r[text_key].strip() for r in batch]
+        chunked = chunk_texts_t5(texts, max_tokens, sentence_boundaries, overlap, model_name=model_name)
+        if store_ids:
+            flat = [chunk for chunks in chunked for chunk in chunks]
+            ids = iter(load_tokenizer(model_name)(flat, add_special_tokens=False).input_ids if flat else [])
+            info = tokenizer_info(model_name)
+        for entry, chunks in zip(batch, chunked):
+            record = {"id": entry.get("id"), "chunks": chunks}
+            if store_ids:
+                chunk_ids = [next(ids) for _ in chunks]
+                record.update(chunk_ids=chunk_ids, chunk_lengths=[len(x) for x in chunk_ids], chunk_tokenizer=info)
+            yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split cleaned ILC documents into T5-sized chunks.")
+    parser.add_argument("--input", default=INPUT_PATH, help="cleaned .json or .jsonl file")
+    parser.add_argument("--output", default=OUTPUT_PATH, help=".json or .jsonl output file")
+    parser.add_argument("--max-tokens", type=int, default=MAX_TOKENS, help="model input limit incl. prefix and EOS")
+    parser.add_argument("--sentence-boundaries", action="store_true", default=SENTENCE_BOUNDARIES,
+                        help="cut chunks after sentence-final punctuation where possible")
+    parser.add_argument("--overlap", type=int, default=OVERLAP_TOKENS, help="tokens shared by consecutive chunks")
+    parser.add_argument("--store-ids", action="store_true", default=STORE_IDS,
+                        help="save each chunk's token ids and lengths for t5_ilc.py")
+    parser.add_argument("--batch-docs", type=int, default=BATCH_DOCS, help="documents per tokenizer call")
+    parser.add_argument("--buffer-size", type=int, default=DEFAULT_BUFFER_SIZE, help="records buffered per write")
+    args = parser.parse_args(argv)
+
+    chunked = chunk_records(read_records(args.input), max_tokens=args.max_tokens,
+                            sentence_boundaries=args.sentence_boundaries, overlap=args.overlap,
+                            batch_docs=args.batch_docs, store_ids=args.store_ids)
+    count = write_records(args.output, chunked, buffer_size=args.buffer_size)
 
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    print(f"✅ Chunked {count} entries and saved to {args.output}")
 
-    print(f"✅ Chunked {len(output_data)} entries and saved to {OUTPUT_PATH}")
 
 if __name__ == "__main__":
     main()
@@ -1,43 +1,86 @@
 import sys
 import os
+import argparse
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from datasets import load_dataset
+from src import cleaner
 from src.cleaner import clean_text
-import pandas as pd
+from src.parallel import PoolStats
+from src.records import DEFAULT_BUFFER_SIZE, write_records
+from src.stage_cache import CACHE_DIR, StageCache, cached_map, module_fingerprint
 from tqdm import tqdm
-import json
 
-# Create output directory
-os.makedirs("data", exist_ok=True)
+OUTPUT_PATH = "data/cleaned_ilc.json"
+WORKERS = 1          # 0 = one per CPU core
+CHUNK_SIZE = 64      # records per worker task
 
-# Load full ILC dataset
-print("📦 Loading ILC dataset...")
-dataset = load_dataset("d0r1h/ILC")
-train_split = dataset["train"]
 
-print(f"📊 Total records in ILC: {len(train_split)}")
+def clean_ilc_pair(pair):
+    """
+    Cleans one (case, summary) pair.
+    """
+    raw_input, raw_summary = pair
+    return clean_text(raw_input, aggressive=False), clean_text(raw_summary, aggressive=False)
 
-# Clean all entries using shared cleaner
-cleaned = []
 
-for idx in tqdm(range(len(train_split)), desc=" Cleaning full ILC dataset"):
-    raw = train_split[idx]
-    raw_input = raw.get("Case", "")
-    raw_summary = raw.get("Summary", "")
+def open_clean_cache(cache_dir=CACHE_DIR):
+    return StageCache("clean_ilc", module_fingerprint(cleaner, aggressive=False), cache_dir=cache_dir)
 
-    cleaned_input = clean_text(raw_input, aggressive=False)
-    cleaned_summary = clean_text(raw_summary, aggressive=False)
 
-    if cleaned_input.strip() and cleaned_summary.strip():
-        cleaned.append({
-            "id": idx,
-            "input_text": cleaned_input,
-            "summary_text": cleaned_summary
-        })
+def load_ilc_split():
+    from datasets import load_dataset
 
-# Save JSON output (no CSV)
-with open("data/cleaned_ilc.json", "w", encoding="utf-8") as f:
-    json.dump(cleaned, f, indent=2, ensure_ascii=False)
+    print("📦 Loading ILC dataset...")
+    dataset = load_dataset("d0r1h/ILC")
+    train_split = dataset["train"]
+    print(f"📊 Total records in ILC: {len(train_split)}")
+    return train_split
 
-print("✅ Cleaned ILC dataset saved to → data/sample_cleaned_ilc.json")
+
+def clean_ilc_records(train_split, workers=WORKERS, chunk_size=CHUNK_SIZE, stats=None, cache=None,
+                      window=DEFAULT_BUFFER_SIZE):
+    """
+    Yields cleaned ILC records in dataset order, skipping empty ones. With a
+    StageCache only new or changed pairs are cleaned.
+    """
+    pairs = ((raw.get("Case", ""), raw.get("Summary", "")) for raw in train_split)
+    results = cached_map(clean_ilc_pair, pairs, cache=cache, window=window, workers=workers,
+                         chunk_size=chunk_size, stats=stats)
+    for idx, (cleaned_input, cleaned_summary) in enumerate(
+            tqdm(results, total=len(train_split), desc=" Cleaning full ILC dataset")):
+        if cleaned_input.strip() and cleaned_summary.strip():
+            yield {
+                "id": idx,
+                "input_text": cleaned_input,
+                "summary_text": cleaned_summary
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean the full ILC dataset.")
+    parser.add_argument("--output", default=OUTPUT_PATH, help=".json or .jsonl output file")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="worker processes (0 = all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="records per worker task")
+    parser.add_argument("--buffer-size", type=int, default=DEFAULT_BUFFER_SIZE, help="records buffered per write")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="incremental cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every record")
+    args = parser.parse_args(argv)
+
+    train_split = load_ilc_split()
+
+    # Clean all entries using shared cleaner and stream them to disk
+    stats = PoolStats()
+    cache = None if args.no_cache else open_clean_cache(args.cache_dir)
+    records = clean_ilc_records(train_split, workers=args.workers, chunk_size=args.chunk_size,
+                                stats=stats, cache=cache, window=args.buffer_size)
+    count = write_records(args.output, records, buffer_size=args.buffer_size)
+
+    print(stats.report())
+    if cache is not None:
+        print(cache.report())
+        cache.close()
+    print(f"✅ Cleaned {count} ILC records saved to → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
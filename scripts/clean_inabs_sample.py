@@ -1,38 +1,83 @@
 import sys
 import os
+import argparse
 
 # Add root directory to Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from datasets import load_dataset
+from src import cleaner
 from src.cleaner import clean_text
-import pandas as pd
+from src.parallel import PoolStats
+from src.records import DEFAULT_BUFFER_SIZE, write_records
+from src.stage_cache import CACHE_DIR, StageCache, cached_map, module_fingerprint
 from tqdm import tqdm
 
-# Create output directory if not exists
-os.makedirs("data", exist_ok=True)
-
-# Load full IN-ABS dataset
-print(" Loading full IN-ABS dataset...")
-dataset = load_dataset("percins/IN-ABS")
-train_split = dataset["train"]
-
-# Clean all samples
-cleaned_all = []
-print("Cleaning full dataset...")
-for idx in tqdm(range(len(train_split)), desc="Cleaning"):
-    raw = train_split[idx]
-    cleaned = {
-        "id": idx,
-        "input_text": clean_text(raw["text"]),
-        "summary_text": clean_text(raw["summary"])
-    }
-    cleaned_all.append(cleaned)
-
-# Save to JSON
-output_path = "data/cleaned_inabs.json"
-df = pd.DataFrame(cleaned_all)
-df.to_json(output_path, orient="records", indent=2, force_ascii=False)
-
-print(f"\nFull cleaned IN-ABS data saved to → {output_path}")
-print(f"Total entries cleaned: {len(cleaned_all)}")
\ No newline at end of file
+OUTPUT_PATH = "data/cleaned_inabs.json"
+WORKERS = 1          # 0 = one per CPU core
+CHUNK_SIZE = 64      # records per worker task
+
+
+def clean_inabs_pair(pair):
+    text, summary = pair
+    return clean_text(text), clean_text(summary)
+
+
+def open_clean_cache(cache_dir=CACHE_DIR):
+    return StageCache("clean_inabs", module_fingerprint(cleaner, aggressive=False), cache_dir=cache_dir)
+
+
+def load_inabs_split():
+    from datasets import load_dataset
+
+    print(" Loading full IN-ABS dataset...")
+    dataset = load_dataset("percins/IN-ABS")
+    return dataset["train"]
+
+
+def clean_inabs_records(train_split, workers=WORKERS, chunk_size=CHUNK_SIZE, stats=None, cache=None,
+                        window=DEFAULT_BUFFER_SIZE):
+    """
+    Yields cleaned IN-ABS records in dataset order. With a StageCache only
+    new or changed pairs are cleaned.
+    """
+    pairs = ((raw["text"], raw["summary"]) for raw in train_split)
+    results = cached_map(clean_inabs_pair, pairs, cache=cache, window=window, workers=workers,
+                         chunk_size=chunk_size, stats=stats)
+    for idx, (text, summary) in enumerate(tqdm(results, total=len(train_split), desc="Cleaning")):
+        yield {
+            "id": idx,
+            "input_text": text,
+            "summary_text": summary
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean the full IN-ABS dataset.")
+    parser.add_argument("--output", default=OUTPUT_PATH, help=".json or .jsonl output file")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="worker processes (0 = all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="records per worker task")
+    parser.add_argument("--buffer-size", type=int, default=DEFAULT_BUFFER_SIZE, help="records buffered per write")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="incremental cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every record")
+    args = parser.parse_args(argv)
+
+    train_split = load_inabs_split()
+
+    # Clean all samples and stream them to disk
+    print("Cleaning full dataset...")
+    stats = PoolStats()
+    cache = None if args.no_cache else open_clean_cache(args.cache_dir)
+    records = clean_inabs_records(train_split, workers=args.workers, chunk_size=args.chunk_size,
+                                  stats=stats, cache=cache, window=args.buffer_size)
+    count = write_records(args.output, records, buffer_size=args.buffer_size)
+
+    print(stats.report())
+    if cache is not None:
+        print(cache.report())
+        cache.close()
+    print(f"\nFull cleaned IN-ABS data saved to → {args.output}")
+    print(f"Total entries cleaned: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# scripts/convert_tokenized.py
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.token_store import STORE_SUFFIX, TokenStore, convert_json
+
+# ===== CONFIG =====
+DEFAULT_INPUTS = ["data/tokenized_inabs.json", "data/tokenized_ilc.json"]
+# ==================
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert tokenized_*.json files into memory-mapped token stores.")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help="tokenized .json/.jsonl files")
+    args = parser.parse_args(argv)
+
+    for path in args.inputs:
+        store_path = os.path.splitext(path)[0] + STORE_SUFFIX
+        count = convert_json(path, store_path)
+        store = TokenStore(store_path)
+        size = sum(os.path.getsize(os.path.join(store_path, name)) for name in os.listdir(store_path))
+        print(f"✅ {path} → {store_path}: {count} documents, {len(store.vocab)} types, "
+              f"{os.path.getsize(path) / 1e6:.1f} MB → {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,246 @@
 # scripts/extractive_summarizer.py
 
+import sys
 import json
 import os
+import argparse
+from functools import partial
+from itertools import islice
 from tqdm import tqdm
-import networkx as nx
-import nltk
-from nltk.tokenize import sent_tokenize
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
 
-nltk.download('punkt')
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.parallel import ordered_map
+from src.resources import require_nltk
+from src.sentence_index import SentenceIndex, index_path, is_sentence_index
+from src.textrank import BLOCK_SIZE, DAMPING, TOLERANCE, block_similarity, pagerank, pagerank_many, top_sentences
+from src.token_store import read_tokenized
+from src.vectorizer import DEFAULT_MODE, MODEL_DIR, MODES, cached_vectorizer, model_path, shared_vectorizer
+
+# ===== CONFIG =====
+TOP_N = 3
+BATCH_DOCS = 64     # documents per worker task and PageRank call
+WORKERS = 1         # 0 = one per CPU core
+GRAPH = "dense"     # dense | sparse | auto (sparse from SPARSE_FROM sentences)
+SPARSE_FROM = 1000
+TOP_K = 20          # neighbours kept per sentence in the sparse graph (None = all)
+THRESHOLD = None    # minimum similarity kept in the sparse graph
+# ==================
+
+GRAPHS = ("dense", "sparse", "auto")
+# dataset -> (tokenized input, cleaned corpus whose sentence index is preferred)
+DATASETS = {
+    "inabs": ("data/tokenized_inabs.json", "data/cleaned_inabs.json"),
+    "ilc": ("data/tokenized_ilc.json", "data/cleaned_ilc.json"),
+}
 
 def load_tokenized_data(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """
+    Streams {"id", "tokens"} records from a .tokens store or a JSON/JSONL file.
+    """
+    return read_tokenized(filepath)
+
+def load_documents(filepath):
+    """
+    Streams {"id", "sentences"} records from a sentence index, or
+    {"id", "tokens"} records from tokenized data.
+    """
+    if is_sentence_index(filepath):
+        return iter(SentenceIndex(filepath))
+    return load_tokenized_data(filepath)
+
+def entry_sentences(entry):
+    """
+    A document's sentences: read from the index when present, otherwise
+    sent_tokenize on the re-joined tokens.
+    """
+    if "sentences" in entry:
+        return entry["sentences"]
+    require_nltk('punkt')
+    from nltk.tokenize import sent_tokenize
+    return sent_tokenize(" ".join(entry.get("tokens", [])))
 
 def save_summary(summary_dict, filepath):
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(summary_dict, f, indent=2)
 
-def build_similarity_matrix(sentences):
-    tfidf = TfidfVectorizer()
-    tfidf_matrix = tfidf.fit_transform(sentences)
+class SummaryWriter:
+    """
+    Streams {doc_id: summary} entries into a JSON object laid out exactly
+    like save_summary's output, without holding the whole dict.
+    """
+
+    def __init__(self, filepath):
+        self.path = filepath
+        self.count = 0
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.path, 'w', encoding='utf-8')
+        return self
+
+    def write(self, doc_id, summary):
+        entry = json.dumps({doc_id: summary}, indent=2)[2:-2]
+        self._f.write(("{\n" if self.count == 0 else ",\n") + entry)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._f.write("\n}" if self.count else "{}")
+        self._f.close()
+
+def sentence_vectors(sentences, vectorizer=None):
+    """
+    TF-IDF rows for the sentences: transformed with a shared (corpus or
+    hashing) vectorizer, or from a TfidfVectorizer fitted on this document.
+    """
+    if vectorizer is not None:
+        return vectorizer.transform(sentences)
+    return TfidfVectorizer().fit_transform(sentences)
+
+def build_similarity_matrix(sentences, vectorizer=None):
+    tfidf_matrix = sentence_vectors(sentences, vectorizer)
     similarity_matrix = cosine_similarity(tfidf_matrix)
     return similarity_matrix
 
-def textrank_summarize(sentences, top_n=3):
+def build_sparse_similarity(sentences, block_size=BLOCK_SIZE, top_k=TOP_K, threshold=THRESHOLD, vectorizer=None):
+    """
+    Block-wise sparse alternative to build_similarity_matrix for very long
+    documents; peak memory is block_size x len(sentences).
+    """
+    tfidf_matrix = sentence_vectors(sentences, vectorizer)
+    return block_similarity(tfidf_matrix, block_size=block_size, top_k=top_k, threshold=threshold)
+
+def build_auto_similarity(sentences, sparse_from=SPARSE_FROM, vectorizer=None, **sparse_options):
+    if len(sentences) >= sparse_from:
+        return build_sparse_similarity(sentences, vectorizer=vectorizer, **sparse_options)
+    return build_similarity_matrix(sentences, vectorizer)
+
+def graph_builder(graph=GRAPH, block_size=BLOCK_SIZE, top_k=TOP_K, threshold=THRESHOLD, sparse_from=SPARSE_FROM):
+    """
+    Returns the similarity-graph function for `graph` (see GRAPHS).
+    """
+    if graph not in GRAPHS:
+        raise ValueError(f"unknown graph builder {graph!r}; expected one of {GRAPHS}")
+    if graph == "dense":
+        return build_similarity_matrix
+    options = dict(block_size=block_size, top_k=top_k, threshold=threshold)
+    if graph == "sparse":
+        return partial(build_sparse_similarity, **options)
+    return partial(build_auto_similarity, sparse_from=sparse_from, **options)
+
+def textrank_summarize(sentences, top_n=TOP_N, damping=DAMPING, tol=TOLERANCE, builder=build_similarity_matrix):
     if len(sentences) <= top_n:
         return sentences
 
-    sim_matrix = build_similarity_matrix(sentences)
-    nx_graph = nx.from_numpy_array(sim_matrix)
-    scores = nx.pagerank(nx_graph)
+    sim_matrix = builder(sentences)
+    scores = pagerank(sim_matrix, damping=damping, tol=tol)
+    return top_sentences(sentences, scores, top_n)
 
-    ranked_sentences = sorted(((scores[i], s) for i, s in enumerate(sentences)), reverse=True)
-    summary = [sent for score, sent in ranked_sentences[:top_n]]
-    return summary
+def textrank_summarize_many(sentence_lists, top_n=TOP_N, damping=DAMPING, tol=TOLERANCE,
+                            builder=build_similarity_matrix):
+    """
+    Summarizes several documents, ranking all their graphs in one PageRank call.
+    """
+    to_rank = [i for i, sentences in enumerate(sentence_lists) if len(sentences) > top_n]
+    scores = pagerank_many((builder(sentence_lists[i]) for i in to_rank),
+                           damping=damping, tol=tol)
+    summaries = list(sentence_lists)
+    for i, doc_scores in zip(to_rank, scores):
+        summaries[i] = top_sentences(sentence_lists[i], doc_scores, top_n)
+    return summaries
 
-def summarize_documents(input_path, output_path, top_n=3):
-    data = load_tokenized_data(input_path)
-    summary_data = {}
+def corpus_sentences(input_path):
+    """
+    Yields every sentence of the corpus (used to fit the corpus model).
+    """
+    for entry in load_documents(input_path):
+        yield from entry_sentences(entry)
 
-    for entry in tqdm(data, total=len(data), desc=f"Summarizing {os.path.basename(input_path)}"):
-        doc_id = str(entry.get("id", len(summary_data)))
-        tokens = entry.get("tokens", [])
-        text = " ".join(tokens)
-        sentences = sent_tokenize(text)
+def summarize_batch(batch, top_n=TOP_N, damping=DAMPING, tol=TOLERANCE, builder=build_similarity_matrix,
+                    vectorizer=DEFAULT_MODE, vectorizer_path=None):
+    """
+    Summarizes a list of (position, entry) pairs; returns (doc_id, summary)
+    pairs. Runs in pool workers, so the shared vectorizer is loaded there.
+    """
+    shared = cached_vectorizer(vectorizer, vectorizer_path)
+    if shared is not None:
+        builder = partial(builder, vectorizer=shared)
 
-        if not sentences:
-            summary_data[doc_id] = []
-            continue
+    doc_ids = [str(entry.get("id", position)) for position, entry in batch]
+    sentence_lists = [entry_sentences(entry) for _, entry in batch]
+    return list(zip(doc_ids, textrank_summarize_many(sentence_lists, top_n, damping, tol, builder)))
 
-        summary = textrank_summarize(sentences, top_n=top_n)
-        summary_data[doc_id] = summary
+def _batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
 
-    save_summary(summary_data, output_path)
+def summarize_documents(input_path, output_path, top_n=TOP_N, damping=DAMPING, tol=TOLERANCE,
+                        batch_docs=BATCH_DOCS, builder=build_similarity_matrix, vectorizer=DEFAULT_MODE,
+                        model_dir=MODEL_DIR, refit=False, workers=WORKERS):
+    """
+    Summarizes every document in `input_path` (a sentence index or tokenized
+    data), spreading batches of `batch_docs` documents over `workers`
+    processes. Summaries are written in input order as they complete.
+    """
+    vectorizer_path = model_path(input_path, model_dir)
+    # Fit (or load) the shared model here so workers only ever read it.
+    shared_vectorizer(vectorizer, vectorizer_path, lambda: corpus_sentences(input_path), refit=refit)
+
+    task = partial(summarize_batch, top_n=top_n, damping=damping, tol=tol, builder=builder,
+                   vectorizer=vectorizer, vectorizer_path=vectorizer_path)
+    batches = _batches(enumerate(load_documents(input_path)), batch_docs)
+    progress = tqdm(desc=f"Summarizing {os.path.basename(input_path)}")
+
+    with SummaryWriter(output_path) as writer:
+        for results in ordered_map(task, batches, workers=workers, chunk_size=1):
+            for doc_id, summary in results:
+                writer.write(doc_id, summary)
+            progress.update(len(results))
+    progress.close()
+    return writer.count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TextRank extractive summaries for IN-ABS and ILC.")
+    parser.add_argument("--top-n", type=int, default=TOP_N, help="sentences per summary")
+    parser.add_argument("--damping", type=float, default=DAMPING, help="PageRank damping factor")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="PageRank convergence tolerance")
+    parser.add_argument("--batch-docs", type=int, default=BATCH_DOCS,
+                        help="documents per worker task and PageRank call")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="worker processes (0 = all cores)")
+    parser.add_argument("--graph", choices=GRAPHS, default=GRAPH,
+                        help="dense n x n matrix, block-wise sparse graph, or sparse only for long documents")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help="rows per block in the sparse graph")
+    parser.add_argument("--top-k", type=int, default=TOP_K, help="neighbours kept per sentence (0 = all)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="minimum similarity kept")
+    parser.add_argument("--vectorizer", choices=MODES, default=DEFAULT_MODE,
+                        help="TF-IDF fitted per document, once per corpus (saved), or hashed (no fit)")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="where corpus TF-IDF models are saved")
+    parser.add_argument("--refit", action="store_true", help="refit the corpus model even if one is saved")
+    parser.add_argument("--from-tokens", action="store_true",
+                        help="re-split tokenized data even when a sentence index exists")
+    parser.add_argument("--sparse-from", type=int, default=SPARSE_FROM, help="sentence count where auto goes sparse")
+    args = parser.parse_args(argv)
+    builder = graph_builder(args.graph, block_size=args.block_size, top_k=args.top_k or None,
+                            threshold=args.threshold, sparse_from=args.sparse_from)
+    options = dict(top_n=args.top_n, damping=args.damping, tol=args.tolerance, batch_docs=args.batch_docs,
+                   builder=builder, vectorizer=args.vectorizer, model_dir=args.model_dir, refit=args.refit,
+                   workers=args.workers)
 
-if __name__ == "__main__":
     os.makedirs("data", exist_ok=True)
-    summarize_documents("data/tokenized_inabs.json", "data/extractive_summary_inabs.json", top_n=3)
-    summarize_documents("data/tokenized_ilc.json", "data/extractive_summary_ilc.json", top_n=3)
+    for dataset, (tokenized_path, cleaned_path) in DATASETS.items():
+        sentences_path = index_path(cleaned_path)
+        input_path = tokenized_path
+        if not args.from_tokens and is_sentence_index(sentences_path):
+            input_path = sentences_path
+        print(f"📄 {dataset}: reading {input_path}")
+        summarize_documents(input_path, f"data/extractive_summary_{dataset}.json", **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# scripts/legalsum.py
+
+"""
+Single entry point for the preprocessing and summarization scripts.
+
+    python scripts/legalsum.py <command> [options]
+
+Each subcommand imports its script module only when it runs, so e.g.
+`legalsum clean-ilc` never loads torch or transformers. NLTK data and
+model assets are never downloaded unless --allow-download is given (or
+LEGALSUM_ALLOW_DOWNLOAD=1 is set); use `legalsum fetch` to provision a
+machine ahead of time.
+"""
+
+import sys
+import os
+import argparse
+import importlib
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.append(os.path.dirname(SCRIPTS_DIR))
+
+# command -> (script module, help)
+COMMANDS = {
+    "clean-ilc": ("clean_ilc_data", "Clean the ILC dataset"),
+    "clean-inabs": ("clean_inabs_sample", "Clean the IN-ABS dataset"),
+    "tokenize-ilc": ("tokenize_ilc", "Tokenize cleaned ILC"),
+    "tokenize-inabs": ("tokenize_inabs", "Tokenize cleaned IN-ABS"),
+    "chunk-ilc": ("chunk_ilc_t5", "Split cleaned ILC into T5-sized chunks"),
+    "extractive": ("extractive_summarizer", "TextRank extractive summaries"),
+    "t5-ilc": ("t5_ilc", "Two-stage T5 summarization of ILC"),
+    "t5-inabs": ("t5_inabs", "Two-stage T5 summarization of IN-ABS"),
+    "evaluate": ("t5_evaluation", "ROUGE evaluation of T5 summaries"),
+    "pipeline": ("pipeline", "Streaming clean -> tokenize -> chunk pipeline"),
+    "convert-tokens": ("convert_tokenized", "Convert tokenized_*.json into a .tokens store"),
+    "sentence-index": ("build_sentence_index", "Precompute sentence offsets for cleaned corpora"),
+    "benchmark": ("benchmark_generation", "Time and score a grid of T5 generation settings"),
+    "serve": ("serve_t5", "Local HTTP summarization service with request micro-batching"),
+}
+
+
+def run_fetch(argv):
+    parser = argparse.ArgumentParser(prog="legalsum fetch",
+                                     description="Download NLTK data and model assets for offline use.")
+    parser.add_argument("--nltk", nargs="*", default=["punkt", "stopwords"], help="NLTK resources to fetch")
+    parser.add_argument("--model", nargs="*", default=["t5-base"], help="Hugging Face models to cache")
+    args = parser.parse_args(argv)
+
+    from src.resources import fetch
+    fetch(nltk_names=args.nltk, model_names=args.model)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="legalsum", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--allow-download", action="store_true",
+                        help="Allow downloading missing NLTK data and models")
+    sub = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        sub.add_parser(name, help=help_text, add_help=False)
+    sub.add_parser("fetch", help="Download NLTK data and model assets", add_help=False)
+
+    args, rest = parser.parse_known_args(argv)
+    if args.allow_download:
+        from src.resources import ALLOW_DOWNLOAD_ENV
+        os.environ[ALLOW_DOWNLOAD_ENV] = "1"
+
+    if args.command == "fetch":
+        return run_fetch(rest)
+
+    module_name, _ = COMMANDS[args.command]
+    from src.resources import MissingResourceError
+    try:
+        return importlib.import_module(module_name).main(rest)
+    except MissingResourceError as e:
+        sys.exit(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# scripts/pipeline.py
+
+"""
+Runs clean -> tokenize (-> chunk for ILC) as one chained generator pipeline.
+
+Each cleaned record flows through every stage before the next one is read,
+and each stage's output is streamed to its own JSON Lines file. Cache
+lookups and writes both work --buffer-size records at a time, so peak
+memory is a few --buffer-size windows of records (the cache window plus
+what tee() holds for the stages behind it) and the worker queue, rather
+than the corpus size.
+"""
+
+import sys
+import os
+import argparse
+from contextlib import ExitStack
+from itertools import tee, zip_longest
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.append(os.path.dirname(SCRIPTS_DIR))
+
+from src.parallel import PoolStats
+from src.records import DEFAULT_BUFFER_SIZE, RecordWriter, tap
+from src.sentence_index import SentenceIndexWriter, index_path
+from src.stage_cache import CACHE_DIR
+from src.tokenizer import BACKENDS, DEFAULT_BACKEND, open_tokenize_cache, tokenize_records
+
+# ===== CONFIG =====
+OUT_DIR = "data"
+WORKERS = 1
+CHUNK_SIZE = 64
+# ==================
+
+
+def run_pipeline(dataset, out_dir=OUT_DIR, workers=WORKERS, chunk_size=CHUNK_SIZE,
+                 buffer_size=DEFAULT_BUFFER_SIZE, chunk=True, cache_dir=CACHE_DIR,
+                 backend=DEFAULT_BACKEND, store_ids=False, sentence_index=False):
+    if dataset == "ilc":
+        from clean_ilc_data import load_ilc_split, clean_ilc_records as clean_records, open_clean_cache
+        split = load_ilc_split()
+    else:
+        from clean_inabs_sample import load_inabs_split, clean_inabs_records as clean_records, open_clean_cache
+        split = load_inabs_split()
+
+    chunk = chunk and dataset == "ilc"
+    if chunk:
+        from chunk_ilc_t5 import chunk_records
+
+    paths = {
+        "cleaned": os.path.join(out_dir, f"cleaned_{dataset}.jsonl"),
+        "tokenized": os.path.join(out_dir, f"tokenized_{dataset}.jsonl"),
+    }
+    if chunk:
+        paths["chunked"] = os.path.join(out_dir, f"chunked_{dataset}.jsonl")
+
+    stats = PoolStats()
+    token_stats = {}
+    with ExitStack() as stack:
+        caches = []
+        if cache_dir:
+            caches = [stack.enter_context(open_clean_cache(cache_dir)),
+                      stack.enter_context(open_tokenize_cache(f"tokenize_{dataset}", cache_dir, backend))]
+        writers = {name: stack.enter_context(RecordWriter(path, buffer_size=buffer_size))
+                   for name, path in paths.items()}
+
+        cleaned = tap(writers["cleaned"], clean_records(split, workers=workers, chunk_size=chunk_size, stats=stats,
+                                                        cache=caches[0] if caches else None, window=buffer_size))
+        if sentence_index:
+            writers["sentences"] = stack.enter_context(SentenceIndexWriter(index_path(paths["cleaned"])))
+            cleaned = tap(writers["sentences"], cleaned)
+        for_tokens, for_chunks = tee(cleaned)
+        tokenized = tokenize_records(for_tokens, token_stats, caches[1] if caches else None, backend,
+                                     window=buffer_size)
+        chunked = chunk_records(for_chunks, store_ids=store_ids) if chunk else ()
+        for tokens_record, chunk_record in zip_longest(tokenized, chunked):
+            if tokens_record is not None:
+                writers["tokenized"].write(tokens_record)
+            if chunk_record is not None:
+                writers["chunked"].write(chunk_record)
+
+        print(stats.report())
+        for cache in caches:
+            print(cache.report())
+    for name, writer in writers.items():
+        print(f"✅ {name}: {writer.count} records → {writer.path}")
+    if token_stats:
+        print(f"📊 Avg tokens/document: {token_stats['total'] / token_stats['count']:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", choices=["ilc", "inabs"])
+    parser.add_argument("--out-dir", default=OUT_DIR)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="cleaning processes (0 = all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="records per worker task")
+    parser.add_argument("--buffer-size", type=int, default=DEFAULT_BUFFER_SIZE, help="records buffered per write")
+    parser.add_argument("--tokenizer", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="nltk (reference output) or regex (fast)")
+    parser.add_argument("--no-chunk", action="store_true", help="skip the T5 chunking stage (ILC only)")
+    parser.add_argument("--sentence-index", action="store_true",
+                        help="also save sentence offsets next to the cleaned corpus")
+    parser.add_argument("--chunk-ids", action="store_true", help="store chunk token ids for t5_ilc.py")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="incremental cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every record")
+    args = parser.parse_args(argv)
+
+    run_pipeline(args.dataset, out_dir=args.out_dir, workers=args.workers, chunk_size=args.chunk_size,
+                 buffer_size=args.buffer_size, chunk=not args.no_chunk,
+                 cache_dir=None if args.no_cache else args.cache_dir, backend=args.tokenizer,
+                 store_ids=args.chunk_ids, sentence_index=args.sentence_index)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# scripts/serve_t5.py
+
+"""
+Local summarization service: loads T5 once and answers HTTP requests.
+
+    POST /summarize   {"text": "...", "id": optional}   -> {"id", "summary", "seconds"}
+    GET  /health      model, precision and batching counters
+
+Concurrent requests are micro-batched (src/microbatch.py): the first
+request waits up to --max-wait-ms for others, and the batch goes through
+the dataset script's two_stage_summarize_many, keyword preservation
+included. For ILC the text is chunked like chunk_ilc_t5.py (or "chunks"
+can be sent as a list). Only the standard library is used for HTTP.
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import importlib
+import json
+import time
+from dataclasses import replace
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.append(os.path.dirname(SCRIPTS_DIR))
+
+from src.batching import BatchStats
+from src.microbatch import MicroBatcher
+from src.resources import PRECISIONS, load_t5
+
+# ===== CONFIG =====
+HOST = "127.0.0.1"
+PORT = 8765
+DATASETS = {"inabs": "t5_inabs", "ilc": "t5_ilc"}
+MAX_BATCH_DOCS = 16
+MAX_WAIT_MS = 50
+MAX_BODY_BYTES = 10 * 2 ** 20
+# ==================
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SummaryService:
+    """
+    Turns request payloads into documents for one T5 script module and
+    summarizes them a batch at a time (called on the batcher's thread),
+    with the module's settings (its make_settings(), options applied).
+    """
+
+    def __init__(self, module, settings, batch_size=None, chunked=False):
+        self.module = module
+        self.settings = settings
+        self.batch_size = batch_size
+        self.chunked = chunked      # the module summarizes chunked records (ILC)
+        self.stats = BatchStats()
+
+    def make_docs(self, payloads):
+        if not self.chunked:
+            return [self.module.make_doc({"input_text": p["text"]}) for p in payloads]
+        import chunk_ilc_t5
+        unchunked = ({"input_text": p["text"]} for p in payloads if not p.get("chunks"))
+        chunked = chunk_ilc_t5.chunk_records(unchunked, max_tokens=self.settings.max_input_tokens, store_ids=True,
+                                             model_name=self.settings.model_name)
+        return [self.module.make_doc({"chunks": p["chunks"]} if p.get("chunks") else next(chunked))
+                for p in payloads]
+
+    def summarize(self, payloads):
+        return self.module.two_stage_summarize_many(self.make_docs(payloads), self.settings, self.stats,
+                                                    self.batch_size)
+
+
+def parse_request(payload, chunked=False):
+    """
+    Validates a /summarize body; "chunks" can stand in for "text" only
+    when the service summarizes chunked records (`chunked`).
+    """
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "expected a JSON object")
+    text = payload.get("text")
+    chunks = payload.get("chunks")
+    if chunks is not None and not (isinstance(chunks, list) and all(isinstance(c, str) for c in chunks)):
+        raise HTTPError(400, "'chunks' must be a list of strings")
+    if not (isinstance(text, str) and text.strip()) and not (chunked and chunks):
+        raise HTTPError(400, "'text' must be a non-empty string")
+    return {"id": payload.get("id"), "text": (text or "").strip(), "chunks": chunks}
+
+
+async def read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "bad Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], body
+
+
+def write_response(writer, status, payload):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+
+
+def make_handler(batcher, info, chunked=False):
+    async def handle(reader, writer):
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return
+            method, path, body = request
+            if path == "/health":
+                mean = batcher.requests / batcher.batches if batcher.batches else 0.0
+                write_response(writer, 200, dict(info, pending=batcher.pending, batches=batcher.batches,
+                                                 requests=batcher.requests, mean_batch=round(mean, 2)))
+            elif path != "/summarize":
+                raise HTTPError(404, f"no route {path}")
+            elif method != "POST":
+                raise HTTPError(405, "use POST")
+            else:
+                try:
+                    payload = parse_request(json.loads(body or b"null"), chunked)
+                except ValueError:
+                    raise HTTPError(400, "body is not valid JSON")
+                start = time.perf_counter()
+                summary = await batcher.submit(payload)
+                write_response(writer, 200, {"id": payload["id"], "summary": summary,
+                                             "seconds": round(time.perf_counter() - start, 3)})
+        except HTTPError as e:
+            write_response(writer, e.status, {"error": str(e)})
+        except Exception as e:
+            write_response(writer, 500, {"error": f"{type(e).__name__}: {e}"})
+        finally:
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+            writer.close()
+    return handle
+
+
+async def serve(service, host, port, max_batch, max_wait, info):
+    batcher = MicroBatcher(service.summarize, max_batch=max_batch, max_wait=max_wait)
+    batcher.start()
+    server = await asyncio.start_server(make_handler(batcher, info, service.chunked), host, port)
+    print(f"🚀 Serving {info['dataset']} summaries on http://{host}:{port}/summarize")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+        print(service.stats.report())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP service for T5 summaries with request micro-batching.")
+    parser.add_argument("--dataset", choices=sorted(DATASETS), default="inabs",
+                        help="which script's settings and two-stage pipeline to use")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-batch-docs", type=int, default=MAX_BATCH_DOCS,
+                        help="most requests summarized together")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="how long the first request waits for others")
+    parser.add_argument("--batch-size", type=int, default=None, help="generate batch size (default: the script's)")
+    parser.add_argument("--precision", choices=PRECISIONS, default=None)
+    args = parser.parse_args(argv)
+
+    module = importlib.import_module(DATASETS[args.dataset])
+    settings = module.make_settings()
+    if args.precision:
+        settings = replace(settings, precision=args.precision)
+    load_t5(settings.model_name, settings.precision)   # once, before the first request
+    service = SummaryService(module, settings, args.batch_size or settings.batch_size, chunked=args.dataset == "ilc")
+    info = {"dataset": args.dataset, "model": settings.model_name, "precision": settings.precision}
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.max_batch_docs, args.max_wait_ms / 1000, info))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,125 @@
-import json
+import sys
+import os
+import argparse
 from rouge_score import rouge_scorer
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.records import read_records
+
 # ===== FILE PATHS =====
 extractive_path = 'data/t5_ilc_final.json'  # Candidate/refined summaries
 reference_path = 'data/cleaned_ilc.json'  # Ground truth summaries
 
-# ===== LOAD FILES =====
-with open(extractive_path, 'r', encoding='utf-8') as f:
-    extractive_data = json.load(f)
+METRICS = ['rouge1', 'rouge2', 'rougeL']
+CANDIDATE_KEY = 'refined_summary_improved'
+
+
+def score_summaries(candidate_data, reference_dict, key=CANDIDATE_KEY, ids=None, metrics=METRICS):
+    """
+    Mean ROUGE F1 of the candidate records' `key` summaries against
+    {id: reference summary}, optionally only for the ids in `ids`.
+    Returns {"scores": {metric: mean F1}, "processed", "skipped_no_candidate",
+    "skipped_no_ref"}.
+    """
+    scorer = rouge_scorer.RougeScorer(metrics, use_stemmer=True)
+    scores = {metric: [] for metric in metrics}
+
+    processed = skipped_no_candidate = skipped_no_ref = 0
+
+    for entry in candidate_data:
+        eid = entry['id']
+        if ids is not None and eid not in ids:
+            continue
+        extractive_summary = entry.get(key, '')
+        reference_summary = reference_dict.get(eid, '')
+
+        if not extractive_summary:
+            skipped_no_candidate += 1
+            continue
+        if not reference_summary:
+            skipped_no_ref += 1
+            continue
+
+        score = scorer.score(reference_summary, extractive_summary)
+        for metric in scores:
+            scores[metric].append(score[metric].fmeasure)
+        processed += 1
+
+    return {
+        "scores": {metric: sum(values) / len(values) if values else 0 for metric, values in scores.items()},
+        "processed": processed,
+        "skipped_no_candidate": skipped_no_candidate,
+        "skipped_no_ref": skipped_no_ref,
+    }
+
+
+def compare_to_baseline(candidate_data, baseline_data, reference_dict, key=CANDIDATE_KEY, metrics=METRICS):
+    """
+    Scores candidate and baseline runs (e.g. int8 vs fp32) on the documents
+    both summarized. Returns (candidate result, baseline result,
+    {metric: candidate F1 - baseline F1}).
+    """
+    def summarized(data):
+        return {entry['id'] for entry in data if entry.get(key)}
+
+    ids = summarized(candidate_data) & summarized(baseline_data) & set(reference_dict)
+    candidate = score_summaries(candidate_data, reference_dict, key, ids, metrics)
+    baseline = score_summaries(baseline_data, reference_dict, key, ids, metrics)
+    deltas = {metric: candidate["scores"][metric] - baseline["scores"][metric] for metric in metrics}
+    return candidate, baseline, deltas
+
 
-with open(reference_path, 'r', encoding='utf-8') as f:
-    reference_data = json.load(f)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ROUGE evaluation of refined T5 summaries.")
+    parser.add_argument("--candidate", default=extractive_path, help="summaries to score")
+    parser.add_argument("--reference", default=reference_path, help="cleaned corpus with summary_text")
+    parser.add_argument("--baseline", help="summaries of a reference run (e.g. --precision fp32) to report deltas against")
+    parser.add_argument("--key", default=CANDIDATE_KEY, help="record field holding the summary")
+    args = parser.parse_args(argv)
 
-# ===== GET ID LISTS =====
-ref_ids = {entry['id'] for entry in reference_data if 'summary_text' in entry}
-cand_ids = {entry['id'] for entry in extractive_data if 'refined_summary_improved' in entry}
+    # ===== LOAD FILES =====
+    extractive_data = list(read_records(args.candidate))
+    reference_data = list(read_records(args.reference))
 
-print(f"\nReference IDs: {sorted(ref_ids)}")
-print(f"Candidate IDs: {sorted(cand_ids)}")
+    # ===== GET ID LISTS =====
+    ref_ids = {entry['id'] for entry in reference_data if 'summary_text' in entry}
+    cand_ids = {entry['id'] for entry in extractive_data if args.key in entry}
 
-matched_ids = ref_ids & cand_ids
-missing_in_cand = ref_ids - cand_ids
-missing_in_ref = cand_ids - ref_ids
+    print(f"\nReference IDs: {sorted(ref_ids)}")
+    print(f"Candidate IDs: {sorted(cand_ids)}")
 
-print(f"\nMatched IDs: {sorted(matched_ids)}")
-print(f"Missing in candidate file: {sorted(missing_in_cand)}")
-print(f"Missing in reference file: {sorted(missing_in_ref)}\n")
+    matched_ids = ref_ids & cand_ids
+    missing_in_cand = ref_ids - cand_ids
+    missing_in_ref = cand_ids - ref_ids
 
-# ===== BUILD REFERENCE DICT =====
-reference_dict = {entry['id']: entry['summary_text'] for entry in reference_data if 'summary_text' in entry}
+    print(f"\nMatched IDs: {sorted(matched_ids)}")
+    print(f"Missing in candidate file: {sorted(missing_in_cand)}")
+    print(f"Missing in reference file: {sorted(missing_in_ref)}\n")
 
-# ===== ROUGE SETUP =====
-scorer = rouge_scorer.RougeScorer(['rouge1', 'rouge2', 'rougeL'], use_stemmer=True)
-scores = {'rouge1': [], 'rouge2': [], 'rougeL': []}
+    # ===== BUILD REFERENCE DICT =====
+    reference_dict = {entry['id']: entry['summary_text'] for entry in reference_data if 'summary_text' in entry}
 
-processed = skipped_no_candidate = skipped_no_ref = 0
+    # ===== ROUGE =====
+    result = score_summaries(extractive_data, reference_dict, args.key)
 
-for entry in extractive_data:
-    eid = entry['id']
-    extractive_summary = entry.get('refined_summary_improved', '')
-    reference_summary = reference_dict.get(eid, '')
+    # ===== RESULTS =====
+    print(f"Processed entries scored: {result['processed']}")
+    print(f"Skipped (no candidate field or empty): {result['skipped_no_candidate']}")
+    print(f"Skipped (no matching reference): {result['skipped_no_ref']}")
 
-    if not extractive_summary:
-        skipped_no_candidate += 1
-        continue
-    if not reference_summary:
-        skipped_no_ref += 1
-        continue
+    print("\nROUGE scores (F1):")
+    for metric, avg in result["scores"].items():
+        print(f"{metric}: {avg*100:.2f}%")  # convert to %
 
-    score = scorer.score(reference_summary, extractive_summary)
-    for key in scores:
-        scores[key].append(score[key].fmeasure)
-    processed += 1
+    if args.baseline:
+        baseline_data = list(read_records(args.baseline))
+        candidate, baseline, deltas = compare_to_baseline(extractive_data, baseline_data, reference_dict, args.key)
+        print(f"\nAgainst baseline {args.baseline} ({candidate['processed']} documents scored by both):")
+        for metric in deltas:
+            print(f"{metric}: {candidate['scores'][metric]*100:.2f}% vs {baseline['scores'][metric]*100:.2f}% "
+                  f"(Δ {deltas[metric]*100:+.2f} points)")
 
-# ===== RESULTS =====
-print(f"Processed entries scored: {processed}")
-print(f"Skipped (no candidate field or empty): {skipped_no_candidate}")
-print(f"Skipped (no matching reference): {skipped_no_ref}")
 
-print("\nROUGE scores (F1):")
-for key in scores:
-    avg = sum(scores[key]) / len(scores[key]) if scores[key] else 0
-    print(f"{key}: {avg*100:.2f}%")  # convert to %
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,134 +1,203 @@
-import json
-import torch
-from transformers import T5ForConditionalGeneration, T5Tokenizer
+import sys
+import os
 from typing import List
-import re
-from tqdm import tqdm
-import time
+from functools import partial
 
 # ===== CONFIG =====
 INPUT_PATH = "data/chunked_ilc.json"
 OUTPUT_PATH = "data/t5_ilc_final.json"
+REFERENCE_PATH = "data/cleaned_ilc.json"   # reference summaries for the --preselect-tokens ROUGE change
+SENTENCE_INDEX_PATH = "data/cleaned_ilc.regex.sentences"   # used when present (sentence-index --splitter regex)
 MODEL_NAME = "t5-base"
+PRECISION = "fp32"           # fp32 | bf16 | int8 (CPU) | fp16 (CUDA), see src/resources.py
 
 MAX_INPUT_TOKENS = 512       # T5 input limit
+PREFIX = "summarize: "
 CHUNK_SUM_MAX = 100
 FINAL_SUM_MAX = 300
 FINAL_MIN_LEN = 90
 NUM_BEAMS = 8
 LENGTH_PENALTY = 1.0
+NO_REPEAT_NGRAM_SIZE = 3
 KEYWORD_SENT_LIMIT = 5
+PRESELECT_TOKENS = None      # hybrid mode: T5 sees only TextRank's top sentences up to this many tokens; None = off
+REDUCE = "single"            # single: one stage-2 input, cut at MAX_INPUT_TOKENS | tree: see reduce_summaries
 TEST_COUNT = 100           # None = full dataset
-BATCH_SIZE = 4
-SLEEP_BETWEEN_BATCHES = 1    # seconds; optional sleep
+BATCH_SIZE = 4               # starting batch size; adapted per batch unless --fixed-batch
+MIN_BATCH_SIZE = 1
+MAX_BATCH_SIZE = 16
+MEMORY_LIMIT_MB = None       # RSS limit for batch growth; None = 80% of physical memory
+MAX_BATCH_SECONDS = None     # optional latency bound per generate call
+WINDOW_DOCS = 16             # documents whose generation jobs are batched together
+WORKERS = 1                  # inference processes; >1 runs CPU workers, each with its own model copy
+THREADS_PER_WORKER = None    # torch intra-op threads per worker; None = cores / workers
+RUN_REPORT_PATH = "reports/t5_ilc_run.json"
+SUMMARY_CACHE_DIR = "data/cache"   # generated summaries, shared by both T5 scripts
+SUMMARY_CACHE_MB = 512             # least recently used summaries are evicted beyond this
 # ==================
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-tokenizer = T5Tokenizer.from_pretrained(MODEL_NAME)
-model = T5ForConditionalGeneration.from_pretrained(MODEL_NAME).to(device)
-model.eval()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-KEYWORDS = [
-    'mediation', 'conciliation', 'FIR', 'settlement', 'agreed',
-    'section', 'sections', '498A', '323', '354', '504', 'arbitration',
-    'settlement agreement', 'inherent power', 'Full Bench', 'Ram Lal',
-    'tribunal', 'appeal', 'supreme court', 'judgment', 'petition'
-]
+from src.batching import BatchStats, ReductionStats, run_bucketed, run_grouped, run_tree
+from src.resources import tokenizer_info
+from src.t5_runner import (T5Settings, add_keyword_sentences, apply_args, build_parser, encode_texts, input_budget,
+                           run, summarize_ids_batch, textrank_selection)
+from t5_evaluation import compare_to_baseline
+
+def make_settings(**overrides) -> T5Settings:
+    """
+    The CONFIG block above as a T5Settings; `overrides` replace fields.
+    """
+    return T5Settings.from_config(sys.modules[__name__], **overrides)
 
 def join_chunks(chunks: List[str]) -> str:
     return ' '.join(chunks)
 
-def split_into_sentences(text: str) -> List[str]:
-    sents = re.split(r'(?<=[.!?])\s+', text.strip())
-    return [s.strip() for s in sents if s.strip()]
-
-def find_keyword_sentences(text: str, limit: int) -> List[str]:
-    sents = split_into_sentences(text)
-    found = []
-    lowered = [s.lower() for s in sents]
-    for kw in KEYWORDS:
-        for i, s in enumerate(lowered):
-            if kw in s and sents[i] not in found:
-                found.append(sents[i])
-                if len(found) >= limit:
-                    return found
-    return found
-
-def summarize_text_batch(batch_texts: List[str], max_length: int, min_length: int = 10) -> List[str]:
-    with torch.cuda.amp.autocast():  # FP16
-        enc = tokenizer(["summarize: " + t for t in batch_texts],
-                        return_tensors="pt",
-                        max_length=MAX_INPUT_TOKENS,
-                        truncation=True,
-                        padding=True).to(device)
-        out = model.generate(
-            input_ids=enc.input_ids,
-            attention_mask=enc.attention_mask,
-            max_length=max_length,
-            min_length=min_length,
-            num_beams=NUM_BEAMS,
-            length_penalty=LENGTH_PENALTY,
-            early_stopping=True,
-            no_repeat_ngram_size=3
-        )
-        summaries = [tokenizer.decode(o, skip_special_tokens=True) for o in out]
-    torch.cuda.empty_cache()
-    if SLEEP_BETWEEN_BATCHES > 0:
-        time.sleep(SLEEP_BETWEEN_BATCHES)
-    return summaries
-
-def adaptive_group_chunks(chunks: List[str]) -> List[str]:
+def group_spans(settings: T5Settings, chunk_lengths: List[int]) -> List[tuple]:
+    """
+    (start, end) chunk index ranges packed greedily into groups that fit
+    one model input.
+    """
+    budget = input_budget(settings)
+    spans = []
+    start = current_tokens = 0
+    for i, length in enumerate(chunk_lengths):
+        if current_tokens and current_tokens + length > budget:
+            spans.append((start, i))
+            start = i
+            current_tokens = 0
+        current_tokens += length
+    if current_tokens:
+        spans.append((start, len(chunk_lengths)))
+    return spans
+
+def adaptive_group_ids(settings: T5Settings, chunk_ids: List[List[int]],
+                       chunk_lengths: List[int] = None) -> List[List[int]]:
+    """
+    Packs stored chunk ids into groups that fit one model input, using the
+    stored lengths instead of re-encoding the chunk text.
+    """
+    if chunk_lengths is None:
+        chunk_lengths = [len(ids) for ids in chunk_ids]
+    return [[token for ids in chunk_ids[start:end] for token in ids]
+            for start, end in group_spans(settings, chunk_lengths)]
+
+def stored_ids_match(settings: T5Settings, chunk_tokenizer: dict) -> bool:
+    """
+    Whether chunk ids stored with `chunk_tokenizer` (see chunk_ilc_t5.py
+    --store-ids) are what encode_texts would give for the chunks.
+    """
+    return chunk_tokenizer == tokenizer_info(settings.model_name)
+
+def stage1_inputs(settings: T5Settings, full_text: str, chunks: List[str], chunk_ids: List[List[int]] = None,
+                  chunk_lengths: List[int] = None, chunk_tokenizer: dict = None) -> List[List[int]]:
+    """
+    Token ids of a document's grouped chunks, the stage-1 generation jobs.
+    Stored chunk ids are used only when `chunk_tokenizer` matches the
+    settings' tokenizer.
+    """
+    if chunk_ids and stored_ids_match(settings, chunk_tokenizer):
+        # Ids stored by chunk_ilc_t5.py --store-ids: no re-tokenization needed
+        return adaptive_group_ids(settings, chunk_ids, chunk_lengths)
+    if not chunks:
+        return encode_texts(settings, [full_text])
+    # Same packing as the stored ids, with the prefix and EOS counted
+    return adaptive_group_ids(settings, encode_texts(settings, chunks))
+
+def reduce_summaries(settings: T5Settings, chunk_summaries: List[List[str]], stats: BatchStats = None,
+                     batch_size=None):
+    """
+    Tree reduction of each document's chunk summaries: while they do not
+    fit one model input they are packed into input-sized nodes and every
+    node is summarized again, each level batched across documents. Returns
+    (stage-2 input ids per document, node counts per intermediate level).
+    """
+    def pack(summaries):
+        return adaptive_group_ids(settings, encode_texts(settings, summaries)) if summaries else []
+
+    summarize = partial(summarize_ids_batch, settings, max_length=settings.chunk_sum_max, min_length=20)
+    return run_tree(chunk_summaries, pack, summarize, batch_size, stats=stats,
+                    cache=settings.cache, cache_salt=(settings.chunk_sum_max, 20))
+
+def two_stage_summarize_many(docs: List[dict], settings: T5Settings, stats: BatchStats = None, batch_size=None,
+                             reduction: ReductionStats = None) -> List[str]:
+    """
+    Summarizes several documents ({"full_text", "chunks", "chunk_ids",
+    "chunk_lengths", "chunk_tokenizer", "sentences"}), batching each
+    stage's generation jobs across all of them by token length.
+    `batch_size` is an int or an AdaptiveBatchSize shared by both stages
+    (default settings.batch_size). With settings.preselect_tokens, stage 1
+    only sees TextRank's top sentences (textrank_selection); the jobs this
+    saves are counted for documents with usable stored chunk_lengths. With settings.reduce = "tree",
+    chunk summaries too long for one stage-2 input are reduced first
+    (reduce_summaries). `reduction` records each document's depth and
+    generation jobs.
+    """
+    batch_size = settings.batch_size if batch_size is None else batch_size
+    # Stage 1: grouped chunks of every document, batched together
+    preselect = settings.preselect_tokens
+    selections = textrank_selection(settings, docs, preselect) if preselect else [[] for _ in docs]
     groups = []
-    current_group = []
-    current_tokens = 0
-    for chunk in chunks:
-        chunk_tokens = len(tokenizer.encode(chunk))
-        if current_tokens + chunk_tokens > MAX_INPUT_TOKENS:
-            groups.append(' '.join(current_group))
-            current_group = [chunk]
-            current_tokens = chunk_tokens
-        else:
-            current_group.append(chunk)
-            current_tokens += chunk_tokens
-    if current_group:
-        groups.append(' '.join(current_group))
-    return groups
-
-def two_stage_summarize(full_text: str, chunks: List[str]) -> str:
-    grouped_chunks = adaptive_group_chunks(chunks) if chunks else [full_text]
-    # Stage 1: batch summarize grouped chunks
-    chunk_summaries = []
-    for i in range(0, len(grouped_chunks), BATCH_SIZE):
-        batch = grouped_chunks[i:i+BATCH_SIZE]
-        batch_summaries = summarize_text_batch(batch, max_length=CHUNK_SUM_MAX, min_length=20)
-        chunk_summaries.extend(batch_summaries)
-    # Stage 2: combine and summarize again
-    combined = ' '.join(chunk_summaries)
-    final_summary = summarize_text_batch([combined], max_length=FINAL_SUM_MAX, min_length=FINAL_MIN_LEN)[0]
+    saved = [0] * len(docs)
+    for i, (d, selected) in enumerate(zip(docs, selections)):
+        if not selected:
+            groups.append(stage1_inputs(settings, d["full_text"], d.get("chunks") or [], d.get("chunk_ids"),
+                                        d.get("chunk_lengths"), d.get("chunk_tokenizer")))
+            continue
+        groups.append(adaptive_group_ids(settings, selected))
+        if d.get("chunk_lengths") and stored_ids_match(settings, d.get("chunk_tokenizer")):
+            # Jobs the full input would have taken, from the stored lengths alone
+            saved[i] = len(group_spans(settings, d["chunk_lengths"])) - len(groups[i])
+    stage1 = partial(summarize_ids_batch, settings, max_length=settings.chunk_sum_max, min_length=20)
+    chunk_summaries = run_grouped(groups, stage1, batch_size, stats=stats,
+                                  cache=settings.cache, cache_salt=(settings.chunk_sum_max, 20))
+    # Stage 2: combine each document's summaries and summarize again
+    if settings.reduce == "tree":
+        combined, levels = reduce_summaries(settings, chunk_summaries, stats, batch_size)
+    else:
+        combined, levels = encode_texts(settings, [' '.join(s) for s in chunk_summaries]), [[] for _ in docs]
+    if reduction is not None:
+        budget = input_budget(settings)
+        for group, nodes, ids, doc_saved in zip(groups, levels, combined, saved):
+            reduction.add(depth=len(nodes) + 2, jobs=len(group) + sum(nodes) + 1, truncated=len(ids) > budget,
+                          saved=doc_saved)
+    stage2 = partial(summarize_ids_batch, settings, max_length=settings.final_sum_max,
+                     min_length=settings.final_min_len)
+    finals = run_bucketed(combined, stage2, batch_size, stats=stats,
+                          cache=settings.cache, cache_salt=(settings.final_sum_max, settings.final_min_len))
     # Keyword sentence preservation
-    keyword_sents = find_keyword_sentences(full_text, limit=KEYWORD_SENT_LIMIT)
-    prepend_sents = [ks for ks in keyword_sents if ks not in final_summary]
-    if prepend_sents:
-        final_summary = ' '.join(prepend_sents) + ' ' + final_summary
-    return re.sub(r'\s+', ' ', final_summary).strip()
-
-def main():
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if TEST_COUNT:
-        data = data[:TEST_COUNT]
-
-    results = []
-    for entry in tqdm(data, desc="Summarizing ILC", ncols=100):
-        eid = entry.get("id")
-        chunks = entry.get("chunks", [])
-        full_text = join_chunks(chunks) if chunks else entry.get("summary", "")
-        refined_summary = two_stage_summarize(full_text, chunks)
-        results.append({"id": eid, "refined_summary_improved": refined_summary})
-
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
-    print(f"\n✅ Saved {len(results)} summaries to {OUTPUT_PATH}")
+    return [add_keyword_sentences(settings, final, d["full_text"], d.get("sentences"))
+            for final, d in zip(finals, docs)]
+
+def two_stage_summarize(full_text: str, chunks: List[str], chunk_ids: List[List[int]] = None,
+                        chunk_lengths: List[int] = None, sentences: List[str] = None,
+                        chunk_tokenizer: dict = None) -> str:
+    doc = {"full_text": full_text, "chunks": chunks, "chunk_ids": chunk_ids, "chunk_lengths": chunk_lengths,
+           "chunk_tokenizer": chunk_tokenizer, "sentences": sentences}
+    return two_stage_summarize_many([doc], make_settings())[0]
+
+def make_doc(entry: dict, index=None) -> dict:
+    """
+    Input of two_stage_summarize_many for a chunked ILC record.
+    """
+    chunks = entry.get("chunks", [])
+    return {
+        "full_text": join_chunks(chunks) if chunks else entry.get("summary", ""),
+        "chunks": chunks,
+        "chunk_ids": entry.get("chunk_ids"),
+        "chunk_lengths": entry.get("chunk_lengths"),
+        "chunk_tokenizer": entry.get("chunk_tokenizer"),
+        "sentences": index.sentences(entry.get("id")) if index is not None else None,
+    }
+
+def main(argv=None):
+    settings = make_settings()
+    parser = build_parser(settings, "Two-stage T5 summarization of ILC.")
+    parser.add_argument("--reduce", choices=("single", "tree"), default=settings.reduce,
+                        help="tree: reduce chunk summaries level by level instead of cutting them at the input limit")
+    args = parser.parse_args(argv)
+    run(apply_args(settings, args), args, "ILC", two_stage_summarize_many, make_doc, compare=compare_to_baseline,
+        script=os.path.basename(__file__), reduce=args.reduce)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,108 +1,108 @@
-import json
-import torch
-from transformers import T5ForConditionalGeneration, T5Tokenizer
+import sys
+import os
 from typing import List
-import re
-from tqdm import tqdm
-import time
+from functools import partial
 
 # ===== CONFIG =====
 INPUT_PATH = "data/cleaned_inabs.json"
 OUTPUT_PATH = "data/t5_inabs_final.json"
+REFERENCE_PATH = INPUT_PATH   # reference summaries for the --preselect-tokens ROUGE change
+SENTENCE_INDEX_PATH = "data/cleaned_inabs.regex.sentences"   # used when present (sentence-index --splitter regex)
 MODEL_NAME = "t5-base"
+PRECISION = "fp32"           # fp32 | bf16 | int8 (CPU) | fp16 (CUDA), see src/resources.py
 
 MAX_INPUT_TOKENS = 512
+PREFIX = "summarize: "
 CHUNK_SUM_MAX = 100
 FINAL_SUM_MAX = 300
 FINAL_MIN_LEN = 90
 NUM_BEAMS = 8
 LENGTH_PENALTY = 1.0
+NO_REPEAT_NGRAM_SIZE = 3
 KEYWORD_SENT_LIMIT = 5
+PRESELECT_TOKENS = None      # hybrid mode: T5 sees only TextRank's top sentences up to this many tokens; None = off
 TEST_COUNT = 50
-BATCH_SIZE = 4
-SLEEP_BETWEEN_BATCHES = 1
+BATCH_SIZE = 4               # starting batch size; adapted per batch unless --fixed-batch
+MIN_BATCH_SIZE = 1
+MAX_BATCH_SIZE = 16
+MEMORY_LIMIT_MB = None       # RSS limit for batch growth; None = 80% of physical memory
+MAX_BATCH_SECONDS = None     # optional latency bound per generate call
+WINDOW_DOCS = 16             # documents whose generation jobs are batched together
+WORKERS = 1                  # inference processes; >1 runs CPU workers, each with its own model copy
+THREADS_PER_WORKER = None    # torch intra-op threads per worker; None = cores / workers
+RUN_REPORT_PATH = "reports/t5_inabs_run.json"
+SUMMARY_CACHE_DIR = "data/cache"   # generated summaries, shared by both T5 scripts
+SUMMARY_CACHE_MB = 512             # least recently used summaries are evicted beyond this
 # ==================
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-tokenizer = T5Tokenizer.from_pretrained(MODEL_NAME)
-model = T5ForConditionalGeneration.from_pretrained(MODEL_NAME).to(device)
-model.eval()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-KEYWORDS = [
-    'mediation', 'conciliation', 'FIR', 'settlement', 'agreed',
-    'section', 'sections', '498A', '323', '354', '504', 'arbitration',
-    'settlement agreement', 'inherent power', 'Full Bench', 'Ram Lal',
-    'tribunal', 'appeal', 'supreme court', 'judgment', 'petition'
-]
+from src.batching import BatchStats, ReductionStats, run_bucketed
+from src.t5_runner import (T5Settings, add_keyword_sentences, apply_args, build_parser, encode_texts, input_budget,
+                           run, summarize_ids_batch, textrank_selection)
+from t5_evaluation import compare_to_baseline
 
-def split_into_sentences(text: str) -> List[str]:
-    sents = re.split(r'(?<=[.!?])\s+', text.strip())
-    return [s.strip() for s in sents if s.strip()]
+def make_settings(**overrides) -> T5Settings:
+    """
+    The CONFIG block above as a T5Settings; `overrides` replace fields.
+    """
+    return T5Settings.from_config(sys.modules[__name__], **overrides)
 
-def find_keyword_sentences(text: str, limit: int) -> List[str]:
-    sents = split_into_sentences(text)
-    found = []
-    lowered = [s.lower() for s in sents]
-    for kw in KEYWORDS:
-        for i, s in enumerate(lowered):
-            if kw in s and sents[i] not in found:
-                found.append(sents[i])
-                if len(found) >= limit:
-                    return found
-    return found
-
-def summarize_text_batch(batch_texts: List[str], max_length: int, min_length: int = 10) -> List[str]:
-    enc = tokenizer(["summarize: " + t for t in batch_texts],
-                    return_tensors="pt",
-                    max_length=MAX_INPUT_TOKENS,
-                    truncation=True,
-                    padding=True).to(device)
-    out = model.generate(
-        input_ids=enc.input_ids,
-        attention_mask=enc.attention_mask,
-        max_length=max_length,
-        min_length=min_length,
-        num_beams=NUM_BEAMS,
-        length_penalty=LENGTH_PENALTY,
-        early_stopping=True,
-        no_repeat_ngram_size=3
-    )
-    summaries = [tokenizer.decode(o, skip_special_tokens=True) for o in out]
-    torch.cuda.empty_cache()
-    if SLEEP_BETWEEN_BATCHES > 0:
-        time.sleep(SLEEP_BETWEEN_BATCHES)
-    return summaries
-
-def two_stage_summarize(full_text: str) -> str:
-    # Stage 1: batch summarize the full text (as single "chunk")
-    stage1_summary = summarize_text_batch([full_text], max_length=CHUNK_SUM_MAX, min_length=20)[0]
+def two_stage_summarize_many(docs: List[dict], settings: T5Settings, stats: BatchStats = None, batch_size=None,
+                             reduction: ReductionStats = None) -> List[str]:
+    """
+    Summarizes several documents ({"full_text", "sentences"}), batching each
+    stage's generation jobs across all of them by token length. `batch_size`
+    is an int or an AdaptiveBatchSize shared by both stages (default
+    settings.batch_size). With settings.preselect_tokens, stage 1 sees
+    TextRank's top sentences (textrank_selection) instead of the start of
+    the text. `reduction` records whether each document's text was cut.
+    """
+    batch_size = settings.batch_size if batch_size is None else batch_size
+    # Stage 1: summarize each full text (as single "chunk"), cut to one model input
+    budget = input_budget(settings)
+    inputs = encode_texts(settings, [d["full_text"] for d in docs])
+    truncated = [len(ids) > budget for ids in inputs]
+    inputs = [ids[:budget] for ids in inputs]
+    if settings.preselect_tokens:
+        # The selection is one model input, so it gets at most one input's budget
+        for i, selected in enumerate(textrank_selection(settings, docs, min(settings.preselect_tokens, budget))):
+            if selected:
+                inputs[i] = [token for ids in selected for token in ids]
+                truncated[i] = False
+    if reduction is not None:
+        for doc_truncated in truncated:
+            reduction.add(depth=2, jobs=2, truncated=doc_truncated)
+    stage1 = partial(summarize_ids_batch, settings, max_length=settings.chunk_sum_max, min_length=20)
+    stage1_summaries = run_bucketed(inputs, stage1, batch_size, stats=stats,
+                                    cache=settings.cache, cache_salt=(settings.chunk_sum_max, 20))
     # Stage 2: refine summary
-    final_summary = summarize_text_batch([stage1_summary], max_length=FINAL_SUM_MAX, min_length=FINAL_MIN_LEN)[0]
+    stage2 = partial(summarize_ids_batch, settings, max_length=settings.final_sum_max,
+                     min_length=settings.final_min_len)
+    finals = run_bucketed(encode_texts(settings, stage1_summaries, truncate=True), stage2, batch_size, stats=stats,
+                          cache=settings.cache, cache_salt=(settings.final_sum_max, settings.final_min_len))
     # Keyword sentence preservation
-    keyword_sents = find_keyword_sentences(full_text, limit=KEYWORD_SENT_LIMIT)
-    prepend_sents = [ks for ks in keyword_sents if ks not in final_summary]
-    if prepend_sents:
-        final_summary = ' '.join(prepend_sents) + ' ' + final_summary
-    return re.sub(r'\s+', ' ', final_summary).strip()
+    return [add_keyword_sentences(settings, final, d["full_text"], d.get("sentences"))
+            for final, d in zip(finals, docs)]
+
+def two_stage_summarize(full_text: str, sentences: List[str] = None) -> str:
+    return two_stage_summarize_many([{"full_text": full_text, "sentences": sentences}], make_settings())[0]
 
-def main():
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if TEST_COUNT:
-        data = data[:TEST_COUNT]
+def make_doc(entry: dict, index=None) -> dict:
+    """
+    Input of two_stage_summarize_many for a cleaned IN-ABS record.
+    """
+    return {"full_text": entry.get("input_text", "").strip(),
+            "sentences": index.sentences(entry.get("id")) if index is not None else None}
 
-    results = []
-    for entry in tqdm(data, desc="Summarizing IN-ABS", ncols=100):
-        eid = entry.get("id")
-        text = entry.get("input_text", "").strip()
-        if not text:
-            continue
-        refined_summary = two_stage_summarize(text)
-        results.append({"id": eid, "refined_summary_improved": refined_summary})
+def has_text(entry: dict) -> bool:
+    return bool(entry.get("input_text", "").strip())
 
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
-    print(f"\n✅ Saved {len(results)} summaries to {OUTPUT_PATH}")
+def main(argv=None):
+    settings = make_settings()
+    args = build_parser(settings, "Two-stage T5 summarization of IN-ABS.").parse_args(argv)
+    run(apply_args(settings, args), args, "IN-ABS", two_stage_summarize_many, make_doc, keep=has_text,
+        compare=compare_to_baseline, script=os.path.basename(__file__))
 
 if __name__ == "__main__":
     main()
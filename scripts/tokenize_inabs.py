@@ -1,40 +1,53 @@
 import sys
 import os
-import json
+import argparse
 
 # Add root directory to Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from src.tokenizer import tokenize_text
+from src.tokenizer import BACKENDS, DEFAULT_BACKEND, open_tokenize_cache, tokenize_records
+from src.records import DEFAULT_BUFFER_SIZE, read_records, write_records
+from src.stage_cache import CACHE_DIR
+from src.token_store import STORE_SUFFIX, write_token_store
 from tqdm import tqdm
 
-# Input path
+# Paths
 INPUT_FILE = "data/cleaned_inabs.json"
 OUTPUT_FILE = "data/tokenized_inabs.json"
 
-# Load cleaned IN-ABS data
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    records = json.load(f)
 
-print(f"📥 Loaded {len(records)} records from {INPUT_FILE}\n")
-
-# Tokenize
-tokenized_data = []
-token_counts = []
-
-print("🔠 Tokenizing IN-ABS:")
-for entry in tqdm(records, desc="Tokenizing IN-ABS"):
-    tokens = tokenize_text(entry["input_text"])
-    tokenized_data.append({
-        "id": entry["id"],
-        "tokens": tokens
-    })
-    token_counts.append(len(tokens))
-
-# Save to output file
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    json.dump(tokenized_data, f, indent=2, ensure_ascii=False)
-
-print(f"\n✅ Tokenized full IN-ABS data saved to → {OUTPUT_FILE}")
-print(f"📊 Avg tokens/document: {sum(token_counts) / len(token_counts):.2f}")
-print(f"📉 Min: {min(token_counts)} | 📈 Max: {max(token_counts)}")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tokenize the cleaned IN-ABS dataset.")
+    parser.add_argument("--input", default=INPUT_FILE, help="cleaned .json or .jsonl file")
+    parser.add_argument("--output", default=OUTPUT_FILE, help=f".json/.jsonl file or {STORE_SUFFIX} token store")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="nltk (reference output) or regex (fast)")
+    parser.add_argument("--buffer-size", type=int, default=DEFAULT_BUFFER_SIZE, help="records buffered per write")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="incremental cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every record")
+    args = parser.parse_args(argv)
+
+    # Stream cleaned records straight into the tokenized output
+    print(f"📥 Streaming records from {args.input}\n")
+    token_stats = {}
+    cache = None if args.no_cache else open_tokenize_cache("tokenize_inabs", args.cache_dir, args.backend)
+
+    print("🔠 Tokenizing IN-ABS:")
+    records = tqdm(read_records(args.input), desc="Tokenizing IN-ABS")
+    tokenized = tokenize_records(records, token_stats, cache, args.backend, window=args.buffer_size)
+    if args.output.endswith(STORE_SUFFIX):
+        write_token_store(args.output, tokenized)
+    else:
+        write_records(args.output, tokenized, buffer_size=args.buffer_size)
+
+    print(f"\n✅ Tokenized full IN-ABS data saved to → {args.output}")
+    if cache is not None:
+        print(cache.report())
+        cache.close()
+    if token_stats:
+        print(f"📊 Avg tokens/document: {token_stats['total'] / token_stats['count']:.2f}")
+        print(f"📉 Min: {token_stats['min']} | 📈 Max: {token_stats['max']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+# src/batching.py
+
+"""
+Length-bucketed batching for T5 generation.
+
+Generation jobs (token-id sequences) are collected from many documents,
+sorted by length and cut into full batches, so each batch pads to a
+similar length and short documents no longer run alone. Results are put
+back in job order and, with run_grouped, regrouped per document.
+
+The summarize function is injected: it takes a list of payloads and
+returns one result per payload, so the scheduler itself needs no model.
+
+The batch size is either fixed or an AdaptiveBatchSize, which is updated
+after every batch from its latency and the process RSS and decides the
+size of the next one. With a StageCache, jobs whose results are already
+cached are answered from it and only the rest are batched.
+
+run_tree reduces each document's summaries level by level until they fit
+one model input, batching every level across documents.
+"""
+
+import json
+import os
+import time
+from collections import Counter
+
+try:
+    from .stage_cache import content_key
+except ImportError:  # imported with src/ itself on sys.path
+    from stage_cache import content_key
+
+BATCH_SIZE = 4
+MIN_BATCH_SIZE = 1
+MAX_BATCH_SIZE = 16
+MEMORY_FRACTION = 0.8    # default RSS limit, as a share of physical memory
+HEADROOM = 0.9           # grow only while RSS is below this share of the limit
+SLOWDOWN = 1.1           # a larger batch this much slower per token is not worth it
+
+
+def process_rss_mb():
+    """
+    Resident set size of this process in MB (from /proc/self/statm), or
+    None where that is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def physical_memory_mb():
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class BatchStats:
+    """
+    Counts batches, jobs and padding for scheduled generation calls.
+    """
+
+    def __init__(self):
+        self.batches = 0
+        self.jobs = 0
+        self.tokens = 0          # real tokens submitted
+        self.padded_tokens = 0   # tokens after padding each batch to its longest job
+        self.seconds = 0.0
+        self.batch_sizes = []
+
+    def add(self, lengths, seconds=0.0):
+        self.batches += 1
+        self.jobs += len(lengths)
+        self.tokens += sum(lengths)
+        self.padded_tokens += max(lengths) * len(lengths)
+        self.seconds += seconds
+        self.batch_sizes.append(len(lengths))
+
+    def merge(self, other):
+        """
+        Adds the counts of another BatchStats (e.g. from a worker process).
+        """
+        self.batches += other.batches
+        self.jobs += other.jobs
+        self.tokens += other.tokens
+        self.padded_tokens += other.padded_tokens
+        self.seconds += other.seconds
+        self.batch_sizes.extend(other.batch_sizes)
+
+    @property
+    def padding_ratio(self):
+        return 1 - self.tokens / self.padded_tokens if self.padded_tokens else 0.0
+
+    def report(self):
+        mean = self.jobs / self.batches if self.batches else 0.0
+        return (f"📦 {self.jobs} jobs in {self.batches} batches (mean size {mean:.2f}), "
+                f"padding {self.padding_ratio:.1%} of {self.padded_tokens} tokens")
+
+    def summary(self):
+        return {
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "tokens": self.tokens,
+            "padded_tokens": self.padded_tokens,
+            "padding_ratio": round(self.padding_ratio, 4),
+            "generate_seconds": round(self.seconds, 3),
+            "batch_sizes": self.batch_sizes,
+        }
+
+
+class GenerationCounter:
+    """
+    Counts generate calls, generated sequences and generated tokens.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.sequences = 0
+        self.tokens = 0
+
+    def add(self, output_ids, pad_id):
+        """
+        Adds one generate call's output; the decoder start token and padding
+        do not count as generated.
+        """
+        self.calls += 1
+        self.sequences += len(output_ids)
+        self.tokens += int((output_ids[:, 1:] != pad_id).sum())
+
+    def merge(self, other):
+        """
+        Adds the counts of another GenerationCounter (e.g. from a worker process).
+        """
+        self.calls += other.calls
+        self.sequences += other.sequences
+        self.tokens += other.tokens
+
+    def summary(self):
+        return {"calls": self.calls, "sequences": self.sequences, "tokens": self.tokens}
+
+
+class ReductionStats:
+    """
+    Shape of each document's summarization tree: its depth (generation
+    levels down to the final summary), its generation jobs, whether its
+    final input was cut at the model limit, and the jobs pre-selection
+    saved.
+    """
+
+    def __init__(self):
+        self.documents = 0
+        self.jobs = 0
+        self.saved = 0
+        self.truncated = 0
+        self.depths = Counter()
+
+    def add(self, depth, jobs, truncated=False, saved=0):
+        self.documents += 1
+        self.jobs += jobs
+        self.saved += saved
+        self.truncated += bool(truncated)
+        self.depths[depth] += 1
+
+    def merge(self, other):
+        self.documents += other.documents
+        self.jobs += other.jobs
+        self.saved += other.saved
+        self.truncated += other.truncated
+        self.depths.update(other.depths)
+
+    def report(self):
+        docs = self.documents or 1
+        depth = sum(d * n for d, n in self.depths.items()) / docs
+        line = (f"🌳 {self.documents} documents: depth {depth:.2f} (max {max(self.depths, default=0)}), "
+                f"{self.jobs / docs:.2f} generation jobs per document, {self.truncated} final inputs truncated")
+        if self.saved:
+            line += f", {self.saved} jobs saved by pre-selection"
+        return line
+
+    def summary(self):
+        return {
+            "documents": self.documents,
+            "jobs_per_document": round(self.jobs / self.documents, 3) if self.documents else 0.0,
+            "saved_jobs": self.saved,
+            "depths": {str(d): n for d, n in sorted(self.depths.items())},
+            "truncated": self.truncated,
+        }
+
+
+class AdaptiveBatchSize:
+    """
+    Chooses the next batch size from the latency and memory of the last one.
+
+    The size grows by one job after a batch that left RSS below HEADROOM of
+    `memory_limit_mb`, and is halved only when RSS is over the limit. A
+    size that turned out slower per token than the one below it (or slower
+    than `max_seconds` per batch) becomes the ceiling, so on a machine
+    where larger batches stop paying off the size settles instead of
+    growing to `max_size`.
+    """
+
+    def __init__(self, initial=BATCH_SIZE, min_size=MIN_BATCH_SIZE, max_size=MAX_BATCH_SIZE,
+                 memory_limit_mb=None, max_seconds=None, rss=process_rss_mb):
+        if min_size < 1 or max_size < min_size:
+            raise ValueError(f"invalid batch size bounds {min_size}..{max_size}")
+        if memory_limit_mb is None:
+            total = physical_memory_mb()
+            memory_limit_mb = total * MEMORY_FRACTION if total else None
+        self.min_size = int(min_size)
+        self.max_size = int(max_size)
+        self.memory_limit_mb = memory_limit_mb
+        self.max_seconds = max_seconds
+        self.size = min(max(int(initial), self.min_size), self.max_size)
+        self.ceiling = self.max_size
+        self.backoffs = 0
+        self.history = []        # (size, seconds, rss_mb) per batch
+        self._rss = rss
+        self._per_token = {}     # size -> best seconds per padded token seen
+
+    def update(self, size, seconds, tokens=None, rss_mb=None):
+        """
+        Records a finished batch of `size` jobs (`tokens` padded tokens) and
+        sets the size of the next one.
+        """
+        if rss_mb is None:
+            rss_mb = self._rss()
+        self.history.append((size, round(seconds, 4), None if rss_mb is None else round(rss_mb, 1)))
+
+        limit = self.memory_limit_mb
+        if limit and rss_mb is not None and rss_mb > limit:
+            self.backoffs += 1
+            self.ceiling = max(self.min_size, size - 1)
+            self.size = max(self.min_size, size // 2)
+            return self.size
+
+        if size < self.size:
+            return self.size     # a short tail batch says little about the size
+        per_token = seconds / max(tokens or size, 1)
+        best = self._per_token.get(size)
+        self._per_token[size] = per_token if best is None else min(best, per_token)
+        smaller = self._per_token.get(size - 1)
+        too_slow = self.max_seconds is not None and seconds > self.max_seconds
+        if too_slow or (smaller is not None and self._per_token[size] > smaller * SLOWDOWN):
+            self.ceiling = max(self.min_size, size - 1)
+            self.size = self.ceiling
+        elif (not limit or rss_mb is None or rss_mb < limit * HEADROOM):
+            self.size = min(size + 1, self.ceiling)
+        return self.size
+
+    def summary(self):
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "final_size": self.size,
+            "memory_limit_mb": None if self.memory_limit_mb is None else round(self.memory_limit_mb, 1),
+            "backoffs": self.backoffs,
+            "peak_rss_mb": max((r for _, _, r in self.history if r is not None), default=None),
+            "history": self.history,
+        }
+
+
+def _current_size(batch_size):
+    return max(1, int(batch_size.size if isinstance(batch_size, AdaptiveBatchSize) else batch_size))
+
+
+def bucket_batches(lengths, batch_size=BATCH_SIZE, max_batch_tokens=None):
+    """
+    Yields lists of job indices: jobs sorted by length and cut into batches
+    of at most `batch_size` jobs and, if set, at most `max_batch_tokens`
+    padded tokens. An AdaptiveBatchSize is read again for every batch.
+    """
+    batch = []
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        if batch and (len(batch) >= _current_size(batch_size)
+                      or (max_batch_tokens and (len(batch) + 1) * lengths[i] > max_batch_tokens)):
+            yield batch
+            batch = []
+        batch.append(i)
+    if batch:
+        yield batch
+
+
+def run_bucketed(payloads, summarize_fn, batch_size=BATCH_SIZE, length=len, max_batch_tokens=None, stats=None,
+                 cache=None, cache_salt=None):
+    """
+    Runs summarize_fn over length-sorted batches of payloads; returns the
+    results in payload order. `batch_size` may be an AdaptiveBatchSize,
+    which is updated after each batch. With `cache` (a StageCache), a
+    payload is looked up by its content plus `cache_salt` (e.g. the
+    stage's generation lengths) and only misses are generated and stored.
+    """
+    if cache is not None:
+        keys = [content_key([cache_salt, payload]) for payload in payloads]
+        found = cache.get_many(keys)
+        todo = {}    # key -> first payload index; repeats within the call are generated once
+        for i, k in enumerate(keys):
+            if k not in found:
+                todo.setdefault(k, i)
+        cache.hits += len(payloads) - len(todo)
+        cache.misses += len(todo)
+        computed = run_bucketed([payloads[i] for i in todo.values()], summarize_fn, batch_size, length,
+                                max_batch_tokens, stats)
+        fresh = dict(zip(todo, computed))
+        if fresh:
+            cache.put_many(fresh)
+        return [found[k] if k in found else fresh[k] for k in keys]
+
+    lengths = [length(p) for p in payloads]
+    results = [None] * len(payloads)
+    for batch in bucket_batches(lengths, batch_size, max_batch_tokens):
+        start = time.perf_counter()
+        outputs = summarize_fn([payloads[i] for i in batch])
+        seconds = time.perf_counter() - start
+        for i, output in zip(batch, outputs):
+            results[i] = output
+        batch_lengths = [lengths[i] for i in batch]
+        if isinstance(batch_size, AdaptiveBatchSize):
+            batch_size.update(len(batch), seconds, tokens=max(batch_lengths) * len(batch))
+        if stats is not None:
+            stats.add(batch_lengths, seconds)
+    return results
+
+
+def run_grouped(groups, summarize_fn, batch_size=BATCH_SIZE, length=len, max_batch_tokens=None, stats=None,
+                cache=None, cache_salt=None):
+    """
+    Like run_bucketed for a list of per-document payload lists: all jobs
+    are batched together and the results regrouped per document.
+    """
+    flat = [payload for group in groups for payload in group]
+    results = iter(run_bucketed(flat, summarize_fn, batch_size, length, max_batch_tokens, stats, cache, cache_salt))
+    return [[next(results) for _ in group] for group in groups]
+
+
+def run_tree(documents, pack, summarize_fn, batch_size=BATCH_SIZE, length=len, stats=None,
+             cache=None, cache_salt=None):
+    """
+    Tree reduction: `pack(texts)` packs a document's texts into nodes
+    (token-id lists) that each fit one model input. While a document has more than one node,
+    all documents' nodes are summarized together (run_grouped) and the
+    summaries packed again. A level that does not shrink a document ends
+    its reduction with the nodes concatenated.
+
+    Returns (one final node per document, node counts of each intermediate
+    level per document).
+    """
+    nodes = [pack(texts) for texts in documents]
+    levels = [[] for _ in documents]
+    while True:
+        todo = [i for i, n in enumerate(nodes) if len(n) > 1]
+        if not todo:
+            break
+        summaries = run_grouped([nodes[i] for i in todo], summarize_fn, batch_size, length, stats=stats,
+                                cache=cache, cache_salt=cache_salt)
+        for i, texts in zip(todo, summaries):
+            levels[i].append(len(nodes[i]))
+            packed = pack(texts)
+            if len(packed) >= len(nodes[i]):
+                packed = [[x for node in packed for x in node]]
+            nodes[i] = packed
+    return [n[0] if n else [] for n in nodes], levels
+
+
+def write_run_report(path, stats, controller=None, cache=None, **fields):
+    """
+    Writes a JSON run report with the batch statistics and, for adaptive
+    runs, the controller's bounds and per-batch history, and for cached
+    runs the cache's hit rate.
+    """
+    report = dict(fields)
+    report["batching"] = stats.summary()
+    if controller is not None:
+        report["adaptive_batch_size"] = controller.summary()
+    if cache is not None:
+        lookups = cache.hits + cache.misses
+        report["summary_cache"] = {
+            "path": cache.path,
+            "hits": cache.hits,
+            "misses": cache.misses,
+            "hit_rate": round(cache.hits / lookups, 4) if lookups else 0.0,
+            "evicted": cache.evicted,
+        }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def build_input_tensors(batch_ids, prefix_ids, eos_id, pad_id, max_tokens):
+    """
+    Turns token-id sequences into padded (input_ids, attention_mask) tensors,
+    adding the prefix and EOS and truncating to `max_tokens` like the
+    tokenizer would.
+    """
+    import torch
+
+    limit = max_tokens - len(prefix_ids) - 1
+    rows = [list(prefix_ids) + list(ids[:limit]) + [eos_id] for ids in batch_ids]
+    width = max(len(row) for row in rows)
+    input_ids = torch.full((len(rows), width), pad_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+    for i, row in enumerate(rows):
+        input_ids[i, :len(row)] = torch.tensor(row, dtype=torch.long)
+        attention_mask[i, :len(row)] = 1
+    return input_ids, attention_mask
@@ -0,0 +1,120 @@
+# src/keywords.py
+
+"""
+Keyword-sentence selection for the T5 summarizers.
+
+The lexicon lives in config/keywords.json (priority order). KeywordMatcher
+compiles it once into a single trie-shaped regex, so a document is scanned
+in one pass instead of once per keyword, and returns the same sentences, in
+the same order, as the original nested keyword/sentence loop.
+"""
+
+import json
+import os
+import re
+from bisect import bisect_right
+from functools import lru_cache
+
+KEYWORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config", "keywords.json")
+_SEPARATOR = "\x00"   # joins sentences; never part of a keyword
+
+
+def _trie_pattern(keywords):
+    """
+    Regex matching exactly the keywords, with shared prefixes factored out
+    (e.g. "section(?:s)?") so the engine does not retry every alternative
+    at every position. Longer keywords win at a given start.
+    """
+    trie = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+def load_keywords(path=KEYWORDS_PATH):
+    """
+    Reads a keyword list (or {"keywords": [...]}) from a JSON file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    keywords = data.get("keywords", []) if isinstance(data, dict) else data
+    return [kw for kw in keywords if isinstance(kw, str) and kw]
+
+
+class KeywordMatcher:
+    """
+    Finds every lexicon keyword occurring in a set of sentences in one scan.
+
+    Like the original `kw in sentence.lower()` test, matching is plain
+    substring search against lowercased sentences; keywords are used as
+    given.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._pattern = re.compile(_trie_pattern(self.keywords)) if self.keywords else None
+        rank = {kw: i for i, kw in enumerate(self.keywords)}
+        self._prefixes = {
+            kw: [rank[other] for other in self.keywords if kw.startswith(other)]
+            for kw in self.keywords
+        }
+
+    def sentence_hits(self, lowered):
+        """
+        Returns, per keyword (in priority order), the sorted indices of the
+        lowercased sentences that contain it.
+        """
+        hits = [set() for _ in self.keywords]
+        if self._pattern is None or not lowered:
+            return [[] for _ in self.keywords]
+        starts = []
+        pos = 0
+        for sentence in lowered:
+            starts.append(pos)
+            pos += len(sentence) + 1
+        text = _SEPARATOR.join(lowered)
+        # Each match is the longest keyword starting there; the keywords that
+        # are its prefixes start there too. Resuming one character later
+        # finds overlapping occurrences.
+        m = self._pattern.search(text)
+        while m:
+            sentence = bisect_right(starts, m.start()) - 1
+            for k in self._prefixes[m.group()]:
+                hits[k].add(sentence)
+            m = self._pattern.search(text, m.start() + 1)
+        return [sorted(h) for h in hits]
+
+    def find_sentences(self, sentences, limit):
+        """
+        Up to `limit` distinct sentences, taken keyword by keyword in
+        priority order and, within a keyword, in document order.
+        """
+        found = []
+        seen = set()
+        for indices in self.sentence_hits([s.lower() for s in sentences]):
+            for i in indices:
+                if sentences[i] not in seen:
+                    seen.add(sentences[i])
+                    found.append(sentences[i])
+                    if len(found) >= limit:
+                        return found
+        return found
+
+
+@lru_cache(maxsize=8)
+def get_matcher(keywords):
+    """
+    Returns the compiled matcher for a tuple of keywords (compiled once).
+    """
+    return KeywordMatcher(keywords)
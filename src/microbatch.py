@@ -0,0 +1,99 @@
+# src/microbatch.py
+
+"""
+Request micro-batching for the summarization service.
+
+Concurrent requests are queued; a single batcher task takes the first
+waiting request, keeps collecting for up to `max_wait` seconds (or until
+`max_batch` requests are waiting) and hands the whole batch to a blocking
+`process_fn(payloads) -> results` on one worker thread, so the event loop
+keeps accepting requests while the model runs.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BATCH = 16
+MAX_WAIT = 0.05   # seconds to wait for more requests after the first
+
+
+class MicroBatcher:
+    """
+    Groups submit() calls into batches for `process_fn`.
+    """
+
+    def __init__(self, process_fn, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.process_fn = process_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait))
+        self.batches = 0
+        self.requests = 0
+        self.batch_sizes = []
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    @property
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, payload):
+        """
+        Queues one payload and returns its result once its batch has run;
+        exceptions from process_fn are raised here.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((payload, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            payloads = [payload for payload, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.process_fn, payloads)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            self.batch_sizes.append(len(batch))
+            results = list(results)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            if len(results) != len(batch):
+                error = RuntimeError(f"process_fn returned {len(results)} results for {len(batch)} payloads")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
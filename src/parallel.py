@@ -0,0 +1,130 @@
+# src/parallel.py
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+
+class PoolStats:
+    """
+    Collects per-worker item counts and busy time for ordered_map runs.
+    """
+
+    def __init__(self):
+        self.workers = {}
+        self.started = time.perf_counter()
+
+    def add(self, pid, items, seconds):
+        count, busy = self.workers.get(pid, (0, 0.0))
+        self.workers[pid] = (count + items, busy + seconds)
+
+    @property
+    def total_items(self):
+        return sum(count for count, _ in self.workers.values())
+
+    def report(self, unit="records"):
+        """
+        Returns a printable per-worker throughput table.
+        """
+        wall = time.perf_counter() - self.started
+        lines = [f"{'worker':>10} | {unit:>10} | {'busy s':>8} | {unit + '/s':>12}"]
+        for pid, (count, busy) in sorted(self.workers.items()):
+            rate = count / busy if busy > 0 else 0.0
+            lines.append(f"{pid:>10} | {count:>10} | {busy:>8.2f} | {rate:>12.1f}")
+        total = self.total_items
+        overall = total / wall if wall > 0 else 0.0
+        lines.append(f"{'total':>10} | {total:>10} | {wall:>8.2f} | {overall:>12.1f}")
+        return "\n".join(lines)
+
+
+def _run_chunk(func, chunk):
+    start = time.perf_counter()
+    results = [func(item) for item in chunk]
+    return os.getpid(), time.perf_counter() - start, results
+
+
+def _chunks(items, chunk_size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resolve_workers(workers):
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def make_pool(workers, initializer=None, initargs=(), start_method=None):
+    """
+    Returns a ProcessPoolExecutor for `workers` > 1, else None. Pass it to
+    ordered_map(executor=...) to reuse one pool across several calls.
+
+    By default workers are forked where the platform allows it, so state
+    loaded in the parent beforehand is shared copy-on-write instead of
+    being loaded again per worker. Pass start_method="spawn" for workers
+    that use torch: a forked child cannot use CUDA once the parent has
+    initialised it, and can deadlock in OpenMP. `initializer(*initargs)`
+    runs once in each worker.
+    """
+    workers = resolve_workers(workers)
+    if workers <= 1:
+        return None
+    if start_method is None and "fork" in multiprocessing.get_all_start_methods():
+        start_method = "fork"
+    context = multiprocessing.get_context(start_method) if start_method else None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                               initializer=initializer, initargs=initargs)
+
+
+def ordered_map(func, items, workers=1, chunk_size=64, stats=None, max_pending=None, executor=None):
+    """
+    Applies `func` to every item and yields the results in input order.
+
+    Items are sent to a pool of `workers` processes in chunks of
+    `chunk_size`; at most `max_pending` chunks (default 2 per worker) are in
+    flight at once, so the input iterator is consumed lazily. `func` must be
+    picklable, i.e. defined at module level. With workers <= 1 everything
+    runs in the current process. An existing `executor` is used as-is and
+    left open.
+    """
+    chunk_size = max(1, int(chunk_size))
+    workers = resolve_workers(workers)
+
+    if executor is None and workers == 1:
+        for chunk in _chunks(items, chunk_size):
+            pid, seconds, results = _run_chunk(func, chunk)
+            if stats is not None:
+                stats.add(pid, len(results), seconds)
+            yield from results
+        return
+
+    max_pending = max_pending or workers * 2
+    if executor is not None:
+        yield from _pool_map(executor, func, items, chunk_size, stats, max_pending)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from _pool_map(pool, func, items, chunk_size, stats, max_pending)
+
+
+def _pool_map(pool, func, items, chunk_size, stats, max_pending):
+    pending = deque()
+    for chunk in _chunks(items, chunk_size):
+        pending.append(pool.submit(_run_chunk, func, chunk))
+        if len(pending) >= max_pending:
+            yield from _collect(pending.popleft(), stats)
+    while pending:
+        yield from _collect(pending.popleft(), stats)
+
+
+def _collect(future, stats):
+    pid, seconds, results = future.result()
+    if stats is not None:
+        stats.add(pid, len(results), seconds)
+    return results
@@ -0,0 +1,210 @@
+# src/records.py
+
+"""
+Streaming record I/O shared by all pipeline stages.
+
+Records are dicts. Files ending in .jsonl hold one JSON object per line;
+any other path is treated as a JSON array, which is still read
+incrementally (legacy indent=2 files included) and written one record per
+line, so no stage ever has to hold a whole corpus in memory.
+
+Because RecordWriter puts every record on its own line, a file cut short
+by a crash can still be read up to its last complete record
+(completed_records) and continued in place (RecordWriter(resume=True)).
+"""
+
+import json
+import os
+from itertools import islice
+
+DEFAULT_BUFFER_SIZE = 256   # records held before a write is flushed
+_READ_BLOCK = 1 << 20
+
+
+def is_jsonl(path):
+    return str(path).endswith(".jsonl")
+
+
+def _iter_jsonl(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _iter_json_array(f):
+    decoder = json.JSONDecoder()
+    buf = f.read(_READ_BLOCK)
+    pos = 0
+
+    # Skip to the opening bracket.
+    while True:
+        while pos < len(buf) and buf[pos].isspace():
+            pos += 1
+        if pos < len(buf):
+            break
+        buf, pos = f.read(_READ_BLOCK), 0
+        if not buf:
+            return
+    if buf[pos] != "[":
+        raise ValueError("expected a JSON array of records")
+    pos += 1
+
+    eof = False
+    while True:
+        while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","):
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more = f.read(_READ_BLOCK)
+            eof = not more
+            buf = buf[pos:] + more
+            pos = 0
+            continue
+        yield obj
+        pos = end
+        if pos > _READ_BLOCK:
+            buf, pos = buf[pos:], 0
+
+
+def read_records(path, limit=None):
+    """
+    Yields records from a .jsonl file or a JSON array file, lazily.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        records = _iter_jsonl(f) if is_jsonl(path) else _iter_json_array(f)
+        yield from islice(records, limit) if limit else records
+
+
+def _scan_lines(path):
+    """
+    Yields (record, end offset) for each complete record line of a file in
+    RecordWriter's layout, stopping at the closing bracket or at a torn
+    (unparseable) last line.
+    """
+    jsonl = is_jsonl(path)
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            start, offset = offset, offset + len(line)
+            text = line.strip()
+            if not jsonl and start == 0:
+                if not text.startswith(b"["):
+                    raise ValueError(f"{path} is not a JSON array of records")
+                text = text[1:].strip()
+            if not jsonl and text.startswith(b"]"):
+                return
+            text = text.rstrip(b",")
+            if not text:
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError:
+                if not line.endswith(b"\n"):
+                    return
+                raise ValueError(f"{path} has a record spanning several lines; only files "
+                                 f"written by RecordWriter can be read back record by record") from None
+            if jsonl:
+                if not line.endswith(b"\n"):
+                    return      # cut before its newline: rewrite it
+                yield record, offset
+            else:
+                # End of the record itself, before any separator that follows
+                yield record, start + len(line.rstrip().rstrip(b","))
+
+
+def completed_records(path):
+    """
+    Yields the complete records of a RecordWriter output, including one
+    that was interrupted before it was closed. A missing file has none.
+    """
+    if os.path.exists(path):
+        for record, _ in _scan_lines(path):
+            yield record
+
+
+class RecordWriter:
+    """
+    Appends records to `path`, flushing every `buffer_size` records.
+
+    Writes JSON Lines for .jsonl paths, otherwise a JSON array with one
+    compact record per line. With `resume`, an existing file is cut back
+    to its last complete record and continued (count includes the records
+    kept); with `fsync`, every flush is also synced to disk.
+    """
+
+    def __init__(self, path, buffer_size=DEFAULT_BUFFER_SIZE, resume=False, fsync=False):
+        self.path = path
+        self.buffer_size = max(1, int(buffer_size))
+        self.jsonl = is_jsonl(path)
+        self.resume = resume
+        self.fsync = fsync
+        self.count = 0
+        self._buffer = []
+        self._file = None
+
+    def __enter__(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.resume and os.path.exists(self.path) and os.path.getsize(self.path):
+            end = 0 if self.jsonl else 1   # keep the opening bracket
+            for _, end in _scan_lines(self.path):
+                self.count += 1
+            os.truncate(self.path, end)
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+            if not self.jsonl:
+                self._file.write("[")
+        return self
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        if not self.jsonl:
+            line = ("\n" if self.count == 0 else ",\n") + line
+        else:
+            line += "\n"
+        self._buffer.append(line)
+        self.count += 1
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        if not self.jsonl:
+            self._file.write("\n]\n")
+        self._file.close()
+
+
+def write_records(path, records, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Consumes an iterable of records into `path`; returns how many were written.
+    """
+    with RecordWriter(path, buffer_size=buffer_size) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+def tap(writer, records):
+    """
+    Writes each record to `writer` and passes it on unchanged, so one stage's
+    output can be saved while it feeds the next stage.
+    """
+    for record in records:
+        writer.write(record)
+        yield record
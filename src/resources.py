@@ -0,0 +1,189 @@
+# src/resources.py
+
+"""
+Locates NLTK data and Hugging Face model assets on first use.
+
+Nothing here runs at import time. Assets that are already on disk are used
+without any network access; missing assets raise MissingResourceError with
+instructions, unless downloads were explicitly allowed through the
+LEGALSUM_ALLOW_DOWNLOAD environment variable (or `legalsum --allow-download`).
+"""
+
+import os
+from contextlib import nullcontext
+
+ALLOW_DOWNLOAD_ENV = "LEGALSUM_ALLOW_DOWNLOAD"
+
+# Inference precision for load_t5: full fp32, fp16 autocast (CUDA only),
+# bf16 autocast, or dynamic int8 quantization of the Linear layers (CPU only).
+PRECISIONS = ("fp32", "fp16", "bf16", "int8")
+DEFAULT_PRECISION = "fp32"
+
+# NLTK >= 3.9 loads punkt_tab; older releases load the punkt pickles.
+NLTK_RESOURCES = {
+    "punkt": ("tokenizers/punkt_tab", "tokenizers/punkt"),
+    "stopwords": ("corpora/stopwords",),
+}
+
+_found_nltk = {}
+_tokenizers = {}
+_models = {}
+
+
+class MissingResourceError(RuntimeError):
+    """
+    Raised when a required NLTK or model asset is not available locally.
+    """
+
+
+def downloads_allowed():
+    return os.environ.get(ALLOW_DOWNLOAD_ENV, "").strip().lower() in ("1", "true", "yes")
+
+
+def _find_nltk(paths):
+    import nltk
+    for path in paths:
+        try:
+            nltk.data.find(path)
+            return path
+        except LookupError:
+            continue
+    return None
+
+
+def require_nltk(name):
+    """
+    Makes sure the NLTK resource `name` (e.g. "punkt", "stopwords") is
+    available locally and returns the data path that was found.
+    """
+    if name in _found_nltk:
+        return _found_nltk[name]
+
+    paths = NLTK_RESOURCES.get(name, (name,))
+    found = _find_nltk(paths)
+    if found is None and downloads_allowed():
+        import nltk
+        for path in paths:
+            if nltk.download(path.rsplit("/", 1)[-1], quiet=True):
+                break
+        found = _find_nltk(paths)
+    if found is None:
+        raise MissingResourceError(
+            f"NLTK resource '{name}' not found (looked for {', '.join(paths)}). "
+            f"Install it with `python -m nltk.downloader {paths[0].rsplit('/', 1)[-1]}`, "
+            f"point NLTK_DATA at a directory that contains it, "
+            f"or set {ALLOW_DOWNLOAD_ENV}=1 to download on first use."
+        )
+    _found_nltk[name] = found
+    return found
+
+
+def has_nltk(name):
+    try:
+        require_nltk(name)
+        return True
+    except MissingResourceError:
+        return False
+
+
+def _from_pretrained(cls, model_name, **kwargs):
+    try:
+        return cls.from_pretrained(model_name, local_files_only=True, **kwargs)
+    except (OSError, ValueError):
+        # sentencepiece tokenizers raise ValueError("Either model_file or
+        # model_proto must be specified.") for an uncached model
+        if not downloads_allowed():
+            raise MissingResourceError(
+                f"Model assets for '{model_name}' are not in the local Hugging Face cache. "
+                f"Run `python scripts/legalsum.py fetch --model {model_name}` on a machine "
+                f"with network access, copy the cache (HF_HOME), or set {ALLOW_DOWNLOAD_ENV}=1."
+            ) from None
+    return cls.from_pretrained(model_name, **kwargs)
+
+
+def load_tokenizer(model_name, fast=False):
+    """
+    Returns the (cached) T5 tokenizer for `model_name`.
+    """
+    key = (model_name, fast)
+    if key not in _tokenizers:
+        if fast:
+            from transformers import T5TokenizerFast as cls
+        else:
+            from transformers import T5Tokenizer as cls
+        _tokenizers[key] = _from_pretrained(cls, model_name)
+    return _tokenizers[key]
+
+
+def tokenizer_info(model_name, fast=False):
+    """
+    Names the tokenizer load_tokenizer(model_name, fast) returns; stored
+    next to token ids so readers can tell whether they would encode alike.
+    """
+    return {"class": type(load_tokenizer(model_name, fast)).__name__, "model": model_name}
+
+
+def load_t5(model_name, precision=DEFAULT_PRECISION, device=None):
+    """
+    Loads tokenizer and T5ForConditionalGeneration once per process,
+    precision and device. `device` defaults to CUDA when available (CPU
+    for int8). Returns (tokenizer, model, device); run generate inside
+    inference_context(precision, device).
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"unknown precision {precision!r}; expected one of {PRECISIONS}")
+    key = (model_name, precision, device)
+    if key not in _models:
+        import torch
+        from transformers import T5ForConditionalGeneration
+
+        if device is None:
+            device = "cuda" if torch.cuda.is_available() and precision != "int8" else "cpu"
+        device = torch.device(device)
+        if precision == "fp16" and device.type != "cuda":
+            raise ValueError("fp16 autocast needs a CUDA device; use bf16 or int8 on CPU")
+        tokenizer = load_tokenizer(model_name)
+        model = _from_pretrained(T5ForConditionalGeneration, model_name).to(device)
+        model.eval()
+        if precision == "int8":
+            # Weights of every nn.Linear stored as int8; activations are
+            # quantized on the fly, so no calibration data is needed.
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        _models[key] = (tokenizer, model, device)
+    return _models[key]
+
+
+def set_inference_threads(threads):
+    """
+    Caps torch's intra-op threads for this process (one worker's share of
+    the cores when several inference processes run side by side).
+    """
+    import torch
+    torch.set_num_threads(max(1, int(threads)))
+
+
+def inference_context(precision, device):
+    """
+    Autocast context for generate under `precision` (a no-op for fp32 and
+    int8).
+    """
+    if precision in ("fp16", "bf16"):
+        import torch
+        dtype = torch.float16 if precision == "fp16" else torch.bfloat16
+        return torch.autocast(device_type=device.type, dtype=dtype)
+    return nullcontext()
+
+
+def fetch(nltk_names=("punkt", "stopwords"), model_names=()):
+    """
+    Downloads NLTK data and model assets ahead of time (needs network).
+    """
+    os.environ[ALLOW_DOWNLOAD_ENV] = "1"
+    for name in nltk_names:
+        print(f"NLTK {name}: {require_nltk(name)}")
+    for model_name in model_names:
+        load_tokenizer(model_name)
+        load_tokenizer(model_name, fast=True)
+        from transformers import T5ForConditionalGeneration
+        _from_pretrained(T5ForConditionalGeneration, model_name)
+        print(f"Model {model_name}: cached")
@@ -0,0 +1,280 @@
+# src/sentence_index.py
+
+"""
+Precomputed sentence segmentation for a cleaned corpus.
+
+An index is a directory (by convention <cleaned corpus>.sentences, or
+<cleaned corpus>.<splitter>.sentences for a splitter other than punkt)
+holding:
+
+    text.u8        every document's cleaned text, UTF-8, concatenated
+    spans.npy      int64 (n, 2) byte offsets of each sentence into text.u8
+    docs.npy       int64 array, document i owns spans[docs[i]:docs[i + 1]]
+    meta.json      format version, splitter, record ids and counts
+
+Sentences are split once when the cleaned corpus is written and read back
+by id with memory mapping, so the extractive and T5 summarizers no longer
+re-split (or re-join tokens) on every run. Readers pass the splitter
+they would use themselves to open_sentence_index, so an index never
+changes the sentences a script sees.
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+
+try:
+    from .resources import require_nltk
+except ImportError:  # imported with src/ itself on sys.path
+    from resources import require_nltk
+
+FORMAT_VERSION = 1
+INDEX_SUFFIX = ".sentences"
+SPLITTERS = ("punkt", "regex")
+DEFAULT_SPLITTER = "punkt"
+TEXT_KEY = "input_text"
+
+_REGEX_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_punkt = []
+
+
+def index_path(corpus_path, splitter=DEFAULT_SPLITTER):
+    """
+    Default location of a `splitter` index next to a cleaned corpus file.
+    """
+    root, ext = os.path.splitext(corpus_path)
+    root = root if ext in (".json", ".jsonl") else corpus_path
+    return root + ("" if splitter == DEFAULT_SPLITTER else f".{splitter}") + INDEX_SUFFIX
+
+
+def is_sentence_index(path):
+    return os.path.isfile(os.path.join(path, "meta.json")) and os.path.isfile(os.path.join(path, "spans.npy"))
+
+
+def _punkt_tokenizer():
+    if not _punkt:
+        require_nltk("punkt")
+        try:
+            from nltk.tokenize import PunktTokenizer
+            _punkt.append(PunktTokenizer("english"))
+        except ImportError:  # NLTK < 3.8.2 ships the punkt pickles
+            import nltk
+            _punkt.append(nltk.data.load("tokenizers/punkt/english.pickle"))
+    return _punkt[0]
+
+
+def _punkt_spans(text):
+    return list(_punkt_tokenizer().span_tokenize(text))
+
+
+def _regex_spans(text):
+    spans = []
+    start = 0
+    for m in _REGEX_SENTENCE_END.finditer(text):
+        spans.append((start, m.start()))
+        start = m.end()
+    spans.append((start, len(text)))
+    return spans
+
+
+def sentence_spans(text, splitter=DEFAULT_SPLITTER):
+    """
+    Character (start, end) spans of the non-empty, stripped sentences of text.
+    "punkt" matches nltk.sent_tokenize; "regex" matches the T5 scripts'
+    split_into_sentences.
+    """
+    if splitter not in SPLITTERS:
+        raise ValueError(f"unknown sentence splitter {splitter!r}; expected one of {SPLITTERS}")
+    if not text:
+        return []
+    raw = _punkt_spans(text) if splitter == "punkt" else _regex_spans(text)
+    spans = []
+    for start, end in raw:
+        sentence = text[start:end]
+        stripped = sentence.strip()
+        if stripped:
+            start += len(sentence) - len(sentence.lstrip())
+            spans.append((start, start + len(stripped)))
+    return spans
+
+
+class SentenceIndexWriter:
+    """
+    Streams cleaned records into a new index at `path`; like RecordWriter
+    it has write() and count, so it can be fed with records.tap().
+    """
+
+    def __init__(self, path, text_key=TEXT_KEY, splitter=DEFAULT_SPLITTER):
+        self.path = path
+        self.text_key = text_key
+        self.splitter = splitter
+        self.count = 0
+        self._bytes = 0
+        self._spans = []
+        self._docs = [0]
+        self._doc_ids = []
+        self._text_file = None
+
+    def __enter__(self):
+        os.makedirs(self.path, exist_ok=True)
+        self._text_file = open(os.path.join(self.path, "text.u8"), "wb")
+        return self
+
+    def write(self, record):
+        text = (record.get(self.text_key) or "").strip()
+        base = self._bytes
+        pos = 0        # characters already converted to a byte offset
+        offset = 0     # byte offset of text[pos]
+        for start, end in sentence_spans(text, self.splitter):
+            offset += len(text[pos:start].encode("utf-8"))
+            length = len(text[start:end].encode("utf-8"))
+            self._spans.append((base + offset, base + offset + length))
+            offset += length
+            pos = end
+        data = text.encode("utf-8")
+        self._text_file.write(data)
+        self._bytes += len(data)
+        self._docs.append(len(self._spans))
+        self._doc_ids.append(record.get("id"))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._text_file.close()
+        if exc_type is not None:
+            return
+        spans = np.asarray(self._spans, dtype=np.int64).reshape(-1, 2)
+        np.save(os.path.join(self.path, "spans.npy"), spans)
+        np.save(os.path.join(self.path, "docs.npy"), np.asarray(self._docs, dtype=np.int64))
+        meta = {
+            "format": FORMAT_VERSION,
+            "splitter": self.splitter,
+            "text_key": self.text_key,
+            "documents": self.count,
+            "sentences": len(self._spans),
+            "bytes": self._bytes,
+            "doc_ids": self._doc_ids,
+        }
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+
+def build_sentence_index(records, path, text_key=TEXT_KEY, splitter=DEFAULT_SPLITTER):
+    """
+    Indexes an iterable of cleaned records; returns the document count.
+    """
+    with SentenceIndexWriter(path, text_key, splitter) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+class SentenceIndex:
+    """
+    Read-only, memory-mapped view of a sentence index. With `splitter`,
+    raises ValueError unless the index was split with it.
+
+    Iterating yields {"id", "sentences"} records in corpus order.
+    """
+
+    def __init__(self, path, splitter=None):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"unsupported sentence index format {meta.get('format')!r} in {path}")
+        if splitter is not None and meta["splitter"] != splitter:
+            raise ValueError(f"sentence index {path} was split with {meta['splitter']!r}, not {splitter!r}; "
+                             f"build one with `legalsum sentence-index --splitter {splitter}`")
+        self.path = path
+        self.splitter = meta["splitter"]
+        self.doc_ids = meta["doc_ids"]
+        self.documents = meta.get("documents", len(self.doc_ids))
+        self.spans = np.load(os.path.join(path, "spans.npy"), mmap_mode="r")
+        self.docs = np.load(os.path.join(path, "docs.npy"), mmap_mode="r")
+        text_path = os.path.join(path, "text.u8")
+        if meta["bytes"]:
+            self.text = np.memmap(text_path, dtype=np.uint8, mode="r", shape=(meta["bytes"],))
+        else:
+            self.text = np.empty(0, dtype=np.uint8)
+        self._positions = {}
+        for i, doc_id in enumerate(self.doc_ids):
+            self._positions.setdefault(doc_id, i)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._positions
+
+    def check(self, doc_ids, complete=True):
+        """
+        Raises ValueError unless every id in `doc_ids` (the ids of the
+        corpus the index is used with) is indexed and, when `complete`, the
+        index holds no other documents: an index left over from another
+        version of the corpus would hand out the wrong sentences.
+        """
+        doc_ids = list(doc_ids)
+        missing = [doc_id for doc_id in doc_ids if doc_id not in self._positions]
+        if missing:
+            raise ValueError(f"sentence index {self.path} is stale: {len(missing)} of {len(doc_ids)} documents "
+                             f"are not in it (first id {missing[0]!r}); rebuild it with `legalsum sentence-index`")
+        if complete:
+            self._check_size(len(set(doc_ids)))
+
+    def checked(self, records, complete=True):
+        """
+        Yields `records` (of the corpus the index is used with) while
+        checking their ids like check(): raises ValueError at the first
+        record that is not indexed and, when `complete`, after the last one
+        if the index holds other documents.
+        """
+        seen = set()
+        for record in records:
+            doc_id = record.get("id")
+            if doc_id not in self._positions:
+                raise ValueError(f"sentence index {self.path} is stale: document {doc_id!r} is not in it; "
+                                 f"rebuild it with `legalsum sentence-index`")
+            seen.add(doc_id)
+            yield record
+        if complete:
+            self._check_size(len(seen))
+
+    def _check_size(self, documents):
+        if documents != len(self._positions):
+            raise ValueError(f"sentence index {self.path} is stale: it has {len(self._positions)} documents, "
+                             f"the corpus {documents}; rebuild it with `legalsum sentence-index`")
+
+    def position(self, doc_id):
+        return self._positions[doc_id]
+
+    def sentences_at(self, i):
+        """
+        Returns document i's sentences.
+        """
+        spans = self.spans[self.docs[i]:self.docs[i + 1]]
+        if len(spans) == 0:
+            return []
+        first, last = int(spans[0, 0]), int(spans[-1, 1])
+        block = self.text[first:last].tobytes()
+        return [block[s - first:e - first].decode("utf-8") for s, e in spans.tolist()]
+
+    def sentences(self, doc_id, default=None):
+        """
+        Returns the sentences of the document with `doc_id`, or `default`
+        when the index does not contain it.
+        """
+        i = self._positions.get(doc_id)
+        return default if i is None else self.sentences_at(i)
+
+    def __iter__(self):
+        for i, doc_id in enumerate(self.doc_ids):
+            yield {"id": doc_id, "sentences": self.sentences_at(i)}
+
+
+def open_sentence_index(path, splitter=None):
+    """
+    Opens the index at `path`, or returns None if there is none. With
+    `splitter`, raises ValueError if the index was split differently.
+    """
+    return SentenceIndex(path, splitter) if path and is_sentence_index(path) else None
@@ -0,0 +1,228 @@
+# src/stage_cache.py
+
+"""
+Content-addressed on-disk cache for per-record stage outputs.
+
+Entries are keyed by a hash of the input content and stored together with a
+version fingerprint of the code and settings that produced them, so editing
+src/cleaner.py (or changing a setting) invalidates exactly the affected
+stage while unchanged records are served from disk.
+
+A cache can be given a size limit; the least recently used entries are
+evicted once the stored values exceed it.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from itertools import islice
+
+try:
+    from .parallel import make_pool, ordered_map
+    from .records import DEFAULT_BUFFER_SIZE
+except ImportError:  # imported with src/ itself on sys.path
+    from parallel import make_pool, ordered_map
+    from records import DEFAULT_BUFFER_SIZE
+
+CACHE_DIR = os.path.join("data", "cache")
+_SQL_BATCH = 500       # keep IN (...) lists under SQLite's variable limit
+EVICT_TO = 0.9         # eviction frees space down to this share of max_bytes
+
+
+def module_fingerprint(module, **settings):
+    """
+    Hashes a module's source file together with the stage settings.
+    """
+    h = hashlib.sha256()
+    with open(module.__file__, "rb") as f:
+        h.update(f.read())
+    h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def settings_fingerprint(**settings):
+    """
+    Hashes settings alone, for stages whose output depends on a model and
+    its configuration rather than on a source file.
+    """
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def content_key(content):
+    if not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    """
+    SQLite-backed cache for one pipeline stage.
+
+    Values must be JSON-serialisable. `hits` and `misses` count lookups made
+    through get_many/cached_map. With `max_bytes`, least recently used
+    entries are evicted after each put_many once the stored values exceed
+    it (down to EVICT_TO of the limit); `evicted` counts them.
+    """
+
+    def __init__(self, stage, fingerprint, cache_dir=CACHE_DIR, max_bytes=None):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.stage = stage
+        self.fingerprint = fingerprint
+        self.path = os.path.join(cache_dir, f"{stage}.sqlite")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " fingerprint TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL DEFAULT 0, used REAL NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (fingerprint, key))"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        with self._conn:
+            # Caches created before size-based eviction lack these columns
+            if "size" not in columns:
+                self._conn.execute("ALTER TABLE entries ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE entries SET size = length(CAST(value AS BLOB))")
+            if "used" not in columns:
+                self._conn.execute("ALTER TABLE entries ADD COLUMN used REAL NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+
+    def get_many(self, keys):
+        """
+        Returns {key: value} for the keys present under the current fingerprint.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for i in range(0, len(keys), _SQL_BATCH):
+            batch = keys[i:i + _SQL_BATCH]
+            marks = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, value FROM entries WHERE fingerprint = ? AND key IN ({marks})",
+                [self.fingerprint, *batch],
+            )
+            found.update((k, json.loads(v)) for k, v in rows)
+        if found and self.max_bytes:
+            self._touch(list(found))
+        return found
+
+    def _touch(self, keys):
+        now = time.time()
+        with self._conn:
+            for i in range(0, len(keys), _SQL_BATCH):
+                batch = keys[i:i + _SQL_BATCH]
+                marks = ",".join("?" * len(batch))
+                self._conn.execute(f"UPDATE entries SET used = ? WHERE fingerprint = ? AND key IN ({marks})",
+                                   [now, self.fingerprint, *batch])
+
+    def put_many(self, items):
+        now = time.time()
+        rows = []
+        for k, v in items.items():
+            value = json.dumps(v, ensure_ascii=False)
+            rows.append((self.fingerprint, k, value, len(value.encode("utf-8")), now))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (fingerprint, key, value, size, used) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        if self.max_bytes:
+            self.evict()
+
+    def size_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self, max_bytes=None):
+        """
+        Deletes least recently used entries (of any fingerprint) until the
+        stored values fit EVICT_TO of `max_bytes`; returns the count.
+        """
+        max_bytes = max_bytes or self.max_bytes
+        total = self.size_bytes()
+        if not max_bytes or total <= max_bytes:
+            return 0
+        excess = total - int(max_bytes * EVICT_TO)
+        victims = []
+        for rowid, size in self._conn.execute("SELECT rowid, size FROM entries ORDER BY used"):
+            victims.append(rowid)
+            excess -= size
+            if excess <= 0:
+                break
+        with self._conn:
+            for i in range(0, len(victims), _SQL_BATCH):
+                batch = victims[i:i + _SQL_BATCH]
+                self._conn.execute(f"DELETE FROM entries WHERE rowid IN ({','.join('?' * len(batch))})", batch)
+        self.evicted += len(victims)
+        return len(victims)
+
+    def prune(self):
+        """
+        Deletes entries written by other code/setting versions; returns the count.
+        """
+        with self._conn:
+            cur = self._conn.execute("DELETE FROM entries WHERE fingerprint != ?", (self.fingerprint,))
+        return cur.rowcount
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        evicted = f", {self.evicted} evicted" if self.evicted else ""
+        return f"🗃️  {self.stage} cache: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate{evicted})"
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def cached_map(func, items, cache=None, key=None, window=DEFAULT_BUFFER_SIZE, workers=1, chunk_size=64,
+               stats=None):
+    """
+    Like parallel.ordered_map, but only items whose content is not in `cache`
+    are passed to `func`. `key(item)` returns the content to hash (default:
+    the item itself). Results are yielded in input order; `window` items
+    (the caller's buffer size) are looked up and held at a time.
+    """
+    if cache is None:
+        yield from ordered_map(func, items, workers=workers, chunk_size=chunk_size, stats=stats)
+        return
+
+    key = key or (lambda item: item)
+    pool = make_pool(workers)
+    try:
+        items = iter(items)
+        while True:
+            batch = list(islice(items, window))
+            if not batch:
+                return
+            keys = [content_key(key(item)) for item in batch]
+            found = cache.get_many(keys)
+            misses = [item for k, item in zip(keys, batch) if k not in found]
+            cache.hits += len(batch) - len(misses)
+            cache.misses += len(misses)
+
+            computed = ordered_map(func, misses, workers=workers, chunk_size=chunk_size,
+                                   stats=stats, executor=pool)
+            fresh = {}
+            results = []
+            for k in keys:
+                if k in found:
+                    results.append(found[k])
+                else:
+                    value = next(computed)
+                    fresh[k] = value
+                    results.append(value)
+            if fresh:
+                cache.put_many(fresh)
+            yield from results
+    finally:
+        if pool is not None:
+            pool.shutdown()
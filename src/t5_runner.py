@@ -0,0 +1,507 @@
+# src/t5_runner.py
+
+"""
+Shared driver of the two-stage T5 scripts (scripts/t5_ilc.py and
+scripts/t5_inabs.py).
+
+Each script keeps its CONFIG block and the dataset-specific make_doc and
+two_stage_summarize_many; everything else lives here. A script turns its
+CONFIG block into a T5Settings (T5Settings.from_config), main() applies
+the parsed options to a copy (apply_args), and that object is passed to
+every function below, so nothing is configured through module globals.
+
+run() is the scripts' main loop: it reads the input in windows of
+documents, summarizes each window in-process or in --workers processes
+(init_worker/summarize_window), appends the summaries to the output as
+they come back in order and writes the run report.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field, fields, replace
+from itertools import islice
+from typing import List, Optional
+
+from tqdm import tqdm
+
+try:
+    from .batching import (AdaptiveBatchSize, BatchStats, GenerationCounter, ReductionStats,
+                           build_input_tensors as pad_input_ids, write_run_report)
+    from .keywords import KEYWORDS_PATH, get_matcher, load_keywords
+    from .parallel import PoolStats, make_pool, ordered_map, resolve_workers
+    from .records import RecordWriter, completed_records, read_records
+    from .resources import PRECISIONS, inference_context, load_t5, load_tokenizer, set_inference_threads
+    from .sentence_index import open_sentence_index
+    from .stage_cache import StageCache, settings_fingerprint
+    from .textrank import pagerank_many, select_within_budget
+except ImportError:  # imported with src/ itself on sys.path
+    from batching import (AdaptiveBatchSize, BatchStats, GenerationCounter, ReductionStats,
+                          build_input_tensors as pad_input_ids, write_run_report)
+    from keywords import KEYWORDS_PATH, get_matcher, load_keywords
+    from parallel import PoolStats, make_pool, ordered_map, resolve_workers
+    from records import RecordWriter, completed_records, read_records
+    from resources import PRECISIONS, inference_context, load_t5, load_tokenizer, set_inference_threads
+    from sentence_index import open_sentence_index
+    from stage_cache import StageCache, settings_fingerprint
+    from textrank import pagerank_many, select_within_budget
+
+SUMMARY_CACHE_STAGE = "t5_summaries"   # shared by both T5 scripts
+SENTENCE_SPLITTER = "regex"   # the sentence index must split like split_into_sentences
+
+_prefix_ids = {}
+_worker = {}   # this process's settings, summarize function and batch size, set by init_worker
+
+
+@dataclass
+class T5Settings:
+    """
+    Everything a T5 script run is configured with: one field per CONFIG
+    name (MODEL_NAME -> model_name, ...), plus the keyword lexicon. `cache`
+    (the summary StageCache) and `generation` (generate counters) belong
+    to the process using the settings and are not configuration.
+    """
+    input_path: str = None
+    output_path: str = None
+    sentence_index_path: Optional[str] = None
+    reference_path: Optional[str] = None
+    model_name: str = "t5-base"
+    precision: str = "fp32"
+    device: Optional[str] = None   # None: CUDA when available (see load_t5)
+    max_input_tokens: int = 512
+    prefix: str = "summarize: "
+    chunk_sum_max: int = 100
+    final_sum_max: int = 300
+    final_min_len: int = 90
+    num_beams: int = 8
+    length_penalty: float = 1.0
+    no_repeat_ngram_size: int = 3
+    keyword_sent_limit: int = 5
+    preselect_tokens: Optional[int] = None
+    reduce: str = "single"
+    test_count: Optional[int] = None
+    batch_size: int = 4
+    min_batch_size: int = 1
+    max_batch_size: int = 16
+    memory_limit_mb: Optional[float] = None
+    max_batch_seconds: Optional[float] = None
+    window_docs: int = 16
+    workers: int = 1
+    threads_per_worker: Optional[int] = None
+    run_report_path: str = None
+    summary_cache_dir: str = "data/cache"
+    summary_cache_mb: float = 512
+    keywords: list = field(default_factory=lambda: load_keywords(KEYWORDS_PATH))
+    cache: Optional[StageCache] = field(default=None, repr=False, compare=False)
+    generation: GenerationCounter = field(default_factory=GenerationCounter, repr=False, compare=False)
+
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """
+        Settings from the upper-case CONFIG names of `config` (a script
+        module); names it lacks keep their defaults.
+        """
+        values = {f.name: getattr(config, f.name.upper()) for f in fields(cls)
+                  if f.name not in ("cache", "generation") and hasattr(config, f.name.upper())}
+        values.update(overrides)
+        return cls(**values)
+
+
+def apply_args(settings: T5Settings, args) -> T5Settings:
+    """
+    A copy of `settings` with the options parsed by build_parser applied.
+    """
+    overrides = {"keywords": load_keywords(args.keywords), "precision": args.precision,
+                 "preselect_tokens": args.preselect_tokens}
+    if hasattr(args, "reduce"):   # t5_ilc.py's --reduce
+        overrides["reduce"] = args.reduce
+    return replace(settings, **overrides)
+
+
+def generation_settings(settings: T5Settings) -> dict:
+    """
+    Everything besides the input that decides a generated summary; the
+    summary cache is keyed by it.
+    """
+    return {"model": settings.model_name, "precision": settings.precision, "prefix": settings.prefix,
+            "max_input_tokens": settings.max_input_tokens, "num_beams": settings.num_beams,
+            "length_penalty": settings.length_penalty, "no_repeat_ngram_size": settings.no_repeat_ngram_size}
+
+
+def prefix_ids(settings: T5Settings) -> List[int]:
+    key = (settings.model_name, settings.prefix)
+    if key not in _prefix_ids:
+        tokenizer = load_tokenizer(settings.model_name)
+        _prefix_ids[key] = tokenizer(settings.prefix, add_special_tokens=False).input_ids
+    return _prefix_ids[key]
+
+
+def input_budget(settings: T5Settings) -> int:
+    """
+    Tokens of one model input left for the text after prefix and EOS.
+    """
+    return settings.max_input_tokens - len(prefix_ids(settings)) - 1
+
+
+def encode_texts(settings: T5Settings, texts: List[str], truncate: bool = False) -> List[List[int]]:
+    """
+    Token ids of each text without prefix or EOS; with `truncate`, cut to
+    what fits one model input.
+    """
+    tokenizer = load_tokenizer(settings.model_name)
+    if truncate:
+        return tokenizer(list(texts), add_special_tokens=False, truncation=True,
+                         max_length=input_budget(settings)).input_ids
+    return tokenizer(list(texts), add_special_tokens=False).input_ids
+
+
+def _generate(settings: T5Settings, input_ids, attention_mask, max_length: int, min_length: int) -> List[str]:
+    tokenizer, model, device = load_t5(settings.model_name, settings.precision, settings.device)
+    with inference_context(settings.precision, device):
+        out = model.generate(
+            input_ids=input_ids.to(device),
+            attention_mask=attention_mask.to(device),
+            max_length=max_length,
+            min_length=min_length,
+            num_beams=settings.num_beams,
+            length_penalty=settings.length_penalty,
+            early_stopping=True,
+            no_repeat_ngram_size=settings.no_repeat_ngram_size
+        )
+    settings.generation.add(out, tokenizer.pad_token_id)
+    return [tokenizer.decode(o, skip_special_tokens=True) for o in out]
+
+
+def summarize_text_batch(settings: T5Settings, batch_texts: List[str], max_length: int,
+                         min_length: int = 10) -> List[str]:
+    tokenizer = load_tokenizer(settings.model_name)
+    enc = tokenizer([settings.prefix + t for t in batch_texts],
+                    return_tensors="pt",
+                    max_length=settings.max_input_tokens,
+                    truncation=True,
+                    padding=True)
+    return _generate(settings, enc.input_ids, enc.attention_mask, max_length, min_length)
+
+
+def build_input_tensors(settings: T5Settings, batch_ids: List[List[int]]):
+    """
+    Turns token ids into padded (input_ids, attention_mask) tensors, adding
+    the prefix and EOS the tokenizer would have added.
+    """
+    tokenizer = load_tokenizer(settings.model_name)
+    return pad_input_ids(batch_ids, prefix_ids(settings), tokenizer.eos_token_id, tokenizer.pad_token_id,
+                         settings.max_input_tokens)
+
+
+def summarize_ids_batch(settings: T5Settings, batch_ids: List[List[int]], max_length: int,
+                        min_length: int = 10) -> List[str]:
+    input_ids, attention_mask = build_input_tensors(settings, batch_ids)
+    return _generate(settings, input_ids, attention_mask, max_length, min_length)
+
+
+def split_into_sentences(text: str) -> List[str]:
+    sents = re.split(r'(?<=[.!?])\s+', text.strip())
+    return [s.strip() for s in sents if s.strip()]
+
+
+def find_keyword_sentences(settings: T5Settings, text: str, limit: int, sentences: List[str] = None) -> List[str]:
+    sents = sentences if sentences is not None else split_into_sentences(text)
+    return get_matcher(tuple(settings.keywords)).find_sentences(sents, limit)
+
+
+def add_keyword_sentences(settings: T5Settings, final_summary: str, full_text: str,
+                          sentences: List[str] = None) -> str:
+    keyword_sents = find_keyword_sentences(settings, full_text, limit=settings.keyword_sent_limit,
+                                           sentences=sentences)
+    prepend_sents = [ks for ks in keyword_sents if ks not in final_summary]
+    if prepend_sents:
+        final_summary = ' '.join(prepend_sents) + ' ' + final_summary
+    return re.sub(r'\s+', ' ', final_summary).strip()
+
+
+def textrank_selection(settings: T5Settings, docs: List[dict], budget: int) -> List[List[List[int]]]:
+    """
+    Hybrid mode: ranks each document's sentences with TextRank (the dense
+    TF-IDF graph of extractive_summarizer.py) and returns the token ids of
+    the top-ranked sentences that fit `budget` tokens, in document order.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    sentence_lists = [d.get("sentences") or split_into_sentences(d["full_text"]) for d in docs]
+    ranked = [i for i, sentences in enumerate(sentence_lists) if len(sentences) > 1]
+    graphs = (cosine_similarity(TfidfVectorizer().fit_transform(sentence_lists[i])) for i in ranked)
+    scores = dict(zip(ranked, pagerank_many(graphs)))
+    selections = []
+    for i, sentences in enumerate(sentence_lists):
+        ids = encode_texts(settings, sentences) if sentences else []
+        keep = select_within_budget(scores.get(i, [1.0] * len(ids)), [len(x) for x in ids], budget)
+        selections.append([ids[j] for j in keep])
+    return selections
+
+
+def open_summary_cache(settings: T5Settings, max_mb: float) -> StageCache:
+    return StageCache(SUMMARY_CACHE_STAGE, settings_fingerprint(**generation_settings(settings)),
+                      settings.summary_cache_dir, max_bytes=int(max_mb * 2 ** 20))
+
+
+def init_worker(settings: T5Settings, summarize_many, threads, batch_size, cache_mb) -> T5Settings:
+    """
+    Sets up summarize_window in this process: its share of torch threads,
+    its own batch size controller and its own cache connection.
+    `summarize_many` is the script's two_stage_summarize_many. Runs once in
+    every --workers process (and in the main process otherwise); returns
+    the settings this process summarizes with. The model is loaded on the
+    first cache miss, after the thread count is set.
+    """
+    if threads:
+        set_inference_threads(threads)
+    cache = open_summary_cache(settings, cache_mb) if cache_mb is not None else None
+    _worker["settings"] = replace(settings, cache=cache)
+    _worker["summarize_many"] = summarize_many
+    _worker["batch_size"] = batch_size
+    return _worker["settings"]
+
+
+def summarize_window(docs: List[dict]):
+    """
+    Summarizes one window of documents. Returns (summaries, BatchStats,
+    ReductionStats, GenerationCounter, cache hits, cache misses, (pid,
+    batch size controller summary or None)) so worker processes can report
+    back; the counts and the controller summary's history cover only this
+    window.
+    """
+    generation = GenerationCounter()
+    settings = replace(_worker["settings"], generation=generation)
+    controller = _worker["batch_size"] if isinstance(_worker["batch_size"], AdaptiveBatchSize) else None
+    seen = len(controller.history) if controller is not None else 0
+    stats = BatchStats()
+    reduction = ReductionStats()
+    cache = settings.cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    summaries = _worker["summarize_many"](docs, settings, stats, _worker["batch_size"], reduction)
+    if cache is not None:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    adaptive = dict(controller.summary(), history=controller.history[seen:]) if controller is not None else None
+    return summaries, stats, reduction, generation, hits, misses, (os.getpid(), adaptive)
+
+
+def merge_controller_summary(summaries: dict, pid, summary: dict):
+    """
+    Adds one window's controller summary to the per-process `summaries`:
+    the latest bounds and size, with the batch histories concatenated.
+    """
+    previous = summaries.get(pid)
+    history = previous["history"] + summary["history"] if previous is not None else summary["history"]
+    summaries[pid] = dict(summary, history=history)
+
+
+def build_parser(settings: T5Settings, description: str) -> argparse.ArgumentParser:
+    """
+    The options both T5 scripts share, with defaults from their settings.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--keywords", default=KEYWORDS_PATH, help="JSON keyword lexicon, in priority order")
+    parser.add_argument("--window-docs", type=int, default=settings.window_docs,
+                        help="documents whose generation jobs are batched together")
+    parser.add_argument("--batch-size", type=int, default=settings.batch_size,
+                        help="starting (or, with --fixed-batch, fixed) batch size")
+    parser.add_argument("--min-batch-size", type=int, default=settings.min_batch_size)
+    parser.add_argument("--max-batch-size", type=int, default=settings.max_batch_size)
+    parser.add_argument("--memory-limit-mb", type=float, default=settings.memory_limit_mb,
+                        help="halve the batch size when process RSS exceeds this (default: 80%% of RAM)")
+    parser.add_argument("--max-batch-seconds", type=float, default=settings.max_batch_seconds,
+                        help="stop growing batches that take longer than this")
+    parser.add_argument("--fixed-batch", action="store_true", help="use --batch-size for every batch")
+    parser.add_argument("--report", default=settings.run_report_path,
+                        help="JSON run report with the chosen batch sizes")
+    parser.add_argument("--precision", choices=PRECISIONS, default=settings.precision, help="inference precision")
+    parser.add_argument("--output", default=settings.output_path, help="where to write the summaries")
+    parser.add_argument("--limit", type=int, default=settings.test_count, help="documents to read (0 = all)")
+    parser.add_argument("--resume", action="store_true",
+                        help="keep the summaries already in --output and skip their ids")
+    parser.add_argument("--no-cache", action="store_true", help="always generate; do not use the summary cache")
+    parser.add_argument("--cache-mb", type=float, default=settings.summary_cache_mb,
+                        help="summary cache size limit")
+    parser.add_argument("--preselect-tokens", type=int, default=settings.preselect_tokens,
+                        help="hybrid mode: summarize only TextRank's top sentences up to this many tokens")
+    parser.add_argument("--baseline",
+                        help="full-input summaries to report the hybrid mode's ROUGE change against "
+                             "(default: the default --output, when it exists)")
+    parser.add_argument("--reference", default=settings.reference_path,
+                        help="cleaned corpus with the reference summary_text")
+    parser.add_argument("--workers", type=int, default=settings.workers,
+                        help="CPU inference processes (0 = one per core)")
+    parser.add_argument("--threads-per-worker", type=int, default=settings.threads_per_worker,
+                        help="torch threads per process (default: cores / workers)")
+    return parser
+
+
+def rouge_change(compare, candidate_path: str, baseline_path: str, reference_path: str) -> dict:
+    """
+    Scores the summaries in `candidate_path` against those of a baseline
+    run with `compare` (t5_evaluation.compare_to_baseline) on the documents
+    both summarized. Returns the run report entry.
+    """
+    references = {entry['id']: entry['summary_text'] for entry in read_records(reference_path)
+                  if 'summary_text' in entry}
+    candidate, baseline, deltas = compare(list(read_records(candidate_path)), list(read_records(baseline_path)),
+                                          references)
+    return {"baseline": baseline_path, "reference": reference_path, "documents": candidate["processed"],
+            "scores": candidate["scores"], "baseline_scores": baseline["scores"], "deltas": deltas}
+
+
+def _checked(index, entries, complete):
+    """
+    The entries, their ids checked against the sentence index as they are read.
+    """
+    try:
+        yield from index.checked(entries, complete)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+
+
+def run(settings: T5Settings, args, label: str, summarize_many, make_doc, keep=None, compare=None, **fields):
+    """
+    Summarizes settings.input_path with `summarize_many` (the script's
+    two_stage_summarize_many) and `make_doc`, using the settings with the
+    parsed build_parser options applied (apply_args). Entries for which
+    `keep(entry)` is false are counted but not summarized. In hybrid mode
+    the ROUGE change against a full-input run is computed with `compare`
+    (see rouge_change). `fields` are added to the run report.
+    """
+    window_docs = max(1, args.window_docs)
+    limit = args.limit or None
+    data = read_records(settings.input_path, limit=limit)
+    try:
+        index = open_sentence_index(settings.sentence_index_path, SENTENCE_SPLITTER)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    if index is not None:
+        data = _checked(index, data, complete=not limit)
+    done = {r.get("id") for r in completed_records(args.output)} if args.resume else set()
+    done.discard(None)
+    if done:
+        print(f"↩️ Resuming: {len(done)} documents already in {args.output}")
+        data = (entry for entry in data if entry.get("id") not in done)
+
+    workers = resolve_workers(args.workers)
+    cache_mb = None if args.no_cache else args.cache_mb
+    stats = BatchStats()
+    controller = None
+    if not args.fixed_batch:
+        controller = AdaptiveBatchSize(args.batch_size, args.min_batch_size, args.max_batch_size,
+                                       args.memory_limit_mb, args.max_batch_seconds)
+    batch_size = controller or args.batch_size
+    pool = None
+    threads = args.threads_per_worker
+    # The model is loaded on the first cache miss, so a fully cached rerun never loads it
+    if workers > 1:
+        if settings.precision == "fp16":
+            sys.exit("❌ --workers > 1 runs on the CPU, where fp16 is not supported; use bf16 or int8")
+        # Spawned, not forked, CPU workers: a forked child cannot use CUDA and can
+        # deadlock in OpenMP, and several processes would not share one GPU well
+        settings = replace(settings, device="cpu")
+        threads = threads or max(1, (os.cpu_count() or 1) // workers)
+        if controller is not None and controller.memory_limit_mb:
+            # Each worker loads its own copy of the model
+            controller.memory_limit_mb = controller.memory_limit_mb / workers
+        pool = make_pool(workers, init_worker, (settings, summarize_many, threads, batch_size, cache_mb),
+                         start_method="spawn")
+        print(f"🧵 {workers} workers x {threads} threads")
+        local = None
+    else:
+        local = init_worker(settings, summarize_many, threads, batch_size, cache_mb)
+    progress = tqdm(total=limit, initial=len(done), desc=f"Summarizing {label}", ncols=100)
+
+    pending = deque()   # (documents read, entries) of windows in flight, in order
+
+    def windows():
+        while True:
+            window = list(islice(data, window_docs))
+            if not window:
+                return
+            entries = [e for e in window if keep(e)] if keep is not None else window
+            if not entries:
+                progress.update(len(window))
+                continue
+            pending.append((len(window), entries))
+            yield [make_doc(e, index) for e in entries]
+
+    pool_stats = PoolStats()
+    reduction = ReductionStats()
+    generation = GenerationCounter()
+    cache_hits = cache_misses = 0
+    controllers = {}   # pid -> batch size controller summary
+    started = time.perf_counter()
+    # Append-only output, flushed and fsynced after every window
+    with RecordWriter(args.output, resume=args.resume, fsync=True) as writer:
+        results = ordered_map(summarize_window, windows(), workers, chunk_size=1, stats=pool_stats, executor=pool)
+        for summaries, window_stats, window_reduction, window_generation, hits, misses, (pid, adaptive) in results:
+            count, entries = pending.popleft()
+            for entry, refined_summary in zip(entries, summaries):
+                writer.write({"id": entry.get("id"), "refined_summary_improved": refined_summary})
+            writer.flush()
+            stats.merge(window_stats)
+            reduction.merge(window_reduction)
+            generation.merge(window_generation)
+            cache_hits += hits
+            cache_misses += misses
+            if adaptive is not None:
+                merge_controller_summary(controllers, pid, adaptive)
+            progress.update(count)
+    progress.close()
+    elapsed = time.perf_counter() - started
+    if pool is not None:
+        pool.shutdown()
+    summarized = writer.count - len(done)
+    docs_per_second = summarized / elapsed if elapsed > 0 else 0.0
+
+    print(stats.report())
+    print(reduction.report())
+    cache = local.cache if local is not None else None
+    if workers > 1:
+        print(pool_stats.report(unit="windows"))
+        if cache_mb is not None:
+            # The workers had their own connections; report their totals
+            cache = open_summary_cache(settings, cache_mb)
+            cache.hits, cache.misses = cache_hits, cache_misses
+    baseline = args.baseline
+    if baseline is None and os.path.abspath(settings.output_path) != os.path.abspath(args.output):
+        # A full-input run writes to the default output
+        baseline = settings.output_path if os.path.exists(settings.output_path) else None
+    if settings.preselect_tokens and compare is not None and baseline:
+        fields["rouge_change"] = rouge_change(compare, args.output, baseline, args.reference)
+    print(f"⚡ {summarized} documents in {elapsed:.1f}s ({docs_per_second:.2f} docs/s)")
+    if cache is not None:
+        print(cache.report())
+    if workers > 1 and controllers:
+        # One controller per worker process, each adapted to its own batches
+        fields["adaptive_batch_size"] = {"workers": {str(pid): summary for pid, summary in controllers.items()}}
+    write_run_report(args.report, stats, controller if workers == 1 else None, cache,
+                     model=settings.model_name, precision=settings.precision,
+                     input=settings.input_path, output=args.output, documents=writer.count, workers=workers,
+                     threads_per_worker=threads, seconds=round(elapsed, 2),
+                     docs_per_second=round(docs_per_second, 3), preselect_tokens=settings.preselect_tokens,
+                     reduction=reduction.summary(), generation=generation.summary(), **fields)
+    if controller is not None and workers == 1:
+        print(f"📐 Batch size settled at {controller.size} ({controller.backoffs} memory backoffs)")
+    elif workers > 1:
+        for pid, summary in controllers.items():
+            print(f"📐 Worker {pid}: batch size settled at {summary['final_size']} "
+                  f"({summary['backoffs']} memory backoffs)")
+    print(f"🧾 Run report: {args.report}")
+    if cache is not None:
+        cache.close()
+    print(f"\n✅ Saved {writer.count} summaries to {args.output}")
+    if "rouge_change" in fields:
+        change = fields["rouge_change"]
+        print(f"📏 ROUGE change against the full-input run {baseline} ({change['documents']} documents):")
+        for metric, delta in change["deltas"].items():
+            print(f"   {metric}: {change['scores'][metric]*100:.2f}% vs {change['baseline_scores'][metric]*100:.2f}% "
+                  f"(Δ {delta*100:+.2f} points)")
+    elif settings.preselect_tokens:
+        print("📏 No full-input run to compare ROUGE against; pass --baseline")
@@ -0,0 +1,147 @@
+# src/textrank.py
+
+"""
+Vectorized TextRank: PageRank by power iteration on a sparse sentence
+similarity matrix.
+
+Scores follow networkx.pagerank on nx.from_numpy_array(similarity) (uniform
+teleport, dangling mass spread uniformly, L1 convergence test against
+n * tolerance) without building a Python graph. Several documents can be
+ranked in one call; they are stacked into a block-diagonal matrix and
+iterated together, each stopping on its own convergence test.
+
+block_similarity builds the sentence graph from L2-normalised row vectors
+(e.g. TfidfVectorizer output) one block of rows at a time, keeping only the
+top-k neighbours and/or similarities above a threshold, so peak memory is
+block_size x n instead of n x n.
+
+select_within_budget turns scores into an extract bounded by length (e.g.
+the T5 scripts' TextRank pre-selection, bounded in tokens).
+"""
+
+import numpy as np
+import scipy.sparse as sp
+
+DAMPING = 0.85
+TOLERANCE = 1.0e-6
+MAX_ITER = 100
+BLOCK_SIZE = 256    # rows of the similarity matrix held densely at once
+
+
+def _row_stochastic(matrix):
+    """
+    Returns (csr transition matrix, dangling-node mask) for a similarity matrix.
+    """
+    A = sp.csr_array(matrix, dtype=float)
+    A.eliminate_zeros()
+    S = np.asarray(A.sum(axis=1)).ravel()
+    dangling = S == 0
+    S[~dangling] = 1.0 / S[~dangling]
+    return sp.dia_array((S, 0), shape=A.shape).tocsr() @ A, dangling
+
+
+def block_similarity(vectors, block_size=BLOCK_SIZE, top_k=None, threshold=None):
+    """
+    Sparse cosine-similarity matrix of L2-normalised row vectors, computed
+    `block_size` rows at a time. Each sentence keeps its self-similarity,
+    its `top_k` most similar other sentences (all when None) and only
+    similarities >= `threshold` (all when None). Top-k pruning is made
+    symmetric by keeping an edge chosen from either end.
+    """
+    X = sp.csr_array(vectors, dtype=float)
+    n = X.shape[0]
+    XT = X.T.tocsc()
+    if n == 0:
+        return sp.csr_array((0, 0))
+    prune_k = top_k is not None and top_k < n - 1
+    rows, cols, vals = [], [], []
+
+    for start in range(0, n, max(1, int(block_size))):
+        block = (X[start:start + block_size] @ XT).toarray()
+        if threshold is not None:
+            block[block < threshold] = 0.0
+        if prune_k:
+            local = np.arange(block.shape[0])
+            diag = start + local
+            self_sim = block[local, diag].copy()
+            block[local, diag] = -np.inf
+            keep = np.argpartition(block, -top_k, axis=1)[:, -top_k:]
+            pruned = np.zeros_like(block)
+            pruned[local[:, None], keep] = block[local[:, None], keep]
+            pruned[local, diag] = self_sim
+            block = pruned
+        r, c = np.nonzero(block)
+        rows.append(r + start)
+        cols.append(c)
+        vals.append(block[r, c])
+
+    A = sp.csr_array((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(n, n))
+    return A.maximum(A.T).tocsr() if prune_k else A
+
+
+def pagerank_many(matrices, damping=DAMPING, tol=TOLERANCE, max_iter=MAX_ITER):
+    """
+    Ranks the nodes of several similarity matrices at once; returns one
+    score array per matrix. A document that has not converged after
+    `max_iter` iterations keeps its last iterate.
+    """
+    matrices = list(matrices)
+    sizes = np.array([m.shape[0] for m in matrices], dtype=np.int64)
+    results = [np.zeros(0) for _ in matrices]
+    live = np.flatnonzero(sizes)
+    if len(live) == 0:
+        return results
+
+    sizes = sizes[live]
+    A, dangling = _row_stochastic(sp.block_diag([matrices[i] for i in live], format="csr"))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    p = np.repeat(1.0 / sizes, sizes)
+    x = p.copy()
+    active = np.ones(len(sizes), dtype=bool)
+
+    for _ in range(max_iter):
+        xlast = x
+        dangling_mass = np.add.reduceat(np.where(dangling, x, 0.0), starts)
+        x = damping * (x @ A + np.repeat(dangling_mass, sizes) * p) + (1 - damping) * p
+        # converged documents keep their scores while the rest iterate
+        x = np.where(np.repeat(active, sizes), x, xlast)
+        err = np.add.reduceat(np.absolute(x - xlast), starts)
+        active &= err >= sizes * tol
+        if not active.any():
+            break
+
+    for i, start, size in zip(live, starts, sizes):
+        results[i] = x[start:start + size]
+    return results
+
+
+def pagerank(matrix, damping=DAMPING, tol=TOLERANCE, max_iter=MAX_ITER):
+    """
+    PageRank scores for one (dense or sparse) similarity matrix.
+    """
+    return pagerank_many([matrix], damping, tol, max_iter)[0]
+
+
+def top_sentences(sentences, scores, top_n=3):
+    """
+    Returns the `top_n` highest-scoring sentences, ties broken the way
+    sorting (score, sentence) pairs in reverse does.
+    """
+    ranked = sorted(zip(scores.tolist(), sentences), reverse=True)
+    return [sent for _, sent in ranked[:top_n]]
+
+
+def select_within_budget(scores, lengths, budget):
+    """
+    Indices of the highest-scoring sentences whose `lengths` sum to at most
+    `budget`, in document order. A sentence that does not fit is skipped
+    for lower-ranked ones that do.
+    """
+    ranked = sorted(range(len(lengths)), key=lambda i: -float(scores[i]))
+    chosen = []
+    used = 0
+    for i in ranked:
+        if used + lengths[i] <= budget:
+            chosen.append(i)
+            used += lengths[i]
+    return sorted(chosen)
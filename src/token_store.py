@@ -0,0 +1,165 @@
+# src/token_store.py
+
+"""
+Array-backed storage for tokenized corpora.
+
+A store is a directory (by convention named *.tokens) holding:
+
+    vocab.json    token strings; a token's id is its index
+    ids.u32       every document's token ids, concatenated (raw uint32)
+    offsets.npy   int64 array, document i spans ids[offsets[i]:offsets[i + 1]]
+    meta.json     format version, record ids and counts
+
+ids.u32 and offsets.npy are opened with memory mapping, so reading one
+document touches only that document's slice of the file.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+try:
+    from .records import read_records
+except ImportError:  # imported with src/ itself on sys.path
+    from records import read_records
+
+FORMAT_VERSION = 1
+STORE_SUFFIX = ".tokens"
+ID_DTYPE = np.uint32
+
+
+def is_token_store(path):
+    return os.path.isfile(os.path.join(path, "meta.json"))
+
+
+class TokenStoreWriter:
+    """
+    Streams {"id", "tokens"} records into a new store at `path`.
+
+    The store is written to `path`.tmp and renamed into place on a clean
+    exit, so a failed write never leaves a partial store, or a new ids.u32
+    next to an old meta.json, at `path`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path.rstrip(os.sep) + ".tmp"
+        self.count = 0
+        self._vocab = {}
+        self._offsets = [0]
+        self._doc_ids = []
+        self._ids_file = None
+
+    def __enter__(self):
+        shutil.rmtree(self.tmp_path, ignore_errors=True)   # left by an interrupted write
+        os.makedirs(self.tmp_path)
+        self._ids_file = open(os.path.join(self.tmp_path, "ids.u32"), "wb")
+        return self
+
+    def write(self, record):
+        vocab = self._vocab
+        ids = [vocab.setdefault(tok, len(vocab)) for tok in record.get("tokens", [])]
+        np.asarray(ids, dtype=ID_DTYPE).tofile(self._ids_file)
+        self._offsets.append(self._offsets[-1] + len(ids))
+        self._doc_ids.append(record.get("id"))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._ids_file.close()
+        if exc_type is not None:
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+            return
+        np.save(os.path.join(self.tmp_path, "offsets.npy"), np.asarray(self._offsets, dtype=np.int64))
+        with open(os.path.join(self.tmp_path, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(list(self._vocab), f, ensure_ascii=False)
+        meta = {
+            "format": FORMAT_VERSION,
+            "dtype": np.dtype(ID_DTYPE).name,
+            "documents": self.count,
+            "tokens": self._offsets[-1],
+            "vocab_size": len(self._vocab),
+            "doc_ids": self._doc_ids,
+        }
+        with open(os.path.join(self.tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        self._replace()
+
+    def _replace(self):
+        """
+        Moves the finished store from tmp_path to path, replacing any old one.
+        """
+        old_path = self.path.rstrip(os.sep) + ".old"
+        if os.path.exists(self.path):
+            shutil.rmtree(old_path, ignore_errors=True)
+            os.replace(self.path, old_path)
+        os.replace(self.tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+def write_token_store(path, records):
+    """
+    Writes an iterable of {"id", "tokens"} records; returns the document count.
+    """
+    with TokenStoreWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+class TokenStore:
+    """
+    Read-only, memory-mapped view of a token store.
+
+    Iterating yields {"id", "tokens"} records, the same shape as the
+    tokenized_*.json files.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"unsupported token store format {meta.get('format')!r} in {path}")
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as f:
+            self.vocab = np.array(json.load(f), dtype=object)
+        self.path = path
+        self.doc_ids = meta["doc_ids"]
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        ids_path = os.path.join(path, "ids.u32")
+        if meta["tokens"]:
+            self.ids = np.memmap(ids_path, dtype=meta["dtype"], mode="r", shape=(meta["tokens"],))
+        else:
+            self.ids = np.empty(0, dtype=meta["dtype"])
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def token_ids(self, i):
+        """
+        Returns document i's token ids as a zero-copy array view.
+        """
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def tokens(self, i):
+        return self.vocab[self.token_ids(i)].tolist()
+
+    def __iter__(self):
+        for i, doc_id in enumerate(self.doc_ids):
+            yield {"id": doc_id, "tokens": self.tokens(i)}
+
+
+def convert_json(json_path, store_path):
+    """
+    Converts an existing tokenized_*.json (or .jsonl) file into a token store.
+    """
+    return write_token_store(store_path, read_records(json_path))
+
+
+def read_tokenized(path):
+    """
+    Yields {"id", "tokens"} records from a token store or a JSON/JSONL file.
+    """
+    if is_token_store(path):
+        return iter(TokenStore(path))
+    return read_records(path)
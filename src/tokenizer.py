@@ -1,22 +1,70 @@
 # src/tokenizer.py
 
-import nltk
+import re
 import string
+import sys
+from functools import partial
+from itertools import tee
 
-# Ensure tokenizer models are downloaded
 try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+    from .records import DEFAULT_BUFFER_SIZE
+    from .resources import require_nltk
+    from .stage_cache import CACHE_DIR, StageCache, cached_map, module_fingerprint
+except ImportError:  # imported with src/ itself on sys.path
+    from records import DEFAULT_BUFFER_SIZE
+    from resources import require_nltk
+    from stage_cache import CACHE_DIR, StageCache, cached_map, module_fingerprint
+
+# "nltk" reproduces the original word_tokenize output; "regex" is the fast
+# single-pass approximation below.
+BACKENDS = ("nltk", "regex")
+DEFAULT_BACKEND = "nltk"
+
+PUNCTUATION = frozenset(string.punctuation)
+
+# Every substring of string.punctuation (including ""), so a set lookup gives
+# exactly the old `token not in string.punctuation` substring behaviour.
+_PUNCT_SUBSTRINGS = frozenset(
+    string.punctuation[i:j]
+    for i in range(len(string.punctuation) + 1)
+    for j in range(i, len(string.punctuation) + 1)
+)
+
+# ----- regex backend -----
+# Mirrors the Treebank rules NLTK applies after sentence splitting: these
+# characters always stand alone, "," and ":" split unless followed by a digit,
+# and "." stays inside a word unless it ends a sentence.
+_SEPARATORS = r"\.{2,}|--|[;@#$%&?!*\[\](){}<>‒-―«“‘„»”’]|`+"
+_WORD = (r"(?:[^\s\"`;@#$%&?!*\[\](){}<>‒-―«“‘„»”’,:.\-]"
+         r"|[,:](?=\d)|\.(?!\.)|-(?!-))+")
+_TOKEN_RE = re.compile(rf"(?P<quote>\")|(?P<sep>{_SEPARATORS})|(?P<word>{_WORD})|(?P<punct>[,:])")
+_NEXT_WORD_RE = re.compile(r"[\])}>\"']*\s*(\S?)(\w*)")
+_NUMBER_RE = re.compile(r"-?[.,]?\d[\d,.\-]*")
+_CONTRACTION_RE = re.compile(r"(?i)(.+?)('s|'m|'d|'ll|'re|'ve|n't)")
+_LEADING_QUOTE_RE = re.compile(r"(?i)'(?!(?:re|ve|ll|m|t|s|d|n)\b)")
+_OPENERS = frozenset(" ([{<\n\t")
+
+# Common abbreviations from NLTK's English Punkt model, and the capitalised
+# words it treats as frequent sentence starters.
+ABBREVIATIONS = frozenset(
+    "mr mrs ms messrs dr prof jr sr st ltd co corp inc bros cos vs v gen col maj lt "
+    "sen rep reps jan feb aug sep sept oct nov dec u.s u.k u.n ph.d a.m p.m".split()
+)
+SENTENCE_STARTERS = frozenset(
+    "most he since so both these it nevertheless this indeed however instead under "
+    "similarly some though while when in despite although nonetheless thus there if "
+    "the nor separately moreover but they yet many according among meanwhile even i".split()
+)
 
 
 def word_tokenize_nltk(text):
     """
     Tokenizes input text using NLTK's word_tokenize.
     """
-    from nltk.tokenize import word_tokenize
     if not isinstance(text, str) or not text.strip():
         return []
+    require_nltk('punkt')
+    from nltk.tokenize import word_tokenize
     return word_tokenize(text)
 
 
@@ -27,12 +75,120 @@ def remove_punctuation(tokens):
     if not isinstance(tokens, list):
         return []
 
-    return [token for token in tokens if token not in string.punctuation]
+    return [token for token in tokens if token not in _PUNCT_SUBSTRINGS]
+
 
+def _ends_sentence(text, end, base):
+    """
+    Guesses whether the period at text[end - 1] ends a sentence.
+    """
+    if text.startswith(",", end):
+        return False
+    first, rest = _NEXT_WORD_RE.match(text, end).groups()
+    lowered = base.lower()
+    if lowered in ABBREVIATIONS or (len(base) == 1 and base.isalpha()):
+        return not first or (first.isupper() and (first + rest).lower() in SENTENCE_STARTERS)
+    if _NUMBER_RE.fullmatch(base):
+        return not (first.islower() or first in PUNCTUATION)
+    return True
 
-def tokenize_text(text):
+
+def tokenize_regex(text):
     """
-    Tokenizes and cleans text using NLTK, removing punctuation.
+    Tokenizes text in a single regex pass and drops punctuation tokens.
+    Approximates the NLTK backend without needing any NLTK data; on the
+    sample corpus the two differ only in these known ways:
+
+    - a word's final period: NLTK splits it off where Punkt ends a
+      sentence, this backend where _ends_sentence guesses so ("J." / "J");
+    - opening and closing double quotes ("``" / "''") in some contexts;
+    - punctuation glued to the next word (",to" / "to", "'.He" / ".He"),
+      and a stray "'." token NLTK keeps.
     """
+    if not isinstance(text, str) or not text.strip():
+        return []
+
+    tokens = []
+    append = tokens.append
+    for m in _TOKEN_RE.finditer(text):
+        kind = m.lastgroup
+        tok = m.group()
+        if kind == "word":
+            if tok[-1] == "." and len(tok) > 1 and _ends_sentence(text, m.end(), tok[:-1]):
+                tok = tok[:-1]
+            if "'" not in tok:
+                if len(tok) == 6 and tok.lower() == "cannot":
+                    # word_tokenize splits "cannot" into "can" "not".
+                    append(tok[:3])
+                    tok = tok[3:]
+                append(tok)
+                continue
+            if tok[0] == "'" and len(tok) > 1 and _LEADING_QUOTE_RE.match(tok):
+                tok = tok[1:]
+            trailing = tok[-1] == "'" and len(tok) > 1
+            if trailing:
+                tok = tok[:-1]
+            contraction = _CONTRACTION_RE.fullmatch(tok)
+            if contraction:
+                append(contraction.group(1))
+                append(contraction.group(2))
+            else:
+                append(tok)
+        elif kind == "quote":
+            start = m.start()
+            append("``" if start == 0 or text[start - 1] in _OPENERS else "''")
+        elif kind == "sep" and tok not in PUNCTUATION:
+            append(tok)
+    return [t for t in tokens if t not in PUNCTUATION]
+
+
+def tokenize_text(text, backend=DEFAULT_BACKEND):
+    """
+    Tokenizes and cleans text, removing punctuation. `backend` is "nltk"
+    (default, NLTK word_tokenize) or "regex" (fast single-pass tokenizer).
+    """
+    if backend == "regex":
+        return tokenize_regex(text)
+    if backend != "nltk":
+        raise ValueError(f"unknown tokenizer backend {backend!r}; expected one of {BACKENDS}")
     tokens = word_tokenize_nltk(text)
-    return remove_punctuation(tokens)
\ No newline at end of file
+    return remove_punctuation(tokens)
+
+
+def tokenize_many(texts, backend=DEFAULT_BACKEND):
+    """
+    Tokenizes an iterable of texts; returns a list of token lists in order.
+    """
+    if backend == "regex":
+        return [tokenize_regex(t) for t in texts]
+    return [tokenize_text(t, backend) for t in texts]
+
+
+def open_tokenize_cache(stage, cache_dir=CACHE_DIR, backend=DEFAULT_BACKEND):
+    """
+    StageCache of tokenized texts for `stage` ("tokenize_ilc" or
+    "tokenize_inabs"), invalidated when this module or the backend changes.
+    """
+    return StageCache(stage, module_fingerprint(sys.modules[__name__], backend=backend), cache_dir=cache_dir)
+
+
+def tokenize_records(records, token_stats=None, cache=None, backend=DEFAULT_BACKEND, window=DEFAULT_BUFFER_SIZE):
+    """
+    Yields {"id", "tokens"} for each cleaned record. When `token_stats` is a
+    dict it is updated with running count/total/min/max token counts. With a
+    StageCache only new or changed texts are tokenized, `window` at a time.
+    """
+    records, entries = tee(records)
+    tokenized = cached_map(partial(tokenize_text, backend=backend),
+                           (entry["input_text"] for entry in records), cache=cache, window=window)
+    for entry, tokens in zip(entries, tokenized):
+        if token_stats is not None:
+            n = len(tokens)
+            token_stats["count"] = token_stats.get("count", 0) + 1
+            token_stats["total"] = token_stats.get("total", 0) + n
+            token_stats["min"] = min(token_stats.get("min", n), n)
+            token_stats["max"] = max(token_stats.get("max", n), n)
+        yield {
+            "id": entry["id"],
+            "tokens": tokens
+        }
@@ -0,0 +1,98 @@
+# src/vectorizer.py
+
+"""
+Sentence vectorizers shared by every document in a run.
+
+"document" fits a new TfidfVectorizer per document (the original
+behaviour). "corpus" fits IDF statistics once over all sentences of the
+corpus and saves the model, so later runs only transform. "hashing" needs
+no fit at all: term frequencies are hashed into a fixed number of columns.
+"""
+
+import os
+from functools import lru_cache
+
+import joblib
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+
+MODES = ("document", "corpus", "hashing")
+DEFAULT_MODE = "document"
+MODEL_DIR = os.path.join("data", "models")
+FORMAT_VERSION = 1
+HASH_FEATURES = 2 ** 18
+
+
+def model_path(input_path, model_dir=MODEL_DIR):
+    """
+    Default location of the corpus model fitted on `input_path`.
+    """
+    name = os.path.basename(os.path.normpath(input_path)).split(".")[0]
+    return os.path.join(model_dir, f"tfidf_{name}.joblib")
+
+
+def fit_corpus_tfidf(sentences):
+    """
+    Fits one TfidfVectorizer on an iterable of sentences (each sentence is
+    a document for IDF purposes, as in the per-document fit).
+    """
+    return TfidfVectorizer().fit(sentences)
+
+
+def hashing_vectorizer(n_features=HASH_FEATURES):
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm="l2")
+
+
+def save_vectorizer(vectorizer, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    joblib.dump({"format": FORMAT_VERSION, "vectorizer": vectorizer}, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_vectorizer(path):
+    """
+    Returns the saved vectorizer, or None if there is no usable model at `path`.
+    """
+    if not os.path.isfile(path):
+        return None
+    saved = joblib.load(path)
+    if not isinstance(saved, dict) or saved.get("format") != FORMAT_VERSION:
+        return None
+    return saved["vectorizer"]
+
+
+def shared_vectorizer(mode, path=None, sentences=None, refit=False):
+    """
+    Returns the vectorizer to reuse across documents, or None for "document"
+    mode. In "corpus" mode the model at `path` is loaded, or fitted on
+    `sentences()` and saved there when missing or `refit` is set.
+    """
+    if mode not in MODES:
+        raise ValueError(f"unknown vectorizer mode {mode!r}; expected one of {MODES}")
+    if mode == "document":
+        return None
+    if mode == "hashing":
+        return hashing_vectorizer()
+
+    vectorizer = None if refit else load_vectorizer(path)
+    if vectorizer is None:
+        vectorizer = fit_corpus_tfidf(sentences())
+        save_vectorizer(vectorizer, path)
+        cached_vectorizer.cache_clear()
+    return vectorizer
+
+
+@lru_cache(maxsize=4)
+def cached_vectorizer(mode, path=None):
+    """
+    Per-process cache of the shared vectorizer, so pool workers load a saved
+    corpus model once instead of receiving it with every task.
+    """
+    if mode == "document":
+        return None
+    if mode == "hashing":
+        return hashing_vectorizer()
+    vectorizer = load_vectorizer(path)
+    if vectorizer is None:
+        raise FileNotFoundError(f"no corpus TF-IDF model at {path}")
+    return vectorizer
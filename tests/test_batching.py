@@ -0,0 +1,128 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from batching import (AdaptiveBatchSize, BatchStats, GenerationCounter, ReductionStats, bucket_batches, run_bucketed,
+                      run_grouped, run_tree, write_run_report)
+
+
+def test_batches_are_full_and_length_sorted():
+    lengths = [50, 3, 400, 7, 51, 399, 5, 2, 48]
+    batches = list(bucket_batches(lengths, batch_size=4))
+    assert [len(b) for b in batches] == [4, 4, 1]
+    flat = [lengths[i] for b in batches for i in b]
+    assert flat == sorted(lengths)
+
+    capped = list(bucket_batches(lengths, batch_size=4, max_batch_tokens=500))
+    assert all(len(b) * max(lengths[i] for i in b) <= 500 or len(b) == 1 for b in capped)
+
+
+def test_results_are_regrouped_per_document():
+    calls = []
+
+    def summarize(batch):
+        calls.append(len(batch))
+        return [f"summary of {p}" for p in batch]
+
+    groups = [["aaaa", "b"], [], ["cc", "dddddd", "e"], ["ff"]]
+    stats = BatchStats()
+    results = run_grouped(groups, summarize, batch_size=3, stats=stats)
+    assert results == [[f"summary of {p}" for p in g] for g in groups]
+    assert calls == [3, 3]
+    assert (stats.jobs, stats.batches, stats.tokens) == (6, 2, 16)
+    assert run_bucketed([], summarize) == []
+
+
+def test_cached_jobs_are_not_regenerated(tmp_path):
+    from stage_cache import StageCache
+    calls = []
+
+    def summarize(batch):
+        calls.append(list(batch))
+        return [p.upper() for p in batch]
+
+    with StageCache("summaries", "v1", cache_dir=str(tmp_path)) as cache:
+        assert run_bucketed(["ab", "c", "ab"], summarize, cache=cache, cache_salt=(100, 20)) == ["AB", "C", "AB"]
+        assert calls == [["c", "ab"]]
+        assert run_grouped([["c"], ["ab", "d"]], summarize, cache=cache, cache_salt=(100, 20)) == [["C"], ["AB", "D"]]
+        assert calls[-1] == ["d"]
+        run_bucketed(["c"], summarize, cache=cache, cache_salt=(300, 90))   # other lengths: a miss
+        assert calls[-1] == ["c"]
+        assert (cache.hits, cache.misses) == (3, 4)
+
+
+def test_tree_reduction_until_one_node_per_document():
+    def pairs(texts):
+        return [list(texts[i:i + 2]) for i in range(0, len(texts), 2)]
+
+    calls = []
+
+    def summarize(batch):
+        calls.append(len(batch))
+        return ["+".join(node) for node in batch]
+
+    finals, levels = run_tree([list("abcde"), ["x"], []], pairs, summarize, batch_size=8)
+    assert finals == [["a+b+c+d", "e"], ["x"], []]
+    assert levels == [[3, 2], [], []]
+    assert calls == [3, 2]
+
+    # A level that does not shrink stops the reduction
+    finals, levels = run_tree([["a", "b"]], lambda texts: [[t] for t in texts], summarize)
+    assert (finals, levels) == ([["a", "b"]], [[2]])
+
+    reduction = ReductionStats()
+    reduction.add(depth=4, jobs=9)
+    other = ReductionStats()
+    other.add(depth=2, jobs=3, truncated=True, saved=5)
+    reduction.merge(other)
+    assert reduction.summary() == {"documents": 2, "jobs_per_document": 6.0, "saved_jobs": 5,
+                                   "depths": {"2": 1, "4": 1}, "truncated": 1}
+    assert "5 jobs saved" in reduction.report()
+
+
+def test_adaptive_batch_size_grows_settles_and_backs_off():
+    rss = [100.0]
+    controller = AdaptiveBatchSize(initial=2, min_size=1, max_size=6, memory_limit_mb=1000, rss=lambda: rss[0])
+    assert controller.update(2, 2.0, tokens=20) == 3      # headroom: grow by one
+    assert controller.update(3, 3.0, tokens=30) == 4
+    assert controller.update(4, 6.0, tokens=40) == 3      # slower per token than size 3: settle
+    assert controller.update(3, 3.0, tokens=30) == 3      # ceiling holds
+    assert controller.update(1, 0.5, tokens=5) == 3       # a short tail batch changes nothing
+    rss[0] = 1200.0
+    assert controller.update(3, 3.0, tokens=30) == 1      # real memory pressure: halve
+    assert controller.backoffs == 1
+    assert [size for size, _, _ in controller.history] == [2, 3, 4, 3, 1, 3]
+
+
+def test_run_bucketed_follows_the_controller(tmp_path):
+    controller = AdaptiveBatchSize(initial=1, min_size=1, max_size=3, memory_limit_mb=None, rss=lambda: None)
+    stats = BatchStats()
+    payloads = ["x" * n for n in range(1, 10)]
+    assert run_bucketed(payloads, lambda batch: [len(p) for p in batch], controller, stats=stats) == list(range(1, 10))
+    assert stats.batch_sizes[:2] == [1, 2]     # size 1 has no smaller size to lose against
+    assert sum(stats.batch_sizes) == 9 and max(stats.batch_sizes) <= 3
+
+    report = write_run_report(str(tmp_path / "run.json"), stats, controller, documents=9)
+    assert report["batching"]["batch_sizes"] == stats.batch_sizes
+    assert report["adaptive_batch_size"]["history"][0][0] == 1
+    assert (tmp_path / "run.json").exists()
+
+
+def test_input_tensors_add_prefix_eos_and_padding():
+    pytest.importorskip("torch")
+    from batching import build_input_tensors
+    input_ids, mask = build_input_tensors([[5, 6, 7], [8]], prefix_ids=[1, 2], eos_id=0, pad_id=9, max_tokens=5)
+    assert input_ids.tolist() == [[1, 2, 5, 6, 0], [1, 2, 8, 0, 9]]
+    assert mask.tolist() == [[1, 1, 1, 1, 1], [1, 1, 1, 1, 0]]
+
+
+def test_generation_counter_skips_start_and_padding():
+    torch = pytest.importorskip("torch")
+    counter = GenerationCounter()
+    counter.add(torch.tensor([[0, 5, 6, 1], [0, 7, 1, 0]]), pad_id=0)
+    assert (counter.calls, counter.sequences, counter.tokens) == (1, 2, 5)
+    counter.reset()
+    assert counter.tokens == 0
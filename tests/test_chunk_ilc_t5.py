@@ -0,0 +1,140 @@
+import sys
+import os
+import json
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+sys.path.append(ROOT)
+
+SAMPLE_PATH = os.path.join(ROOT, 'data', 'sample_cleaned_inabs.json')
+
+
+def _texts(limit=5, chars=6000):
+    with open(SAMPLE_PATH, encoding='utf-8') as f:
+        return [record['input_text'][:chars] for record in json.load(f)[:limit]]
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    """
+    A small sentencepiece T5 tokenizer trained on the sample corpus, saved
+    like a Hugging Face model directory.
+    """
+    spm = pytest.importorskip("sentencepiece")
+    transformers = pytest.importorskip("transformers")
+    directory = tmp_path_factory.mktemp("t5_tokenizer")
+    sentences = " ".join(_texts(20, None)).split(". ")
+    spm.SentencePieceTrainer.train(sentence_iterator=iter(sentences), model_prefix=str(directory / "spiece"),
+                                   vocab_size=400, hard_vocab_limit=False, pad_id=0, eos_id=1, unk_id=2,
+                                   bos_id=-1, minloglevel=2)
+    # Saved as a slow tokenizer; the fast one is converted from it on load,
+    # which keeps T5's leading "▁" on the first word
+    transformers.T5Tokenizer(vocab_file=str(directory / "spiece.model"), extra_ids=0).save_pretrained(str(directory))
+    return str(directory)
+
+
+@pytest.fixture
+def chunker(model_dir, monkeypatch):
+    import chunk_ilc_t5
+    monkeypatch.setattr(chunk_ilc_t5, "MODEL_NAME", model_dir)
+    return chunk_ilc_t5
+
+
+def _encode(chunker, text):
+    tokenizer = chunker.load_tokenizer(chunker.MODEL_NAME, fast=True)
+    enc = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    return tokenizer, enc.input_ids, enc.offset_mapping
+
+
+def test_chunks_fit_the_model_input(chunker):
+    tokenizer = chunker.load_tokenizer(chunker.MODEL_NAME, fast=True)
+    for sentence_boundaries in (False, True):
+        for chunks in chunker.chunk_texts_t5(_texts(), max_tokens=64, sentence_boundaries=sentence_boundaries):
+            assert len(chunks) > 1
+            for chunk in chunks:
+                # prefix + chunk + </s>, as t5_ilc.py encodes it
+                assert len(tokenizer(chunker.PREFIX + chunk).input_ids) <= 64
+
+
+def test_cuts_land_on_word_and_sentence_boundaries(chunker):
+    text = _texts(1)[0]
+    _, _, offsets = _encode(chunker, text)
+    budget = 40
+
+    for start, end in chunker.chunk_spans(text, offsets, budget)[:-1]:
+        assert end - start <= budget
+        cut = offsets[end][0]
+        assert text[cut].isspace() or text[cut - 1].isspace()   # between words
+
+    sentence_starts = chunker._boundaries(text, offsets, True)
+    for start, end in chunker.chunk_spans(text, offsets, budget, sentence_boundaries=True)[:-1]:
+        assert end - start <= budget
+        if any(start < b <= start + budget for b in sentence_starts):
+            assert end in sentence_starts
+            assert text[:offsets[end][0]].rstrip()[-1] in ".!?\"')]"
+
+    # No boundary at all: fall back to token boundaries
+    word = "x" * 500
+    _, _, offsets = _encode(chunker, word)
+    spans = chunker.chunk_spans(word, offsets, budget)
+    assert spans[0] == (0, min(budget, len(offsets)))
+    assert [s for s, _ in spans[1:]] == [e for _, e in spans[:-1]]
+
+
+def test_overlap_repeats_whole_words(chunker):
+    text = _texts(1)[0]
+    _, _, offsets = _encode(chunker, text)
+    words = set(chunker._boundaries(text, offsets, False))
+    spans = chunker.chunk_spans(text, offsets, 40, overlap=8)
+    assert len(spans) > 2
+    for (start, end), (next_start, _) in zip(spans, spans[1:]):
+        assert start < next_start < end
+        assert end - next_start >= 8
+        assert next_start in words
+    assert spans[-1][1] == len(offsets)
+
+
+def test_degenerate_budget_is_rejected(chunker):
+    with pytest.raises(ValueError, match="budget"):
+        chunker.chunk_spans("a b", [(0, 1), (1, 3)], 0)
+    tokenizer = chunker.load_tokenizer(chunker.MODEL_NAME, fast=True)
+    assert chunker.token_budget(tokenizer, max_tokens=2) < 1
+    with pytest.raises(ValueError, match="budget"):
+        chunker.chunk_texts_t5(["some text"], max_tokens=2)
+    assert chunker.chunk_spans("", [], 10) == []
+
+
+def test_stored_chunk_ids_match_retokenization(chunker):
+    torch = pytest.importorskip("torch")
+    import t5_ilc
+    from src import t5_runner
+    settings = t5_ilc.make_settings(model_name=chunker.MODEL_NAME, max_input_tokens=160)
+    records = [{"id": i, "input_text": text} for i, text in enumerate(_texts())]
+
+    stored = list(chunker.chunk_records(records, max_tokens=64, store_ids=True))
+    assert [r["chunks"] for r in stored] == [r["chunks"] for r in chunker.chunk_records(records, max_tokens=64)]
+    for record in stored:
+        assert record["chunk_lengths"] == [len(ids) for ids in record["chunk_ids"]]
+        assert record["chunk_tokenizer"] == {"class": "T5Tokenizer", "model": chunker.MODEL_NAME}
+        from_ids = t5_ilc.stage1_inputs(settings, "", record["chunks"], record["chunk_ids"], record["chunk_lengths"],
+                                        record["chunk_tokenizer"])
+        from_text = t5_ilc.stage1_inputs(settings, "", record["chunks"])
+        assert len(from_ids) > 1
+        assert from_ids == from_text
+        tensors = zip(t5_runner.build_input_tensors(settings, from_ids),
+                      t5_runner.build_input_tensors(settings, from_text))
+        for a, b in tensors:
+            assert torch.equal(a, b)
+
+
+def test_stored_ids_of_another_tokenizer_are_ignored(chunker):
+    import t5_ilc
+    settings = t5_ilc.make_settings(model_name=chunker.MODEL_NAME, max_input_tokens=160)
+    chunks = chunker.chunk_text_t5(_texts(1)[0], max_tokens=64)
+    from_text = t5_ilc.stage1_inputs(settings, "", chunks)
+    wrong_ids = [[5] * 10 for _ in chunks]
+    for chunk_tokenizer in (None, {"class": "T5TokenizerFast", "model": chunker.MODEL_NAME},
+                            {"class": "T5Tokenizer", "model": "t5-small"}):
+        assert t5_ilc.stage1_inputs(settings, "", chunks, wrong_ids, None, chunk_tokenizer) == from_text
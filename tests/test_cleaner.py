@@ -21,3 +21,37 @@ def test_basic_cleanup():
     assert "appellant filed the petition" in cleaned
     assert "\n" not in cleaned
     assert "  " not in cleaned
+
+
+def _legacy_clean(text):
+    # Sequential passes as clean_text applied them before CleaningPipeline.
+    from cleaner import (normalize_quotes, remove_legal_headers, remove_case_numbers,
+                         standardize_spacing)
+    text = text.replace('\n', ' ')
+    text = normalize_quotes(text)
+    text = remove_legal_headers(text)
+    text = remove_case_numbers(text)
+    text = standardize_spacing(text)
+    return text.strip()
+
+
+def test_clean_many_matches_clean_text():
+    import json
+    from cleaner import CleaningPipeline
+
+    sample_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'sample_cleaned_inabs.json')
+    with open(sample_path, encoding='utf-8') as f:
+        records = json.load(f)
+
+    texts = [r["input_text"] for r in records] + [r["summary_text"] for r in records]
+    texts += [
+        "CRIMINAL APPEAL.IN THE HIGH COURT OF MADRAS case no. 45 “quoted” text",
+        "  WRIT PETITION No. 7 of 2001.\n\nIN THE HIGH COURT OF BOMBAY. Case number: 12 ‘x’",
+        "Nothing to strip here,   just   spaces.",
+        None,
+    ]
+    cleaned = CleaningPipeline().clean_many(texts)
+
+    assert cleaned == [clean_text(t) for t in texts]
+    assert cleaned[:-1] == [_legacy_clean(t) for t in texts[:-1]]
+    assert cleaned[-1] == ""
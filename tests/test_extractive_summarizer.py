@@ -0,0 +1,41 @@
+import sys
+import os
+import json
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+sys.path.append(ROOT)
+
+SAMPLE_PATH = os.path.join(ROOT, 'data', 'sample_cleaned_inabs.json')
+
+
+def test_parallel_summaries_match_save_summary_bytes(tmp_path):
+    pytest.importorskip("sklearn")
+    import extractive_summarizer as es
+    from src.sentence_index import SentenceIndex, build_sentence_index
+
+    with open(SAMPLE_PATH, encoding='utf-8') as f:
+        records = json.load(f)[:12]
+    index = str(tmp_path / "sample.sentences")
+    build_sentence_index(records, index, splitter="regex")
+
+    # Reference: the original all-in-memory dict written by save_summary
+    expected = {str(entry["id"]): es.textrank_summarize(entry["sentences"]) for entry in SentenceIndex(index)}
+    es.save_summary(expected, str(tmp_path / "expected.json"))
+    expected_bytes = (tmp_path / "expected.json").read_bytes()
+
+    for workers in (1, 2):
+        output = tmp_path / f"workers{workers}.json"
+        count = es.summarize_documents(index, str(output), batch_docs=5, workers=workers,
+                                       model_dir=str(tmp_path / "models"))
+        assert count == len(records)
+        assert list(json.loads(output.read_text(encoding='utf-8'))) == [str(r["id"]) for r in records]
+        assert output.read_bytes() == expected_bytes
+
+    empty = tmp_path / "empty.json"
+    with es.SummaryWriter(str(empty)):
+        pass
+    es.save_summary({}, str(tmp_path / "expected_empty.json"))
+    assert empty.read_bytes() == (tmp_path / "expected_empty.json").read_bytes()
@@ -0,0 +1,46 @@
+import sys
+import os
+import json
+import re
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from keywords import KeywordMatcher, get_matcher, load_keywords
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'sample_cleaned_inabs.json')
+
+
+def _legacy_find(sents, keywords, limit):
+    found = []
+    lowered = [s.lower() for s in sents]
+    for kw in keywords:
+        for i, s in enumerate(lowered):
+            if kw in s and sents[i] not in found:
+                found.append(sents[i])
+                if len(found) >= limit:
+                    return found
+    return found
+
+
+def test_matches_legacy_loop_on_sample_documents():
+    keywords = load_keywords()
+    matcher = get_matcher(tuple(keywords))
+    with open(SAMPLE_PATH, encoding='utf-8') as f:
+        records = json.load(f)
+    for record in records:
+        sents = [s.strip() for s in re.split(r'(?<=[.!?])\s+', record['input_text']) if s.strip()]
+        for limit in (1, 5, 50):
+            assert matcher.find_sentences(sents, limit) == _legacy_find(sents, keywords, limit)
+
+
+def test_overlapping_keywords_and_duplicate_sentences():
+    keywords = ["settlement", "sections", "section", "settlement agreement", "323"]
+    sents = [
+        "No settlement agreement was signed.",
+        "Under Sections 323 and 504.",
+        "No settlement agreement was signed.",
+        "Section 1323 is not relevant.",
+    ]
+    for limit in (1, 2, 3, 10):
+        assert KeywordMatcher(keywords).find_sentences(sents, limit) == _legacy_find(sents, keywords, limit)
+    assert KeywordMatcher([]).find_sentences(sents, 5) == []
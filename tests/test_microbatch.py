@@ -0,0 +1,59 @@
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from microbatch import MicroBatcher
+
+
+def test_concurrent_requests_share_batches():
+    calls = []
+
+    def process(payloads):
+        calls.append(list(payloads))
+        return [p.upper() for p in payloads]
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch=4, max_wait=0.2)
+        batcher.start()
+        results = await asyncio.gather(*(batcher.submit(t) for t in "abcdef"))
+        await batcher.stop()
+        return results, batcher
+
+    results, batcher = asyncio.run(run())
+    assert results == list("ABCDEF")
+    assert [len(c) for c in calls] == [4, 2]
+    assert (batcher.batches, batcher.requests) == (2, 6)
+
+
+def test_errors_reach_every_request_in_the_batch():
+    def process(payloads):
+        raise RuntimeError("model failed")
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch=8, max_wait=0.05)
+        batcher.start()
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_missing_results_fail_their_requests():
+    def process(payloads):
+        return [p.upper() for p in payloads][:1]
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch=8, max_wait=0.05)
+        batcher.start()
+        results = await asyncio.wait_for(asyncio.gather(batcher.submit("a"), batcher.submit("b"),
+                                                        return_exceptions=True), 5)
+        await batcher.stop()
+        return results
+
+    first, second = asyncio.run(run())
+    assert first == "A"
+    assert isinstance(second, RuntimeError) and "1 results for 2 payloads" in str(second)
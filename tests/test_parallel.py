@@ -0,0 +1,41 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from cleaner import clean_text
+from parallel import PoolStats, make_pool, ordered_map
+
+_state = {}
+
+
+def _init(offset):
+    _state["offset"] = offset
+
+
+def _shift(x):
+    return x + _state["offset"]
+
+
+def test_ordered_map_keeps_input_order_across_workers():
+    texts = [f"CIVIL APPEAL No. {i}. case no. {i} text   {i}" for i in range(300)]
+    stats = PoolStats()
+
+    out = list(ordered_map(clean_text, texts, workers=3, chunk_size=7, stats=stats))
+
+    assert out == [clean_text(t) for t in texts]
+    assert stats.total_items == len(texts)
+    assert "total" in stats.report()
+
+
+def test_ordered_map_inline_single_worker():
+    assert list(ordered_map(abs, iter([-3, 2, -1]), workers=1, chunk_size=2)) == [3, 2, 1]
+
+
+def test_make_pool_runs_the_initializer_in_each_worker():
+    assert make_pool(1) is None
+    pool = make_pool(2, _init, (100,))
+    try:
+        assert list(ordered_map(_shift, range(20), workers=2, chunk_size=3, executor=pool)) == list(range(100, 120))
+    finally:
+        pool.shutdown()
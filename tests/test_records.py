@@ -0,0 +1,65 @@
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import records
+from records import RecordWriter, completed_records, read_records, tap, write_records
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'sample_cleaned_inabs.json')
+
+
+def test_read_records_streams_pretty_printed_json(monkeypatch):
+    # A tiny read block forces records to straddle buffer boundaries.
+    monkeypatch.setattr(records, "_READ_BLOCK", 997)
+    with open(SAMPLE_PATH, encoding='utf-8') as f:
+        expected = json.load(f)
+
+    assert list(read_records(SAMPLE_PATH)) == expected
+    assert list(read_records(SAMPLE_PATH, limit=5)) == expected[:5]
+
+
+def test_round_trip_jsonl_and_json(tmp_path):
+    rows = [{"id": i, "text": f"“row” {i}\nline"} for i in range(10)]
+    for name in ("out.jsonl", "out.json"):
+        path = str(tmp_path / name)
+        assert write_records(path, rows, buffer_size=3) == len(rows)
+        assert list(read_records(path)) == rows
+
+    with open(tmp_path / "out.json", encoding='utf-8') as f:
+        assert json.load(f) == rows
+    assert write_records(str(tmp_path / "empty.json"), []) == 0
+    assert list(read_records(str(tmp_path / "empty.json"))) == []
+
+
+def test_tap_writes_and_passes_records_through(tmp_path):
+    path = str(tmp_path / "tap.jsonl")
+    with RecordWriter(path) as writer:
+        passed = [r["id"] for r in tap(writer, ({"id": i} for i in range(4)))]
+    assert passed == [0, 1, 2, 3]
+    assert [r["id"] for r in read_records(path)] == passed
+
+
+def test_resume_continues_after_a_torn_write(tmp_path):
+    rows = [{"id": i, "text": f"“row” {i}"} for i in range(6)]
+    for name in ("out.jsonl", "out.json"):
+        path = tmp_path / name
+        write_records(str(path), rows[:4])
+        # Simulate a crash: no closing bracket and half of a fifth record
+        content = path.read_text(encoding="utf-8").rstrip().rstrip("]").rstrip()
+        sep = "\n" if name.endswith(".jsonl") else ",\n"
+        path.write_text(content + sep + json.dumps(rows[4])[:10], encoding="utf-8")
+
+        assert [r["id"] for r in completed_records(str(path))] == [0, 1, 2, 3]
+        with RecordWriter(str(path), resume=True, fsync=True) as writer:
+            assert writer.count == 4
+            for row in rows[4:]:
+                writer.write(row)
+        assert list(read_records(str(path))) == rows
+        assert list(completed_records(str(path))) == rows
+
+    assert list(completed_records(str(tmp_path / "missing.json"))) == []
+    with RecordWriter(str(tmp_path / "new.json"), resume=True) as writer:
+        writer.write(rows[0])
+    assert list(read_records(str(tmp_path / "new.json"))) == rows[:1]
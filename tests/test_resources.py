@@ -0,0 +1,85 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import pytest
+
+import resources
+from resources import MissingResourceError, require_nltk
+
+
+def test_missing_nltk_resource_fails_without_download(monkeypatch):
+    monkeypatch.delenv(resources.ALLOW_DOWNLOAD_ENV, raising=False)
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("nltk.download must not be called")
+
+    import nltk
+    monkeypatch.setattr(nltk, "download", no_network)
+
+    with pytest.raises(MissingResourceError, match="not_a_real_resource"):
+        require_nltk("corpora/not_a_real_resource")
+
+
+def test_missing_model_raises_or_downloads(monkeypatch):
+    calls = []
+
+    class UncachedTokenizer:
+        @classmethod
+        def from_pretrained(cls, name, local_files_only=False):
+            calls.append(local_files_only)
+            if local_files_only:
+                raise ValueError("Either model_file or model_proto must be specified.")
+            return cls()
+
+    monkeypatch.delenv(resources.ALLOW_DOWNLOAD_ENV, raising=False)
+    with pytest.raises(MissingResourceError, match="not-cached-model"):
+        resources._from_pretrained(UncachedTokenizer, "not-cached-model")
+    assert calls == [True]
+
+    monkeypatch.setenv(resources.ALLOW_DOWNLOAD_ENV, "1")
+    assert isinstance(resources._from_pretrained(UncachedTokenizer, "not-cached-model"), UncachedTokenizer)
+    assert calls == [True, True, False]
+
+
+def test_missing_model_tokenizer(monkeypatch):
+    pytest.importorskip("transformers")
+    monkeypatch.delenv(resources.ALLOW_DOWNLOAD_ENV, raising=False)
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+    with pytest.raises(MissingResourceError):
+        resources.load_tokenizer("legalsum-tests/not-a-cached-model")
+
+
+def test_importing_src_modules_does_not_load_nltk():
+    import subprocess
+    code = (
+        "import sys; sys.path.insert(0, 'src'); "
+        "import cleaner, tokenizer; "
+        "print('nltk' in sys.modules)"
+    )
+    root = os.path.join(os.path.dirname(__file__), '..')
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_precision_modes(tmp_path, monkeypatch):
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    config = transformers.T5Config(vocab_size=64, d_model=16, d_kv=4, d_ff=32, num_layers=1, num_heads=2,
+                                   decoder_start_token_id=0)
+    transformers.T5ForConditionalGeneration(config).save_pretrained(tmp_path)
+    monkeypatch.setattr(resources, "load_tokenizer", lambda name: None)
+
+    with pytest.raises(ValueError, match="precision"):
+        resources.load_t5(str(tmp_path), "fp8")
+
+    _, model, device = resources.load_t5(str(tmp_path), "int8")
+    assert device.type == "cpu"
+    assert any("quantized" in type(m).__module__ for m in model.modules())
+
+    _, model, device = resources.load_t5(str(tmp_path), "bf16")
+    input_ids = torch.tensor([[5, 6, 7, 1]])
+    with resources.inference_context("bf16", device):
+        out = model.generate(input_ids=input_ids, max_length=5, num_beams=1)
+    assert out.shape[0] == 1
@@ -0,0 +1,73 @@
+import sys
+import os
+import re
+from itertools import islice
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from resources import has_nltk
+from sentence_index import SentenceIndex, build_sentence_index, index_path, open_sentence_index, sentence_spans
+
+RECORDS = [
+    {"id": 1, "input_text": "  The appeal is allowed.  Costs follow the event! Is that so? yes  "},
+    {"id": "b", "input_text": "Section 498A — the wife’s complaint. No stay was granted."},
+    {"id": 3, "input_text": ""},
+]
+
+
+def _regex_split(text):
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text.strip()) if s.strip()]
+
+
+def test_index_round_trip(tmp_path):
+    path = str(tmp_path / "cleaned_ilc.sentences")
+    assert build_sentence_index(RECORDS, path, splitter="regex") == 3
+
+    index = SentenceIndex(path)
+    assert len(index) == 3
+    for record in RECORDS:
+        assert index.sentences(record["id"]) == _regex_split(record["input_text"])
+    assert index.sentences("missing") is None
+    assert [r["id"] for r in index] == [1, "b", 3]
+    assert open_sentence_index(str(tmp_path / "nothing.sentences")) is None
+    assert index_path("data/cleaned_ilc.json") == os.path.join("data", "cleaned_ilc.sentences")
+
+
+def test_stale_index_is_rejected(tmp_path):
+    path = str(tmp_path / "cleaned_ilc.sentences")
+    build_sentence_index(RECORDS, path, splitter="regex")
+    index = SentenceIndex(path)
+    assert index.documents == 3
+    index.check([1, "b", 3])
+    index.check([1, 3], complete=False)
+    with pytest.raises(ValueError, match="stale"):
+        index.check([1, "b", 3, 4])
+    with pytest.raises(ValueError, match="3 documents"):
+        index.check([1, "b"])
+
+    assert list(index.checked(RECORDS)) == RECORDS
+    checked = index.checked(RECORDS + [{"id": 4}])
+    assert [r["id"] for r in islice(checked, 3)] == [1, "b", 3]
+    with pytest.raises(ValueError, match="document 4"):
+        next(checked)
+    assert list(index.checked(RECORDS[:2], complete=False)) == RECORDS[:2]
+    with pytest.raises(ValueError, match="3 documents"):
+        list(index.checked(RECORDS[:2]))
+
+
+def test_index_split_differently_is_refused(tmp_path):
+    path = index_path(str(tmp_path / "cleaned_ilc.json"), "regex")
+    assert path == str(tmp_path / "cleaned_ilc.regex.sentences")
+    build_sentence_index(RECORDS, path, splitter="regex")
+    assert open_sentence_index(path, "regex").splitter == "regex"
+    with pytest.raises(ValueError, match="'regex', not 'punkt'"):
+        open_sentence_index(path, "punkt")
+
+
+@pytest.mark.skipif(not has_nltk("punkt"), reason="NLTK punkt data not installed")
+def test_punkt_spans_match_sent_tokenize():
+    from nltk.tokenize import sent_tokenize
+    text = "The petitioner, Mr. Sharma, filed the FIR on 3.4.2001. The High Court dismissed it. Appeal allowed."
+    assert [text[s:e] for s, e in sentence_spans(text, "punkt")] == sent_tokenize(text)
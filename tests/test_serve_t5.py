@@ -0,0 +1,93 @@
+import sys
+import os
+import asyncio
+import json
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+sys.path.append(ROOT)
+
+import serve_t5
+from serve_t5 import SummaryService, make_handler
+from src.microbatch import MicroBatcher
+
+
+class StubModel:
+    """
+    Stands in for a T5 script module: "summarizes" by upper-casing.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def make_doc(self, entry):
+        return {"full_text": entry["input_text"]}
+
+    def two_stage_summarize_many(self, docs, settings, stats=None, batch_size=None):
+        texts = [d["full_text"] for d in docs]
+        self.batches.append(texts)
+        if "explode" in texts:
+            raise RuntimeError("generation failed")
+        return [t.upper() for t in texts]
+
+
+async def _request(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def _post(port, payload):
+    return _request(port, "POST", "/summarize", json.dumps(payload).encode())
+
+
+def test_handler_batches_requests_and_reports_errors(monkeypatch):
+    model = StubModel()
+    monkeypatch.setattr(serve_t5, "MAX_BODY_BYTES", 1000)
+
+    async def run():
+        batcher = MicroBatcher(SummaryService(model, None).summarize, max_batch=8, max_wait=0.2)
+        batcher.start()
+        server = await asyncio.start_server(make_handler(batcher, {"dataset": "stub"}), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            ok = await asyncio.gather(*(_post(port, {"id": i, "text": f" text {i} "}) for i in range(3)))
+            errors = [
+                await _request(port, "GET", "/nowhere"),
+                await _request(port, "GET", "/summarize"),
+                await _request(port, "POST", "/summarize", b"{not json"),
+                await _post(port, {"text": "   "}),
+                await _post(port, {"chunks": "not a list"}),
+                await _post(port, {"chunks": ["chunked input is ILC only"]}),
+                await _post(port, {"text": "x" * 2000}),
+                await _post(port, {"text": "explode"}),
+            ]
+            health = await _request(port, "GET", "/health")
+        finally:
+            server.close()
+            await server.wait_closed()
+            await batcher.stop()
+        return ok, errors, health
+
+    ok, errors, health = asyncio.run(run())
+    assert [(status, body["id"], body["summary"]) for status, body in ok] == \
+        [(200, i, f"TEXT {i}") for i in range(3)]
+    assert model.batches[0] == ["text 0", "text 1", "text 2"]     # one micro-batch
+    assert [status for status, _ in errors] == [404, 405, 400, 400, 400, 400, 413, 500]
+    assert "generation failed" in errors[-1][1]["error"]
+    status, body = health
+    assert status == 200 and body["dataset"] == "stub" and body["requests"] == 3
+
+
+def test_chunks_replace_text_only_for_chunked_services():
+    parsed = serve_t5.parse_request({"chunks": ["a", "b"]}, chunked=True)
+    assert parsed == {"id": None, "text": "", "chunks": ["a", "b"]}
+    with pytest.raises(serve_t5.HTTPError) as raised:
+        serve_t5.parse_request({"chunks": ["a", "b"]})
+    assert raised.value.status == 400
@@ -0,0 +1,67 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import cleaner
+from cleaner import clean_text
+from stage_cache import StageCache, cached_map, module_fingerprint
+
+CALLS = []
+
+
+def _counting_clean(text):
+    CALLS.append(text)
+    return clean_text(text)
+
+
+def test_cached_map_recomputes_only_new_content(tmp_path):
+    fingerprint = module_fingerprint(cleaner, aggressive=False)
+    texts = [f"IN THE HIGH COURT OF DELHI. case no. {i} text  {i}" for i in range(10)]
+
+    with StageCache("clean", fingerprint, cache_dir=str(tmp_path)) as cache:
+        first = list(cached_map(_counting_clean, texts, cache=cache, window=4))
+    assert first == [clean_text(t) for t in texts]
+    assert (cache.hits, cache.misses) == (0, 10)
+
+    CALLS.clear()
+    updated = texts[:5] + ["a brand new judgment"] + texts[5:]
+    with StageCache("clean", fingerprint, cache_dir=str(tmp_path)) as cache:
+        second = list(cached_map(_counting_clean, updated, cache=cache, window=4))
+    assert second == [clean_text(t) for t in updated]
+    assert CALLS == ["a brand new judgment"]
+    assert (cache.hits, cache.misses) == (10, 1)
+
+
+def test_cached_map_reads_one_window_ahead(tmp_path):
+    pulled = []
+
+    def items():
+        for i in range(100):
+            pulled.append(i)
+            yield str(i)
+
+    with StageCache("upper", "v1", cache_dir=str(tmp_path)) as cache:
+        results = cached_map(str.upper, items(), cache=cache, window=8)
+        assert next(results) == "0"
+        assert len(pulled) == 8
+        assert len(list(results)) == 99
+
+
+def test_fingerprint_change_invalidates_entries(tmp_path):
+    with StageCache("clean", "v1", cache_dir=str(tmp_path)) as cache:
+        list(cached_map(str.upper, ["a", "b"], cache=cache))
+    with StageCache("clean", "v2", cache_dir=str(tmp_path)) as cache:
+        assert list(cached_map(str.lower, ["A"], cache=cache)) == ["a"]
+        assert cache.misses == 1
+        assert cache.prune() == 2
+
+
+def test_size_limit_evicts_least_recently_used(tmp_path):
+    with StageCache("summaries", "v1", cache_dir=str(tmp_path), max_bytes=250) as cache:
+        cache.put_many({f"k{i}": "x" * 48 for i in range(4)})     # 4 x 50 bytes
+        cache.get_many(["k0"])                                   # k0 is now the most recent
+        cache.put_many({"k4": "x" * 48, "k5": "x" * 48})
+        assert cache.size_bytes() <= 250 * 0.9
+        assert cache.evicted == 2
+        assert set(cache.get_many([f"k{i}" for i in range(6)])) == {"k0", "k3", "k4", "k5"}
@@ -0,0 +1,136 @@
+import sys
+import os
+import json
+from dataclasses import replace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import t5_runner
+from batching import AdaptiveBatchSize
+
+
+def _fake_script(tmp_path, count=6):
+    """
+    A stand-in for scripts/t5_*.py: settings, a make_doc and a
+    two_stage_summarize_many that records one batch per window.
+    """
+    input_path = tmp_path / "input.jsonl"
+    input_path.write_text("".join(json.dumps({"id": i, "input_text": f"text {i}"}) + "\n" for i in range(count)))
+    settings = t5_runner.T5Settings(
+        input_path=str(input_path), output_path=str(tmp_path / "out.jsonl"), reference_path=str(input_path),
+        model_name="unused", num_beams=1, batch_size=2, max_batch_size=4, memory_limit_mb=1000.0, window_docs=2,
+        run_report_path=str(tmp_path / "report.json"), summary_cache_dir=str(tmp_path / "cache"),
+        summary_cache_mb=1, keywords=[],
+    )
+    return settings, _two_stage_summarize_many, _make_doc
+
+
+# Module level, so spawned --workers processes can unpickle them
+def _two_stage_summarize_many(docs, settings, stats=None, batch_size=None, reduction=None):
+    if isinstance(batch_size, AdaptiveBatchSize):
+        batch_size.update(len(docs), 0.01, rss_mb=1.0)
+    settings.generation.calls += 1
+    return [d["full_text"].upper() for d in docs]
+
+
+def _make_doc(entry, index=None):
+    return {"full_text": entry["input_text"]}
+
+
+def _no_model(*args):
+    raise AssertionError("the model was loaded")
+
+
+def test_cached_run_does_not_load_the_model(tmp_path, monkeypatch):
+    settings, summarize_many, make_doc = _fake_script(tmp_path)
+    monkeypatch.setattr(t5_runner, "load_t5", _no_model)
+    with t5_runner.open_summary_cache(settings, 1) as cache:
+        cache.put_many({"earlier": "summary"})
+
+    for workers in (1, 2):
+        output = tmp_path / f"workers{workers}.jsonl"
+        args = t5_runner.build_parser(settings, "test").parse_args(["--output", str(output),
+                                                                    "--workers", str(workers)])
+        t5_runner.run(t5_runner.apply_args(settings, args), args, "test", summarize_many, make_doc)
+        summaries = [json.loads(line)["refined_summary_improved"] for line in output.read_text().splitlines()]
+        assert summaries == [f"TEXT {i}" for i in range(6)]
+
+
+def test_worker_controller_summaries_are_merged(tmp_path, monkeypatch):
+    settings, summarize_many, make_doc = _fake_script(tmp_path)
+    monkeypatch.setattr(t5_runner, "load_t5", _no_model)
+    with t5_runner.open_summary_cache(settings, 1) as cache:
+        cache.put_many({"earlier": "summary"})
+
+    args = t5_runner.build_parser(settings, "test").parse_args(["--workers", "2"])
+    t5_runner.run(t5_runner.apply_args(settings, args), args, "test", summarize_many, make_doc)
+    with open(settings.run_report_path, encoding="utf-8") as f:
+        report = json.load(f)
+    workers = report["adaptive_batch_size"]["workers"]
+    assert 1 <= len(workers) <= 2
+    # One batch per window, three windows in all, none lost or repeated
+    assert sum(len(summary["history"]) for summary in workers.values()) == 3
+    for summary in workers.values():
+        assert summary["memory_limit_mb"] == 500.0   # a model copy each: half the limit each
+    assert report["generation"]["calls"] == 3   # every worker's counts, summed
+
+
+def test_sentence_index_is_checked_while_reading(tmp_path, monkeypatch):
+    from sentence_index import build_sentence_index
+    settings, summarize_many, make_doc = _fake_script(tmp_path)
+    args = t5_runner.build_parser(settings, "test").parse_args([])
+    path = str(tmp_path / "input.regex.sentences")
+    records = [{"id": i, "input_text": f"text {i}."} for i in range(6)]
+    build_sentence_index(records, path, splitter="regex")
+    t5_runner.run(replace(settings, sentence_index_path=path), args, "test", summarize_many, make_doc)
+
+    build_sentence_index(records[:4], path, splitter="regex")
+    with pytest.raises(SystemExit, match="document 4"):
+        t5_runner.run(replace(settings, sentence_index_path=path), args, "test", summarize_many, make_doc)
+    build_sentence_index(records, path, splitter="regex")
+    monkeypatch.setattr(t5_runner, "SENTENCE_SPLITTER", "punkt")
+    with pytest.raises(SystemExit, match="'regex', not 'punkt'"):
+        t5_runner.run(replace(settings, sentence_index_path=path), args, "test", summarize_many, make_doc)
+
+
+def test_workers_refuse_fp16(tmp_path):
+    settings, summarize_many, make_doc = _fake_script(tmp_path)
+    args = t5_runner.build_parser(settings, "test").parse_args(["--workers", "2", "--precision", "fp16"])
+    with pytest.raises(SystemExit, match="fp16"):
+        t5_runner.run(t5_runner.apply_args(settings, args), args, "test", summarize_many, make_doc)
+
+
+def test_hybrid_run_reports_rouge_change_against_full_input(tmp_path):
+    settings, summarize_many, make_doc = _fake_script(tmp_path)
+    references = tmp_path / "references.jsonl"
+    references.write_text("".join(json.dumps({"id": i, "summary_text": f"text {i}"}) + "\n" for i in range(6)))
+    compared = []
+
+    def compare(candidate_data, baseline_data, reference_dict):
+        compared.append((len(candidate_data), len(baseline_data), len(reference_dict)))
+        return {"processed": 6, "scores": {"rouge1": 0.5}}, {"scores": {"rouge1": 0.6}}, {"rouge1": -0.1}
+
+    args = t5_runner.build_parser(settings, "test").parse_args([])
+    t5_runner.run(t5_runner.apply_args(settings, args), args, "test", summarize_many, make_doc, compare=compare)
+    assert compared == []   # a full-input run has nothing to compare
+
+    args = t5_runner.build_parser(settings, "test").parse_args(
+        ["--output", str(tmp_path / "hybrid.jsonl"), "--preselect-tokens", "50", "--reference", str(references)])
+    t5_runner.run(t5_runner.apply_args(settings, args), args, "test", summarize_many, make_doc, compare=compare)
+    assert compared == [(6, 6, 6)]
+    with open(settings.run_report_path, encoding="utf-8") as f:
+        change = json.load(f)["rouge_change"]
+    assert change["baseline"] == settings.output_path
+    assert change["documents"] == 6
+    assert change["deltas"] == {"rouge1": -0.1}
+
+
+def test_merge_controller_summary_concatenates_history():
+    summaries = {}
+    t5_runner.merge_controller_summary(summaries, 7, {"final_size": 2, "history": [[2, 0.1, 1.0]]})
+    t5_runner.merge_controller_summary(summaries, 7, {"final_size": 3, "history": [[3, 0.1, 1.0]]})
+    t5_runner.merge_controller_summary(summaries, 8, {"final_size": 1, "history": []})
+    assert summaries == {7: {"final_size": 3, "history": [[2, 0.1, 1.0], [3, 0.1, 1.0]]},
+                         8: {"final_size": 1, "history": []}}
@@ -0,0 +1,80 @@
+import sys
+import os
+import json
+import re
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from textrank import block_similarity, pagerank, pagerank_many, select_within_budget, top_sentences
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'sample_cleaned_inabs.json')
+
+
+def _documents(limit=30):
+    with open(SAMPLE_PATH, encoding='utf-8') as f:
+        records = json.load(f)
+    docs = []
+    for record in records[:limit]:
+        sentences = [s for s in re.split(r'(?<=[.!?])\s+', record['input_text']) if s.strip()]
+        docs.append(sentences[:200])
+    return docs
+
+
+def _similarity(sentences):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    return cosine_similarity(TfidfVectorizer().fit_transform(sentences))
+
+
+def test_matches_networkx_selection():
+    nx = pytest.importorskip("networkx")
+    for sentences in _documents():
+        if len(sentences) <= 3:
+            continue
+        sim = _similarity(sentences)
+        nx_scores = nx.pagerank(nx.from_numpy_array(sim))
+        expected = [s for _, s in sorted(((nx_scores[i], s) for i, s in enumerate(sentences)), reverse=True)[:3]]
+
+        scores = pagerank(sim)
+        assert np.allclose(scores, [nx_scores[i] for i in range(len(sentences))], atol=1e-9)
+        assert top_sentences(sentences, scores, 3) == expected
+
+
+def test_batch_matches_single_and_handles_dangling_nodes():
+    sims = [_similarity(s) for s in _documents(10) if len(s) > 1]
+    isolated = np.array([[0.0, 0.0, 0.0], [0.0, 1.0, 0.5], [0.0, 0.5, 1.0]])
+    batch = pagerank_many(sims + [isolated, np.zeros((0, 0))])
+
+    for sim, scores in zip(sims, batch):
+        assert np.allclose(scores, pagerank(sim), atol=1e-9)
+    assert np.isclose(batch[-2].sum(), 1.0)
+    assert len(batch[-1]) == 0
+
+
+def test_block_similarity_matches_dense_and_bounds_neighbours():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    sentences = max(_documents(), key=len)
+    vectors = TfidfVectorizer().fit_transform(sentences)
+    dense = _similarity(sentences)
+
+    full = block_similarity(vectors, block_size=7)
+    assert np.allclose(full.toarray(), dense)
+
+    pruned = block_similarity(vectors, block_size=7, top_k=5)
+    assert (pruned != pruned.T).nnz == 0
+    assert np.allclose(pruned.toarray(), block_similarity(vectors, block_size=1000, top_k=5).toarray())
+    assert pruned.nnz <= len(sentences) * (5 + 1) * 2
+
+    strong = block_similarity(vectors, block_size=7, threshold=0.3).toarray()
+    assert np.allclose(strong, np.where(dense >= 0.3, dense, 0.0))
+
+
+def test_select_within_budget_keeps_document_order():
+    scores = np.array([0.1, 0.4, 0.2, 0.3])
+    assert select_within_budget(scores, [5, 5, 5, 5], budget=10) == [1, 3]
+    assert select_within_budget(scores, [5, 8, 5, 5], budget=12) == [1]      # nothing else fits beside 1
+    assert select_within_budget(scores, [5, 20, 5, 5], budget=12) == [2, 3]  # the best one never fits
+    assert select_within_budget(scores, [], budget=12) == []
@@ -0,0 +1,52 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import pytest
+
+from records import write_records
+from token_store import TokenStore, convert_json, is_token_store, read_tokenized, write_token_store
+
+
+def test_convert_json_round_trip(tmp_path):
+    records = [
+        {"id": 3, "tokens": ["The", "appellant", "filed", "the", "appeal"]},
+        {"id": 7, "tokens": []},
+        {"id": 9, "tokens": ["appeal", "dismissed", "The"]},
+    ]
+    json_path = str(tmp_path / "tokenized.json")
+    store_path = str(tmp_path / "tokenized.tokens")
+    write_records(json_path, records)
+
+    assert convert_json(json_path, store_path) == 3
+    assert is_token_store(store_path)
+
+    store = TokenStore(store_path)
+    assert len(store) == 3
+    assert list(store) == records
+    assert list(read_tokenized(store_path)) == list(read_tokenized(json_path))
+
+    ids = store.token_ids(2)
+    assert isinstance(store.ids, np.memmap)
+    assert np.shares_memory(ids, store.ids)
+    assert store.vocab[ids].tolist() == ["appeal", "dismissed", "The"]
+
+
+def test_failed_rewrite_keeps_the_old_store(tmp_path):
+    store_path = str(tmp_path / "tokenized.tokens")
+    write_token_store(store_path, [{"id": 1, "tokens": ["old", "store"]}])
+
+    def records():
+        yield {"id": 2, "tokens": ["new", "partial", "store"]}
+        raise RuntimeError("tokenizer crashed")
+
+    with pytest.raises(RuntimeError):
+        write_token_store(store_path, records())
+    assert list(TokenStore(store_path)) == [{"id": 1, "tokens": ["old", "store"]}]
+    assert sorted(os.listdir(tmp_path)) == ["tokenized.tokens"]
+
+    assert write_token_store(store_path, [{"id": 3, "tokens": ["new"]}]) == 1
+    assert list(TokenStore(store_path)) == [{"id": 3, "tokens": ["new"]}]
+    assert sorted(os.listdir(tmp_path)) == ["tokenized.tokens"]
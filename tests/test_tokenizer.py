@@ -0,0 +1,57 @@
+import sys
+import os
+import json
+import string
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import pytest
+
+from resources import has_nltk
+from tokenizer import remove_punctuation, tokenize_many, tokenize_regex, tokenize_text
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'sample_cleaned_inabs.json')
+
+
+def test_remove_punctuation_keeps_substring_semantics():
+    tokens = ["word", ".", "()", "''", "``", "...", "--", "", "-./", "Rs.590"]
+    expected = [t for t in tokens if t not in string.punctuation]
+    assert remove_punctuation(tokens) == expected
+
+
+def test_regex_backend_treebank_rules():
+    text = 'The appellant\'s case, filed on 24.7.1985, cannot stand. Mr. Rao (for "Ors.") argued: 1,000 "x".'
+    assert tokenize_regex(text) == [
+        'The', 'appellant', "'s", 'case', 'filed', 'on', '24.7.1985', 'can', 'not', 'stand',
+        'Mr.', 'Rao', 'for', '``', 'Ors', "''", 'argued', '1,000', '``', 'x', "''",
+    ]
+    assert tokenize_many(["", None, "a b"], backend="regex") == [[], [], ["a", "b"]]
+
+
+def _without_known_differences(tokens):
+    """
+    Undoes the differences listed in tokenize_regex's docstring.
+    """
+    normalized = []
+    for token in tokens:
+        if token in ("``", "''"):
+            normalized.append('"')   # opening or closing double quote
+            continue
+        # sentence-final period kept or split off; punctuation glued to the next word
+        token = token.rstrip(".").lstrip(",.'")
+        if token:
+            normalized.append(token)
+    return normalized
+
+
+@pytest.mark.skipif(not has_nltk("punkt"), reason="NLTK punkt data not installed")
+def test_regex_backend_matches_nltk_on_sample_data():
+    with open(SAMPLE_PATH, encoding='utf-8') as f:
+        records = json.load(f)
+    texts = [r["input_text"] for r in records] + [r["summary_text"] for r in records]
+
+    reference = tokenize_many(texts)
+    fast = tokenize_many(texts, backend="regex")
+    assert reference[:5] == [tokenize_text(t) for t in texts[:5]]
+    assert [_without_known_differences(ref) for ref in reference] == [_without_known_differences(got) for got in fast]
+
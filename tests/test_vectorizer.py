@@ -0,0 +1,38 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from vectorizer import load_vectorizer, model_path, shared_vectorizer
+
+SENTENCES = [
+    "The appeal is allowed and the order of the High Court is set aside.",
+    "The petitioner filed a writ petition under Article 226.",
+    "The tribunal held that the appellant was entitled to relief.",
+]
+
+
+def test_corpus_model_is_fitted_once_and_reused(tmp_path):
+    path = model_path("data/tokenized_ilc.json", str(tmp_path))
+    assert path.endswith("tfidf_tokenized_ilc.joblib")
+
+    fitted = shared_vectorizer("corpus", path, lambda: iter(SENTENCES))
+    assert os.path.isfile(path)
+
+    def no_refit():
+        raise AssertionError("corpus model should have been loaded from disk")
+
+    loaded = shared_vectorizer("corpus", path, no_refit)
+    assert np.allclose(loaded.transform(SENTENCES).toarray(), fitted.transform(SENTENCES).toarray())
+    assert load_vectorizer(str(tmp_path / "missing.joblib")) is None
+
+
+def test_document_and_hashing_modes():
+    assert shared_vectorizer("document") is None
+    rows = shared_vectorizer("hashing").transform(SENTENCES)
+    assert np.allclose(np.sqrt(rows.multiply(rows).sum(axis=1)), 1.0)
+    with pytest.raises(ValueError):
+        shared_vectorizer("bm25")